@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthrepo import RepoShape, make_repo  # noqa: E402
+from yagnidrift.git_tools import WorkingChanges, _git_records, get_working_changes  # noqa: E402
+from yagnidrift.gitindex import native_working_changes  # noqa: E402
+
+
+def five_call_changes(git_root: str) -> WorkingChanges:
+    # The collector get_working_changes replaced, kept here as the baseline: five git scans. Read as -z
+    # records like the other collectors, so git does not quote non-ASCII or special-character paths.
+    def names(*args: str) -> set[str]:
+        return {os.fsdecode(r) for r in _git_records([*args, "-z"], cwd=git_root) if r}
+
+    unstaged = names("diff", "--name-only")
+    staged = names("diff", "--name-only", "--cached")
+    untracked = names("ls-files", "--others", "--exclude-standard")
+    tracked_new = names("diff", "--name-only", "--diff-filter=A")
+    tracked_new |= names("diff", "--name-only", "--cached", "--diff-filter=A")
+    return WorkingChanges(changed_files=sorted(unstaged | staged | untracked), new_files=sorted(tracked_new | untracked))
+
+
+def _time(fn, root: str, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(root)
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(
+        description="Compare porcelain v2 change collection against the five-call path and the index reader"
+    )
+    p.add_argument("--repo", help="Existing repo to measure (default: generate a synthetic one)")
+    p.add_argument("--tracked", type=int, default=20000)
+    p.add_argument("--untracked", type=int, default=2000)
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.repo or str(make_repo(Path(tmp) / "repo", RepoShape(tracked=args.tracked, untracked=args.untracked)))
+
+        # Called directly rather than through native=True, so an unsupported repo fails instead of timing git.
+        def native(r: str):
+            return native_working_changes(r, cache_dir=Path(tmp) / "gitindex")
+
+        expected = get_working_changes(root)
+        if expected != five_call_changes(root) or expected != native(root):
+            print("error: collectors disagree", file=sys.stderr)
+            return 1
+
+        results = {}
+        collectors = (
+            ("porcelain_v2", get_working_changes),
+            ("legacy_five_calls", five_call_changes),
+            ("native_index", native),
+        )
+        for name, fn in collectors:
+            samples = _time(fn, root, args.repeat)
+            results[name] = {"median_s": statistics.median(samples), "min_s": min(samples)}
+        results["speedup"] = results["legacy_five_calls"]["median_s"] / results["porcelain_v2"]["median_s"]
+        results["native_speedup"] = results["porcelain_v2"]["median_s"] / results["native_index"]["median_s"]
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
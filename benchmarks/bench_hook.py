@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthrepo import RepoShape, make_repo  # noqa: E402
+
+from yagnidrift.hook import hook_script  # noqa: E402
+
+# End-to-end latency of the installed pre-commit hook (the script `git commit` runs) on a large index
+# with a few staged files, spec from .yagnidrift.toml. Exits 1 when the median exceeds --budget-ms
+# (default 100). Bare interpreter startup is reported alongside, for comparing machines.
+
+_BIN = Path(__file__).resolve().parent.parent / "bin" / "yagnidrift"
+
+_SPEC = """schema = 1
+max_new_files = 10
+max_new_dirs = 2
+max_added_loc = 5000
+ignore = ["docs/**"]
+"""
+
+
+def _run(root: str, script: str) -> tuple[float, subprocess.CompletedProcess[str]]:
+    t0 = time.perf_counter()
+    proc = subprocess.run(["sh", script], cwd=root, capture_output=True, text=True)
+    return time.perf_counter() - t0, proc
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Measure pre-commit hook latency on a large index")
+    p.add_argument("--repo", help="Existing repo with staged changes (default: generate a synthetic one)")
+    p.add_argument("--tracked", type=int, default=50000)
+    p.add_argument("--staged-new", type=int, default=20)
+    p.add_argument("--repeat", type=int, default=10)
+    p.add_argument("--budget-ms", type=float, default=100.0, help="Maximum median latency in ms (default: 100)")
+    args = p.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="yagnidrift-hook-") as tmp:
+        if args.repo:
+            root = args.repo
+        else:
+            shape = RepoShape(tracked=args.tracked, untracked=2000, modified=200, staged_new=args.staged_new)
+            root = str(make_repo(Path(tmp) / "repo", shape))
+            (Path(root) / ".yagnidrift.toml").write_text(_SPEC, encoding="utf-8")
+
+        script = str(Path(tmp) / "pre-commit")
+        Path(script).write_text(hook_script(strict=False), encoding="utf-8")
+        # The first run fills the spec and tracked-directory caches; a developer's hook runs warm after that.
+        _, first = _run(root, script)
+        if first.returncode != 0:
+            print(f"error: hook exited {first.returncode}: {first.stderr[-2000:]}", file=sys.stderr)
+            return 1
+        # The hook prints findings only; the score and file count come from the CLI's JSON report.
+        out = subprocess.run([sys.executable, str(_BIN), "--dir", root, "--json", "hook"], capture_output=True, text=True)
+        report = json.loads(out.stdout) if out.stdout.strip() else None
+        samples = [_run(root, script)[0] for _ in range(max(1, args.repeat))]
+        # How much of the latency is the interpreter alone, for comparing machines.
+        startup = []
+        for _ in range(max(1, args.repeat)):
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, "-c", "pass"], check=True)
+            startup.append(time.perf_counter() - t0)
+
+    samples.sort()
+    median_ms = statistics.median(samples) * 1000
+    interpreter_ms = statistics.median(startup) * 1000
+    result = {
+        "repo": args.repo or f"synthetic tracked={args.tracked} staged_new={args.staged_new}",
+        "budget_ms": args.budget_ms,
+        "median_ms": round(median_ms, 1),
+        "p90_ms": round(samples[int(0.9 * (len(samples) - 1))] * 1000, 1),
+        "interpreter_ms": round(interpreter_ms, 1),
+        "x_interpreter": round(median_ms / interpreter_ms, 1),
+        "staged_files": report["telemetry"]["hook"]["staged_files"] if report else None,
+        "score": report["score"] if report else None,
+    }
+    print(json.dumps(result, indent=2))
+    if median_ms > args.budget_ms:
+        print(f"over budget: {median_ms:.1f} ms > {args.budget_ms:.1f} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
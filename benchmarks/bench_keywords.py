@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import PurePosixPath
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from yagnidrift.keywords import compile_keywords  # noqa: E402
+
+
+def _loop_is_speculative(path: str, keywords: list[str]) -> bool:
+    # The per-keyword loop the scanner replaced.
+    low = path.lower()
+    stem = PurePosixPath(low).stem
+    parts = [p for p in low.replace("-", "_").split("/") if p]
+    for kw in keywords:
+        token = str(kw).strip().lower()
+        if not token:
+            continue
+        if token in stem:
+            return True
+        if any(token in part for part in parts):
+            return True
+    return False
+
+
+def _paths(n: int, rng: random.Random) -> list[str]:
+    words = ["core", "util", "model", "view", "store", "client", "handler", "generated", "proto", "schema"]
+    return [
+        "/".join(rng.choice(words) + str(rng.randrange(50)) for _ in range(rng.randint(1, 6))) + f"/f{i}.py"
+        for i in range(n)
+    ]
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Keyword scanner vs per-keyword loop")
+    p.add_argument("--keywords", type=int, default=60)
+    p.add_argument("--sizes", default="1000,10000,50000")
+    args = p.parse_args(argv)
+
+    rng = random.Random(1)
+    keywords = [f"kw{i:02d}thing" for i in range(args.keywords - 8)]
+    keywords += ["factory", "adapter", "manager", "engine", "framework", "orchestrator", "provider", "base"]
+
+    rows = []
+    for n in (int(x) for x in args.sizes.split(",")):
+        paths = _paths(n, rng)
+
+        t0 = time.perf_counter()
+        loop_hits = sum(_loop_is_speculative(p, keywords) for p in paths)
+        loop_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        scanner = compile_keywords(tuple(keywords))
+        scan_hits = sum(scanner.find(p) is not None for p in paths)
+        scan_s = time.perf_counter() - t0
+
+        if loop_hits != scan_hits:
+            print("error: scanner disagrees with loop", file=sys.stderr)
+            return 1
+        rows.append({"paths": n, "keywords": len(keywords), "loop_s": loop_s, "scanner_s": scan_s, "speedup": loop_s / scan_s})
+
+    print(json.dumps(rows, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+# Import cost of `yagnidrift wg check` on a task without a yagnidrift block (the common case), read
+# from `python -X importtime`. Exits 1 when the total import time (best of --repeat runs) exceeds
+# --budget-ms, or when a module that only the full check needs was imported at all.
+
+_BIN = Path(__file__).resolve().parent.parent / "bin" / "yagnidrift"
+
+# None of these are needed to answer a no-block task.
+FORBIDDEN = (
+    "speedrift_lane_sdk",
+    "yagnidrift.checks",
+    "yagnidrift.drift",
+    "yagnidrift.specs",
+    "yagnidrift.git_tools",
+    "yagnidrift.server",
+    "yagnidrift.timing",
+    "tomllib",
+    "sqlite3",
+    "subprocess",
+    "concurrent.futures",
+)
+
+
+def parse_importtime(stderr: str) -> list[dict[str, Any]]:
+    # `import time: self [us] | cumulative | imported package`, nesting shown by indentation.
+    out = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        name = fields[2].rstrip()
+        out.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip())) // 2,
+                "self_us": int(fields[0]),
+                "cumulative_us": int(fields[1]),
+            }
+        )
+    return out
+
+
+def _write_workgraph(root: Path) -> str:
+    tasks = [
+        {"kind": "task", "id": f"t{i}", "title": f"Task {i}", "description": "Plain task.", "status": "open"}
+        for i in range(200)
+    ]
+    wg = root / ".workgraph"
+    wg.mkdir()
+    (wg / "graph.jsonl").write_text("".join(json.dumps(t) + "\n" for t in tasks), encoding="utf-8")
+    return "t150"
+
+
+def measure(root: Path, task_id: str) -> dict[str, Any]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", str(_BIN), "--dir", str(root), "--no-daemon", "wg", "check"]
+        + ["--task", task_id],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"check exited {proc.returncode}: {proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    modules = {r["module"] for r in rows}
+    top = sorted((r for r in rows if r["depth"] == 0), key=lambda r: r["cumulative_us"], reverse=True)
+    return {
+        "total_ms": sum(r["self_us"] for r in rows) / 1000,
+        "modules": len(modules),
+        "forbidden": sorted(m for m in modules if m.split(".")[0] in FORBIDDEN or m in FORBIDDEN),
+        "top": [{"module": r["module"], "cumulative_ms": r["cumulative_us"] / 1000} for r in top[:10]],
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Check the import budget of `wg check` on a task without a block")
+    p.add_argument("--dir", help="Existing workgraph project to run in (default: a generated one)")
+    p.add_argument("--task", help="Task id without a yagnidrift block (required with --dir)")
+    p.add_argument(
+        "--budget-ms",
+        type=float,
+        default=75.0,
+        help="Maximum total import time, interpreter startup included (default: 75)",
+    )
+    p.add_argument("--repeat", type=int, default=5, help="Runs; the fastest is compared (default: 5)")
+    args = p.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="yagnidrift-importtime-") as tmp:
+        if args.dir:
+            if not args.task:
+                p.error("--task is required with --dir")
+            root, task_id = Path(args.dir), args.task
+        else:
+            root = Path(tmp)
+            task_id = _write_workgraph(root)
+        runs = [measure(root, task_id) for _ in range(max(1, args.repeat))]
+
+    best = min(runs, key=lambda r: r["total_ms"])
+    forbidden = sorted({m for r in runs for m in r["forbidden"]})
+    result = {"budget_ms": args.budget_ms, **best, "forbidden": forbidden}
+    print(json.dumps(result, indent=2))
+
+    failed = False
+    if best["total_ms"] > args.budget_ms:
+        print(f"over budget: {best['total_ms']:.1f} ms > {args.budget_ms:.1f} ms", file=sys.stderr)
+        failed = True
+    if forbidden:
+        print(f"imported on the no-block path: {', '.join(forbidden)}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
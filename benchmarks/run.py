@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthrepo import RepoShape, make_repo  # noqa: E402
+from yagnidrift import dirindex  # noqa: E402
+from yagnidrift.drift import _is_speculative, compute_yagni_drift  # noqa: E402
+from yagnidrift.git_tools import get_working_changes  # noqa: E402
+from yagnidrift.globmatch import match_any  # noqa: E402
+from yagnidrift.specs import YagnidriftSpec  # noqa: E402
+
+# Per-stage timings for the check hot path on a synthetic repo, as JSON. With --baseline, stages whose
+# median grew by more than --threshold (and by more than --min-delta-ms) are reported and exit 1.
+
+_SPEC = {
+    "schema": 1,
+    "max_new_files": 25,
+    "max_new_dirs": 5,
+    "ignore": ["**/*.log", "build/**", "**/__pycache__/**", "docs/**/*.md"],
+    "allow_paths": ["tests/**", "**/test_*.py", "core*/**/*_base.py"],
+}
+
+
+def _write_workgraph(root: Path) -> None:
+    block = "\n".join(["```yagnidrift", "schema = 1", "max_new_files = 25", "max_new_dirs = 5", "```"])
+    task = {"kind": "task", "id": "bench", "title": "Benchmark task", "description": block, "status": "open"}
+    wg = root / ".workgraph"
+    wg.mkdir(exist_ok=True)
+    (wg / "graph.jsonl").write_text(json.dumps(task) + "\n", encoding="utf-8")
+
+
+def _measure(fn: Callable[[], Any], repeat: int) -> dict[str, Any]:
+    fn()  # warm caches (compiled patterns, page cache) so samples measure steady state
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "max_s": max(samples), "n": repeat}
+
+
+def _cli_end_to_end(root: str) -> Callable[[], Any]:
+    from yagnidrift.cli import main as cli_main
+
+    def run() -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            cli_main(["--dir", root, "--no-daemon", "--json", "wg", "check-all", "--no-cache"])
+
+    return run
+
+
+def run_stages(root: str, repeat: int) -> dict[str, Any]:
+    spec = YagnidriftSpec.from_raw(_SPEC)
+    changes = get_working_changes(root)
+    dirs = dirindex.tracked_dirs(root)
+
+    def cold_tracked_dirs() -> None:
+        dirindex._memo.clear()
+        dirindex.tracked_dirs(root)
+
+    stages: dict[str, Callable[[], Any]] = {
+        "get_working_changes": lambda: get_working_changes(root),
+        "match_any_ignore": lambda: [match_any(p, spec.ignore) for p in changes.changed_files],
+        "match_any_allow_paths": lambda: [match_any(p, spec.allow_paths) for p in changes.new_files],
+        "tracked_dirs": cold_tracked_dirs,
+        "is_speculative": lambda: [_is_speculative(p, spec.abstraction_keywords) for p in changes.new_files],
+        "compute_yagni_drift": lambda: compute_yagni_drift(
+            task_id="bench",
+            task_title="Benchmark task",
+            description="",
+            spec=spec,
+            git_root=root,
+            changes=changes,
+            tracked_dirs=dirs,
+        ),
+    }
+
+    results: dict[str, Any] = {}
+    for name, fn in stages.items():
+        results[name] = _measure(fn, repeat)
+    try:
+        results["cli_end_to_end"] = _measure(_cli_end_to_end(root), repeat)
+    except ImportError as e:
+        # The CLI needs the workgraph SDK; the library stages above do not.
+        results["cli_end_to_end"] = {"skipped": f"{type(e).__name__}: {e}"}
+    results["_counts"] = {"changed_files": len(changes.changed_files), "new_files": len(changes.new_files)}
+    return results
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], *, threshold: float, min_delta_s: float) -> list[dict]:
+    rows = []
+    for name, cur in current["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if not isinstance(cur, dict) or "median_s" not in cur or not isinstance(base, dict) or "median_s" not in base:
+            continue
+        ratio = cur["median_s"] / base["median_s"] if base["median_s"] else float("inf")
+        regressed = ratio > threshold and cur["median_s"] - base["median_s"] > min_delta_s
+        rows.append(
+            {
+                "stage": name,
+                "baseline_s": base["median_s"],
+                "current_s": cur["median_s"],
+                "ratio": round(ratio, 3),
+                "regressed": regressed,
+            }
+        )
+    return rows
+
+
+def _git_version() -> str:
+    try:
+        return subprocess.check_output(["git", "--version"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Time each yagnidrift stage on a synthetic repo")
+    p.add_argument("--repo", help="Existing repo to measure (default: generate a synthetic one)")
+    p.add_argument("--tracked", type=int, default=20000)
+    p.add_argument("--untracked", type=int, default=2000)
+    p.add_argument("--staged-new", type=int, default=200)
+    p.add_argument("--depth", type=int, default=RepoShape.depth)
+    p.add_argument("--keyword-density", type=float, default=RepoShape.keyword_density)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--out", help="Write results JSON here (default: stdout)")
+    p.add_argument("--baseline", help="Compare against a results JSON written by an earlier run")
+    p.add_argument("--threshold", type=float, default=1.25, help="Regression ratio vs baseline median (default: 1.25)")
+    p.add_argument("--min-delta-ms", type=float, default=2.0, help="Ignore slowdowns smaller than this (default: 2)")
+    args = p.parse_args(argv)
+
+    shape = RepoShape(
+        tracked=args.tracked,
+        untracked=args.untracked,
+        staged_new=args.staged_new,
+        depth=args.depth,
+        keyword_density=args.keyword_density,
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.repo:
+            root = args.repo
+        else:
+            root = str(make_repo(Path(tmp) / "repo", shape))
+            _write_workgraph(Path(root))
+        stages = run_stages(root, args.repeat)
+
+    results: dict[str, Any] = {
+        "meta": {
+            "shape": None if args.repo else asdict(shape),
+            "counts": stages.pop("_counts"),
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "git": _git_version(),
+            "platform": platform.platform(),
+        },
+        "stages": stages,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        rows = compare(results, baseline, threshold=args.threshold, min_delta_s=args.min_delta_ms / 1000)
+        results["comparison"] = rows
+        for row in rows:
+            flag = "REGRESSED" if row["regressed"] else "ok"
+            print(
+                f"{row['stage']:<24} {row['baseline_s'] * 1000:9.2f}ms -> {row['current_s'] * 1000:9.2f}ms"
+                f"  x{row['ratio']:<6} {flag}",
+                file=sys.stderr,
+            )
+        if any(row["regressed"] for row in rows):
+            exit_code = 1
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
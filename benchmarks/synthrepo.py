@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+_WORDS = ["core", "util", "model", "view", "store", "client", "handler", "service", "parser", "report", "common", "api"]
+_KEYWORDS = ["factory", "adapter", "manager", "engine", "provider", "base"]
+
+
+@dataclass(frozen=True)
+class RepoShape:
+    tracked: int = 2000
+    untracked: int = 200
+    modified: int = 50
+    staged_new: int = 20
+    depth: int = 4
+    fanout: int = 8
+    keyword_density: float = 0.05
+    seed: int = 1
+
+
+def _git(root: Path, *args: str) -> None:
+    subprocess.run(
+        ["git", "-C", str(root), "-c", "user.email=bench@example.com", "-c", "user.name=bench", *args],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def _random_path(rng: random.Random, shape: RepoShape, ext: str = ".py") -> str:
+    depth = rng.randint(1, max(1, shape.depth))
+    parts = [f"{rng.choice(_WORDS)}{rng.randrange(shape.fanout)}" for _ in range(depth)]
+    stem = f"{rng.choice(_WORDS)}_{rng.randrange(1 << 30):x}"
+    if rng.random() < shape.keyword_density:
+        stem = f"{stem}_{rng.choice(_KEYWORDS)}"
+    return "/".join([*parts, stem + ext])
+
+
+def _write_files(root: Path, paths: list[str], rng: random.Random) -> None:
+    for rel in paths:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lines = rng.randint(1, 40)
+        path.write_text("".join(f"x{i} = {i}\n" for i in range(lines)), encoding="utf-8")
+
+
+def make_repo(root: Path, shape: RepoShape) -> Path:
+    rng = random.Random(shape.seed)
+    root.mkdir(parents=True, exist_ok=True)
+    _git(root, "init", "-q")
+
+    tracked = sorted({_random_path(rng, shape) for _ in range(shape.tracked)})
+    _write_files(root, tracked, rng)
+    (root / ".gitignore").write_text("*.log\n", encoding="utf-8")
+    _git(root, "add", "-A")
+    _git(root, "commit", "-q", "-m", "synthetic baseline")
+
+    for rel in rng.sample(tracked, min(shape.modified, len(tracked))):
+        with open(root / rel, "a", encoding="utf-8") as f:
+            f.write("changed = True\n")
+
+    staged = sorted({_random_path(rng, shape) for _ in range(shape.staged_new)})
+    _write_files(root, staged, rng)
+    if staged:
+        subprocess.run(
+            ["git", "-C", str(root), "add", "--pathspec-from-file=-", "--pathspec-file-nul"],
+            input=b"\0".join(p.encode() for p in staged),
+            check=True,
+        )
+
+    untracked = sorted({_random_path(rng, shape) for _ in range(shape.untracked)} - set(tracked))
+    _write_files(root, untracked, rng)
+    return root
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Generate a synthetic git repo for yagnidrift benchmarks")
+    p.add_argument("dest")
+    p.add_argument("--tracked", type=int, default=RepoShape.tracked)
+    p.add_argument("--untracked", type=int, default=RepoShape.untracked)
+    p.add_argument("--modified", type=int, default=RepoShape.modified)
+    p.add_argument("--staged-new", type=int, default=RepoShape.staged_new)
+    p.add_argument("--depth", type=int, default=RepoShape.depth)
+    p.add_argument("--keyword-density", type=float, default=RepoShape.keyword_density)
+    p.add_argument("--seed", type=int, default=RepoShape.seed)
+    args = p.parse_args(argv)
+
+    dest = Path(args.dest)
+    if dest.exists() and any(dest.iterdir()):
+        print(f"error: {dest} is not empty", file=sys.stderr)
+        return 2
+    make_repo(
+        dest,
+        RepoShape(
+            tracked=args.tracked,
+            untracked=args.untracked,
+            modified=args.modified,
+            staged_new=args.staged_new,
+            depth=args.depth,
+            keyword_density=args.keyword_density,
+            seed=args.seed,
+        ),
+    )
+    print(os.fspath(dest))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,29 @@
+import os
+import subprocess
+from pathlib import Path
+
+# Throwaway git repositories for tests. Commits use a fixed identity, so no user config is needed.
+
+
+def git(root: str | os.PathLike[str], *args: str) -> str:
+    return subprocess.run(
+        ["git", "-C", os.fspath(root), "-c", "user.email=t@example.com", "-c", "user.name=t", *args],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+def write(root: str | os.PathLike[str], rel: str, text: str = "x\n") -> None:
+    path = Path(root) / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def make_repo(root: str | os.PathLike[str], files: dict[str, str]) -> None:
+    # `git init` plus one commit holding `files` (path -> text).
+    git(root, "init", "-q")
+    for rel, text in files.items():
+        write(root, rel, text)
+    git(root, "add", "-A")
+    git(root, "commit", "-q", "-m", "init")
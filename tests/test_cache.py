@@ -0,0 +1,155 @@
+import importlib.util
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from gitrepo import git, make_repo
+from yagnidrift import cache
+from yagnidrift.cache import MergeBaseCache, ResultCache, cache_key, worktree_fingerprint
+from yagnidrift.contracts import format_default_contract_block
+from yagnidrift.git_tools import find_git_dir, read_head_oid
+
+
+class TestWorktreeFingerprint(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        make_repo(self.root, {"app.py": "x = 1\n"})
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_head_matches_rev_parse(self) -> None:
+        git_dir = find_git_dir(self.root)
+        assert git_dir is not None
+        self.assertEqual(git(str(self.root), "rev-parse", "HEAD"), read_head_oid(git_dir))
+        git(str(self.root), "pack-refs", "--all")
+        self.assertEqual(git(str(self.root), "rev-parse", "HEAD"), read_head_oid(git_dir))
+
+    def test_changes_with_worktree_index_and_head(self) -> None:
+        base = worktree_fingerprint(self.root)
+        self.assertIsNotNone(base)
+        self.assertEqual(base, worktree_fingerprint(self.root / "."))
+
+        (self.root / ".workgraph").mkdir()
+        (self.root / ".workgraph" / "graph.jsonl").write_text("{}\n", encoding="utf-8")
+        base = worktree_fingerprint(self.root, wg_dir=self.root / ".workgraph")
+        (self.root / ".workgraph" / "last.json").write_text("{}\n", encoding="utf-8")
+        self.assertEqual(base, worktree_fingerprint(self.root, wg_dir=self.root / ".workgraph"))
+        self.assertNotEqual(base, worktree_fingerprint(self.root))
+
+        (self.root / "new.py").write_text("y = 2\n", encoding="utf-8")
+        untracked = worktree_fingerprint(self.root)
+        self.assertNotEqual(untracked, worktree_fingerprint(self.root, wg_dir=self.root / ".workgraph"))
+        self.assertNotEqual(base, untracked)
+
+        git(str(self.root), "add", "new.py")
+        staged = worktree_fingerprint(self.root)
+        self.assertNotEqual(untracked, staged)
+
+        git(str(self.root), "commit", "-q", "-m", "more")
+        self.assertNotEqual(staged, worktree_fingerprint(self.root))
+
+    def test_workgraph_in_a_subdirectory_is_left_out(self) -> None:
+        wg_dir = self.root / "svc" / ".workgraph"
+        wg_dir.mkdir(parents=True)
+        base = worktree_fingerprint(self.root / "svc", wg_dir=wg_dir)
+        (wg_dir / ".yagnidrift" / "cache").mkdir(parents=True)
+        (wg_dir / ".yagnidrift" / "cache" / "k.json").write_text("{}\n", encoding="utf-8")
+        self.assertEqual(base, worktree_fingerprint(self.root / "svc", wg_dir=wg_dir))
+
+        # Only that directory: a `.workgraph` elsewhere is an ordinary untracked directory.
+        (self.root / "other" / ".workgraph").mkdir(parents=True)
+        (self.root / "other" / ".workgraph" / "graph.jsonl").write_text("{}\n", encoding="utf-8")
+        self.assertNotEqual(base, worktree_fingerprint(self.root / "svc", wg_dir=wg_dir))
+
+    def test_ignored_directories_are_not_walked(self) -> None:
+        (self.root / ".gitignore").write_text("node_modules/\nvendor/\n", encoding="utf-8")
+        (self.root / "vendor").mkdir()
+        (self.root / "vendor" / "kept.py").write_text("k = 1\n", encoding="utf-8")
+        git(str(self.root), "add", ".gitignore")
+        git(str(self.root), "add", "-f", "vendor/kept.py")
+        git(str(self.root), "commit", "-q", "-m", "ignore")
+        base = worktree_fingerprint(self.root)
+
+        (self.root / "node_modules" / "pkg").mkdir(parents=True)
+        (self.root / "node_modules" / "pkg" / "index.js").write_text("x\n", encoding="utf-8")
+        self.assertEqual(base, worktree_fingerprint(self.root))
+
+        # A tracked file inside an ignored directory is still a working change.
+        (self.root / "vendor" / "kept.py").write_text("k = 22\n", encoding="utf-8")
+        self.assertNotEqual(base, worktree_fingerprint(self.root))
+
+    def test_merge_base_is_cached_per_commit_pair(self) -> None:
+        root = str(self.root)
+        base = git(root, "rev-parse", "HEAD")
+        git(root, "branch", "trunk")
+        (self.root / "app.py").write_text("x = 2\n", encoding="utf-8")
+        git(root, "commit", "-q", "-am", "more")
+
+        mb_cache = MergeBaseCache(self.root / ".workgraph" / "mb.json")
+        self.assertEqual(base, mb_cache.lookup(root, "trunk"))
+        with mock.patch.object(cache, "merge_base", side_effect=AssertionError("git spawned")):
+            self.assertEqual(base, MergeBaseCache(mb_cache.path).lookup(root, "trunk"))
+
+        git(root, "commit", "-q", "--allow-empty", "-m", "again")
+        with mock.patch.object(cache, "merge_base", return_value="fresh") as spawned:
+            self.assertEqual("fresh", MergeBaseCache(mb_cache.path).lookup(root, "trunk"))
+        spawned.assert_called_once()
+
+    def test_outside_git_is_none(self) -> None:
+        with tempfile.TemporaryDirectory() as other:
+            self.assertIsNone(worktree_fingerprint(Path(other)))
+
+
+class TestResultCache(unittest.TestCase):
+    def test_roundtrip_and_eviction(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(Path(tmp) / "cache", max_entries=2)
+            keys = [cache_key(fingerprint="fp", task_id=f"t{i}", task_title="T", raw_block="schema = 1") for i in range(3)]
+            self.assertEqual(3, len(set(keys)))
+            for i, key in enumerate(keys):
+                cache.put(key, {"task_id": f"t{i}"})
+                past = time.time() - 100 + i
+                os.utime(Path(tmp) / "cache" / f"{key}.json", (past, past))
+            cache.evict()
+            self.assertIsNone(cache.get(keys[0]))
+            self.assertEqual({"task_id": "t2"}, cache.get(keys[2]))
+
+    def test_scope_is_part_of_the_key(self) -> None:
+        base = dict(fingerprint="fp", task_id="t", task_title="T", raw_block="schema = 1")
+        self.assertNotEqual(cache_key(**base, scope=("src",)), cache_key(**base, scope=("lib",)))
+
+    @unittest.skipUnless(importlib.util.find_spec("speedrift_lane_sdk"), "needs speedrift-lane-sdk")
+    def test_editing_contract_touch_misses(self) -> None:
+        from yagnidrift.checks import ChangeSnapshot, evaluate_task
+
+        with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as cache_dir:
+            git(tmp, "init", "-q")
+            (Path(tmp) / "src").mkdir()
+            (Path(tmp) / "src" / "a.py").write_text("x\n", encoding="utf-8")
+            results = ResultCache(Path(cache_dir))
+            spec = "```yagnidrift\nschema = 1\n```\n"
+            reports = []
+            for touch in (["src"], ["lib"]):
+                contract = format_default_contract_block(mode="core", objective="x", touch=touch)
+                task = {"title": "T", "description": contract + spec}
+                snapshot = ChangeSnapshot(Path(tmp), cache=results)
+                reports.append(evaluate_task(task_id="t", task=task, snapshot=snapshot))
+            self.assertEqual(["lib"], reports[1]["telemetry"]["scope"])
+            self.assertNotEqual("hit", reports[1]["telemetry"].get("cache"))
+
+    def test_expired_entries_miss(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(Path(tmp), max_age_seconds=10)
+            cache.put("k", {"task_id": "t"})
+            old = time.time() - 60
+            os.utime(Path(tmp) / "k.json", (old, old))
+            self.assertIsNone(cache.get("k"))
+
+
+if __name__ == "__main__":
+    unittest.main()
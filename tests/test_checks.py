@@ -0,0 +1,180 @@
+import contextlib
+import importlib.util
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from gitrepo import make_repo, write
+
+_HAS_SDK = importlib.util.find_spec("speedrift_lane_sdk") is not None
+
+
+def _task(task_id: str, scope: list[str] | None = None, status: str = "open") -> dict:
+    spec = "schema = 1\n" + (f"scope = {json.dumps(scope)}\n" if scope else "")
+    return {
+        "kind": "task",
+        "id": task_id,
+        "title": f"Task {task_id}",
+        "status": status,
+        "description": f"Work.\n```yagnidrift\n{spec}```\n",
+    }
+
+
+class _StubWorkgraph:
+    # Stands in for the SDK's `wg` wrapper: tasks come from graph.jsonl, writes are recorded.
+    def __init__(self, *, wg_dir: Path, project_dir: Path) -> None:
+        self.wg_dir = wg_dir
+        self.calls: list[tuple] = []
+
+    def show_task(self, task_id: str) -> dict | None:
+        from yagnidrift.workgraph import load_graph_tasks
+
+        return (load_graph_tasks(self.wg_dir) or {}).get(task_id)
+
+    def __getattr__(self, name: str):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+
+@unittest.skipUnless(_HAS_SDK, "needs speedrift-lane-sdk")
+class _RepoCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        make_repo(self.root, {"svc/a/x.py": "x\n", "svc/b/y.py": "y\n", ".gitignore": ".workgraph/\n"})
+        self.wg_dir = self.root / ".workgraph"
+        self.wg_dir.mkdir()
+        for patcher in (
+            mock.patch("yagnidrift.checks.Workgraph", _StubWorkgraph),
+            mock.patch("yagnidrift.checks.find_workgraph_dir", return_value=self.wg_dir),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def write_graph(self, tasks: list[dict]) -> None:
+        (self.wg_dir / "graph.jsonl").write_text("".join(json.dumps(t) + "\n" for t in tasks), encoding="utf-8")
+
+
+class TestShardedSnapshots(_RepoCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.write_graph([_task("a", ["svc/a"]), _task("b", ["svc/b"])])
+        write(self.root, "svc/a/x.py", "edited\n")
+        write(self.root, "svc/b/new.py")
+        write(self.root, "svc/b/other.py")
+
+    def changed(self, combined: dict) -> dict[str, int]:
+        return {r["task_id"]: r["telemetry"]["files_changed"] for r in combined["reports"]}
+
+    def test_cold_context_collects_one_snapshot_per_shard(self) -> None:
+        from yagnidrift.checks import CheckContext, CheckOptions
+
+        ctx = CheckContext(self.wg_dir)
+        options = CheckOptions(use_cache=False)
+        snapshots = ctx.shard_snapshots(ctx.select_tasks([], include_closed=False), options)
+        self.assertEqual(2, len({id(s) for s in snapshots}))
+        self.assertEqual({"a": 1, "b": 2}, self.changed(ctx.check_all([], include_closed=False, options=options)))
+
+    def test_warm_context_shares_one_snapshot(self) -> None:
+        from yagnidrift.checks import CheckOptions, WarmCheckContext
+
+        for watch in ("off", "poll"):
+            with self.subTest(watch=watch):
+                ctx = WarmCheckContext(self.wg_dir, snapshot_ttl=60.0, watch=watch)
+                self.addCleanup(ctx.close)
+                options = CheckOptions(use_cache=False)
+                with mock.patch("yagnidrift.checks.ThreadPoolExecutor") as pool:
+                    snapshots = ctx.shard_snapshots(ctx.select_tasks([], include_closed=False), options)
+                pool.assert_not_called()  # nothing loads the shared snapshot from several threads
+                self.assertEqual(1, len({id(s) for s in snapshots}))
+                if ctx.tracker is not None:
+                    with mock.patch.object(ctx.tracker, "snapshot", wraps=ctx.tracker.snapshot) as tracked:
+                        combined = ctx.check_all([], include_closed=False, options=options)
+                    self.assertEqual(1, tracked.call_count)
+                else:
+                    combined = ctx.check_all([], include_closed=False, options=options)
+                self.assertEqual({"a": 1, "b": 2}, self.changed(combined))
+
+
+class TestCheckAll(_RepoCase):
+    def setUp(self) -> None:
+        super().setUp()
+        plain = {"kind": "task", "id": "plain", "title": "No block", "status": "open", "description": "Just work."}
+        strict = _task("strict")
+        strict["description"] = strict["description"].replace("schema = 1\n", "schema = 1\nmax_new_files = 0\n")
+        self.write_graph([_task("t1"), _task("done", status="done"), plain, strict, _task("t2")])
+
+    def context(self):
+        from yagnidrift.checks import CheckContext
+
+        return CheckContext(self.wg_dir)
+
+    def selected(self, task_ids: list[str], include_closed: bool = False) -> list[str]:
+        return [task_id for task_id, _ in self.context().select_tasks(task_ids, include_closed=include_closed)]
+
+    def run_cli(self, *args: str) -> tuple[int, str]:
+        from yagnidrift.cli import main
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+            code = main(["--dir", str(self.root), "--no-daemon", "wg", "check-all", "--no-cache", *args])
+        return code, out.getvalue()
+
+    def test_selects_open_tasks_with_a_block(self) -> None:
+        self.assertEqual(["t1", "strict", "t2"], self.selected([]))
+        self.assertEqual(["t1", "done", "strict", "t2"], self.selected([], include_closed=True))
+
+    def test_explicit_ids_are_deduplicated_in_order(self) -> None:
+        self.assertEqual(["t2", "plain", "t1"], self.selected(["t2", "plain", "t2", "t1"]))
+        with self.assertRaises(ValueError):
+            self.selected(["missing"])
+
+    def test_tasks_from_file(self) -> None:
+        ids = self.root / "ids.txt"
+        ids.write_text("t2  # second\n\nt1\nt2\n", encoding="utf-8")
+        code, out = self.run_cli("--tasks-from", str(ids), "--task", "t1", "--format", "json")
+        self.assertEqual(0, code)
+        self.assertEqual(["t1", "t2"], [r["task_id"] for r in json.loads(out)["reports"]])
+
+    def test_tasks_share_one_change_snapshot(self) -> None:
+        from yagnidrift import checks
+        from yagnidrift.checks import CheckOptions
+
+        write(self.root, "svc/a/x.py", "edited\n")
+        with mock.patch.object(checks, "get_working_changes", wraps=checks.get_working_changes) as collect:
+            combined = self.context().check_all([], include_closed=False, options=CheckOptions(use_cache=False))
+        self.assertEqual(1, collect.call_count)
+        self.assertEqual([1, 1, 1], [r["telemetry"]["files_changed"] for r in combined["reports"]])
+
+    def test_writes_combined_and_per_task_state(self) -> None:
+        from yagnidrift.checks import CheckOptions
+
+        combined = self.context().check_all(["t1", "plain"], include_closed=False, options=CheckOptions(use_cache=False))
+        self.assertEqual(
+            {"tasks_checked": 2, "tasks_with_findings": 0, "scores": {"green": 2, "yellow": 0, "red": 0}},
+            combined["summary"],
+        )
+        state = self.wg_dir / ".yagnidrift"
+        self.assertEqual(combined, json.loads((state / "check-all.json").read_text(encoding="utf-8")))
+        self.assertEqual("t1", json.loads((state / "tasks" / "t1" / "last.json").read_text(encoding="utf-8"))["task_id"])
+        # A task without a block is reported green but leaves no state behind.
+        self.assertFalse((state / "tasks" / "plain").exists())
+        self.assertFalse((state / "last.json").exists())
+
+    def test_exit_code_reflects_findings(self) -> None:
+        self.assertEqual((0, "checked: 2 tasks, 0 with findings"), self._summary("--task", "t1", "--task", "t2"))
+        write(self.root, "svc/c/new.py")
+        self.assertEqual((3, "checked: 3 tasks, 1 with findings"), self._summary())
+
+    def _summary(self, *args: str) -> tuple[int, str]:
+        code, out = self.run_cli(*args)
+        return code, out.strip().splitlines()[-1]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import contextlib
+import importlib.util
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from yagnidrift.cli import ExitCode, main
+
+_ROOT = Path(__file__).resolve().parent.parent
+
+
+class TestNdjson(unittest.TestCase):
+    def test_closed_pipe_is_not_an_error(self) -> None:
+        code = (
+            "from yagnidrift.cli import _emit_records\n"
+            "_emit_records({'type': 'progress', 'n': i} for i in range(200000))\n"
+            "print('after')\n"
+        )
+        proc = subprocess.Popen(
+            [sys.executable, "-c", code], cwd=_ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        assert proc.stdout is not None and proc.stderr is not None
+        self.assertEqual("progress", json.loads(proc.stdout.readline())["type"])
+        proc.stdout.close()
+        stderr = proc.stderr.read().decode()
+        self.assertEqual(0, proc.wait(), stderr)
+        self.assertNotIn("Traceback", stderr)
+
+    @unittest.skipUnless(importlib.util.find_spec("speedrift_lane_sdk"), "needs speedrift-lane-sdk")
+    def test_unknown_task_is_a_usage_error(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            wg_dir = Path(tmp) / ".workgraph"
+            wg_dir.mkdir()
+            (wg_dir / "graph.jsonl").write_text(json.dumps({"kind": "task", "id": "t1"}) + "\n", encoding="utf-8")
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr), contextlib.redirect_stdout(io.StringIO()):
+                code = main(["--dir", tmp, "wg", "check", "--task", "nope", "--format", "ndjson"])
+        self.assertEqual(ExitCode.usage, code)
+        self.assertIn("error:", stderr.getvalue())
+
+    @unittest.skipUnless(importlib.util.find_spec("speedrift_lane_sdk"), "needs speedrift-lane-sdk")
+    def test_unreadable_state_is_a_usage_error(self) -> None:
+        denied = PermissionError(13, "Permission denied", "graph.jsonl")
+        for fmt in ("text", "ndjson"):
+            with self.subTest(format=fmt), tempfile.TemporaryDirectory() as tmp:
+                stderr = io.StringIO()
+                with mock.patch("yagnidrift.checks.CheckContext.discover", side_effect=denied):
+                    with contextlib.redirect_stderr(stderr), contextlib.redirect_stdout(io.StringIO()):
+                        code = main(["--dir", tmp, "--no-daemon", "wg", "check", "--task", "t1", "--format", fmt])
+                self.assertEqual(ExitCode.usage, code)
+                self.assertIn("error: [Errno 13] Permission denied", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from yagnidrift import content
+from yagnidrift.content import analyze_paths, analyze_source, blob_id
+from yagnidrift.drift import compute_yagni_drift
+from yagnidrift.git_tools import WorkingChanges
+from yagnidrift.specs import YagnidriftSpec
+
+_FILES = {
+    "pkg/provider.py": """
+        from abc import ABC, abstractmethod
+
+        class BaseProviderFactory(ABC):
+            @abstractmethod
+            def make(self): ...
+
+        class OnlyFactory(BaseProviderFactory):
+            def make(self):
+                return 1
+    """,
+    "pkg/ports.py": """
+        from typing import Protocol
+
+        class Sink(Protocol):
+            def write(self, data: bytes) -> None: ...
+
+        class FileSink:
+            def write(self, data: bytes) -> None:
+                pass
+
+        class MemorySink:
+            def write(self, data: bytes) -> None:
+                pass
+    """,
+    "pkg/registry.py": """
+        HANDLER_REGISTRY = {}
+
+        def register(name):
+            def deco(fn):
+                HANDLER_REGISTRY[name] = fn
+                return fn
+            return deco
+
+        def create_store(kind):
+            if kind == "a":
+                return AStore()
+            return BStore()
+    """,
+    "pkg/database.py": """
+        def connect(url):
+            return url
+    """,
+}
+
+
+class TestContentAnalysis(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        for rel, text in _FILES.items():
+            path = Path(self.root) / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(textwrap.dedent(text), encoding="utf-8")
+        self.paths = sorted(_FILES)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_blob_id_matches_git(self) -> None:
+        self.assertEqual("8ab686eafeb1f44702738c8b0f24f2567c36da6d", blob_id(b"Hello, World!\n"))
+
+    def test_facts(self) -> None:
+        facts = analyze_source(textwrap.dedent(_FILES["pkg/provider.py"]).encode())
+        self.assertEqual([True, False], [c["abstract"] for c in facts["classes"]])
+        self.assertIn("SyntaxError", analyze_source(b"def (:\n")["error"])
+
+    def test_issues_and_clean_files(self) -> None:
+        result = analyze_paths(self.root, self.paths, new_paths=frozenset(self.paths))
+        kinds = sorted((i["kind"], i.get("name")) for i in result.issues())
+        self.assertEqual(
+            [
+                ("factory_or_registry", "BaseProviderFactory"),
+                ("factory_or_registry", "HANDLER_REGISTRY"),
+                ("factory_or_registry", "OnlyFactory"),
+                ("factory_or_registry", "create_store"),
+                ("factory_or_registry", "register"),
+                ("single_implementation_abstraction", "BaseProviderFactory"),
+            ],
+            kinds,
+        )
+        self.assertEqual({"pkg/database.py"}, result.clean())
+
+    def test_cache_skips_unchanged_blobs(self) -> None:
+        cache_dir = Path(self.root) / ".cache"
+        first = analyze_paths(self.root, self.paths, cache_dir=cache_dir)
+        self.assertEqual((4, 0), (first.parsed, first.cache_hits))
+        with mock.patch.object(content, "analyze_source", side_effect=AssertionError("re-parsed")):
+            second = analyze_paths(self.root, self.paths, cache_dir=cache_dir)
+        self.assertEqual((0, 4), (second.parsed, second.cache_hits))
+        self.assertEqual(first.facts, second.facts)
+
+    def test_process_pool_gives_the_same_facts(self) -> None:
+        serial = analyze_paths(self.root, self.paths)
+        with mock.patch.object(content, "POOL_THRESHOLD", 1):
+            pooled = analyze_paths(self.root, self.paths, jobs=2)
+        self.assertEqual(serial.facts, pooled.facts)
+
+    def test_findings_replace_name_heuristic(self) -> None:
+        spec = YagnidriftSpec.from_raw({"schema": 1, "max_new_files": 50, "max_new_dirs": 50, "content_analysis": True})
+        changes = WorkingChanges(changed_files=self.paths, new_files=self.paths)
+        result = analyze_paths(self.root, self.paths, new_paths=frozenset(self.paths))
+        report = compute_yagni_drift(
+            task_id="t", task_title="t", description="", spec=spec, git_root=self.root, changes=changes, content=result
+        )
+        kinds = {f["kind"] for f in report["findings"]}
+        self.assertEqual({"single_implementation_abstraction", "factory_or_registry", "speculative_abstraction"}, kinds)
+        flagged = next(f for f in report["findings"] if f["kind"] == "speculative_abstraction")["details"]["files"]
+        self.assertNotIn("pkg/database.py", flagged)
+        self.assertEqual(4, report["telemetry"]["content"]["parsed"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from gitrepo import git, make_repo
+from yagnidrift import dirindex
+from yagnidrift.drift import compute_yagni_drift
+from yagnidrift.git_tools import WorkingChanges
+from yagnidrift.specs import YagnidriftSpec
+
+
+class TestTrackedDirs(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        make_repo(self.root, dict.fromkeys(("src/app.py", "src/pkg/mod.py", "docs/index.md", "top.txt"), "x\n"))
+        dirindex._memo.clear()
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+        dirindex._memo.clear()
+
+    def test_lists_tracked_dirs_and_caches_per_tree(self) -> None:
+        cache_dir = Path(self.root) / ".workgraph" / "dirs"
+        self.assertEqual({"src", "src/pkg", "docs"}, dirindex.tracked_dirs(self.root, cache_dir=cache_dir))
+
+        dirindex._memo.clear()
+        with mock.patch.object(dirindex, "_git_lines") as lines, mock.patch.object(dirindex, "_git_records") as records:
+            self.assertEqual({"src", "src/pkg", "docs"}, dirindex.tracked_dirs(self.root, cache_dir=cache_dir))
+        lines.assert_not_called()
+        records.assert_not_called()
+
+    def test_unborn_head_tracks_nothing(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            git(tmp, "init", "-q")
+            self.assertEqual(frozenset(), dirindex.tracked_dirs(tmp))
+
+    def test_tracked_among_asks_only_for_given_dirs(self) -> None:
+        (Path(self.root) / "src" / "g[l]ob*").mkdir()
+        (Path(self.root) / "src" / "g[l]ob*" / "f.py").write_text("x\n", encoding="utf-8")
+        git(self.root, "add", "-A")
+        git(self.root, "commit", "-q", "-m", "glob-like dir")
+        wanted = ["src", "src/pkg", "src/g[l]ob*", "src/gl", "fresh", "fresh/a"]
+        self.assertEqual({"src", "src/pkg", "src/g[l]ob*"}, dirindex.tracked_among(self.root, wanted))
+        self.assertEqual(frozenset(), dirindex.tracked_among(self.root, []))
+        with mock.patch.object(dirindex, "_AMONG_LIMIT", 1):
+            self.assertEqual({"src", "src/pkg", "src/g[l]ob*"}, dirindex.tracked_among(self.root, wanted))
+
+    def test_new_dirs_use_all_untracked_ancestors(self) -> None:
+        spec = YagnidriftSpec.from_raw({"schema": 1, "max_new_files": 50, "max_new_dirs": 0})
+        new = ["src/extra.py", "src/pkg/deep/er/x.py", "src/pkg/deep/y.py", "fresh/a/b.py", "root.py"]
+        changes = WorkingChanges(changed_files=sorted(new), new_files=sorted(new))
+        dirs = dirindex.tracked_dirs(self.root)
+        report = compute_yagni_drift(
+            task_id="t", task_title="t", description="", spec=spec, git_root=self.root, changes=changes, tracked_dirs=dirs
+        )
+        self.assertEqual(
+            ["fresh", "fresh/a", "src/pkg/deep", "src/pkg/deep/er"], report["findings"][0]["details"]["new_dirs"]
+        )
+        legacy = compute_yagni_drift(
+            task_id="t", task_title="t", description="", spec=spec, git_root=self.root, changes=changes
+        )
+        self.assertEqual(
+            ["fresh/a", "src", "src/pkg/deep", "src/pkg/deep/er"], legacy["findings"][0]["details"]["new_dirs"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
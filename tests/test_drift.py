@@ -1,7 +1,7 @@
 import unittest
 
-from yagnidrift.drift import compute_yagni_drift
-from yagnidrift.git_tools import WorkingChanges
+from yagnidrift.drift import compute_yagni_drift, stream_yagni_drift
+from yagnidrift.git_tools import LineCount, UntrackedDir, WorkingChanges
 from yagnidrift.specs import YagnidriftSpec
 
 
@@ -46,6 +46,90 @@ class TestYagniDrift(unittest.TestCase):
         self.assertIn("speculative_abstraction", kinds)
         self.assertEqual("yellow", report["score"])
 
+    def test_line_budgets(self) -> None:
+        spec = YagnidriftSpec.from_raw({"ignore": ["build/**"], "max_new_loc": 100, "max_added_loc": 150})
+        changes = WorkingChanges(
+            changed_files=["src/app.py", "src/big.py", "src/small.py", "assets/logo.png", "build/gen.py"],
+            new_files=["src/big.py", "src/small.py", "assets/logo.png", "build/gen.py"],
+        )
+        counts = {
+            "src/app.py": LineCount(40, 12),
+            "src/big.py": LineCount(90, 0),
+            "src/small.py": LineCount(20, 0),
+            "assets/logo.png": LineCount(None, None),
+            "build/gen.py": LineCount(5000, 0),
+        }
+        report = compute_yagni_drift(
+            task_id="t1",
+            task_title="Task",
+            description="",
+            spec=spec,
+            git_root="/tmp/x",
+            changes=changes,
+            line_counts=counts,
+        )
+        self.assertEqual({"added": 150, "deleted": 12, "new": 110, "binary_files": 1}, report["telemetry"]["loc"])
+        findings = {f["kind"]: f for f in report["findings"]}
+        self.assertNotIn("too_many_added_loc", findings)
+        self.assertEqual(
+            [{"path": "src/big.py", "lines": 90}, {"path": "src/small.py", "lines": 20}],
+            findings["too_many_new_loc"]["details"]["largest_new_files"],
+        )
+
+        unlimited = compute_yagni_drift(
+            task_id="t1",
+            task_title="Task",
+            description="",
+            spec=YagnidriftSpec.from_raw({}),
+            git_root="/tmp/x",
+            changes=changes,
+        )
+        self.assertNotIn("loc", unlimited["telemetry"])
+
+    def test_bulk_new_directories(self) -> None:
+        spec = YagnidriftSpec.from_raw({"max_new_dirs": 5, "ignore": ["build/**"], "allow_paths": ["third_party/**"]})
+        changes = WorkingChanges(
+            changed_files=["src/app.py"],
+            new_files=[],
+            bulk_dirs=[
+                UntrackedDir("node_modules", 100000, True, ("node_modules/a/index.js",)),
+                UntrackedDir("build", 900, False, ("build/out.o",)),
+                UntrackedDir("third_party", 400, False, ("third_party/lib/x.c",)),
+            ],
+        )
+        kwargs = dict(task_id="t1", task_title="Task", description="", spec=spec, git_root="/tmp/x", changes=changes)
+        report = compute_yagni_drift(**kwargs)  # type: ignore[arg-type]
+        (finding,) = report["findings"]
+        self.assertEqual("bulk_new_directory", finding["kind"])
+        self.assertEqual(["node_modules"], [d["path"] for d in finding["details"]["dirs"]])
+        self.assertIn("100000+ files", finding["summary"])
+        self.assertEqual(2, report["telemetry"]["new_dirs"])  # node_modules and the allowed third_party
+        self.assertEqual(0, report["telemetry"]["new_files"])
+
+        paths = [r for r in stream_yagni_drift(**kwargs) if r["type"] == "path"]  # type: ignore[arg-type]
+        self.assertEqual([100000], [r["files"] for r in paths if r["kind"] == "bulk_dir"])
+
+    def test_stream_emits_every_path_and_the_same_report(self) -> None:
+        new_files = [f"vendor/pkg{i}/handler_factory.py" for i in range(200)] + ["build/out.o"]
+        spec = YagnidriftSpec.from_raw({"schema": 1, "max_new_files": 5, "max_new_dirs": 2, "ignore": ["build/**"]})
+        changes = WorkingChanges(changed_files=sorted(new_files + ["src/app.py"]), new_files=sorted(new_files))
+        kwargs = dict(task_id="t1", task_title="Task", description="", spec=spec, git_root="/tmp/x", changes=changes)
+
+        records = list(stream_yagni_drift(**kwargs))  # type: ignore[arg-type]
+        paths = [r for r in records if r["type"] == "path"]
+        self.assertEqual(200, sum(1 for r in paths if r["kind"] == "new_file"))
+        self.assertEqual(200, sum(1 for r in paths if r["kind"] == "new_dir"))
+        self.assertEqual(200, sum(1 for r in paths if r["kind"] == "speculative_abstraction"))
+        self.assertNotIn("build/out.o", {r["path"] for r in paths})
+
+        self.assertEqual("report", records[-1]["type"])
+        report = compute_yagni_drift(**kwargs)  # type: ignore[arg-type]
+        self.assertEqual(report, records[-1]["report"])
+        self.assertEqual([f["kind"] for f in report["findings"]], [r["kind"] for r in records if r["type"] == "finding"])
+        self.assertEqual(201, report["telemetry"]["files_changed"])
+        self.assertEqual(60, len(report["findings"][0]["details"]["new_files"]))
+        self.assertEqual({"dir": "vendor", "new_files": 200}, report["findings"][0]["details"]["hotspots"][0])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,90 @@
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from yagnidrift import specs
+from yagnidrift.fastpath import FENCE_MARK, find_no_block_task
+from yagnidrift.workgraph import find_graph_task, load_graph_tasks
+
+_ROOT = Path(__file__).resolve().parent.parent
+
+_HEAVY = ("speedrift_lane_sdk", "yagnidrift.checks", "yagnidrift.specs", "yagnidrift.git_tools", "sqlite3", "tomllib")
+
+
+def _write_graph(root: Path, tasks: list[dict]) -> Path:
+    wg_dir = root / ".workgraph"
+    wg_dir.mkdir()
+    (wg_dir / "graph.jsonl").write_text("".join(json.dumps(t) + "\n" for t in tasks), encoding="utf-8")
+    return wg_dir
+
+
+class TestFastPath(unittest.TestCase):
+    def test_fence_mark_matches_specs(self) -> None:
+        self.assertEqual(specs._FENCE_MARK, FENCE_MARK)
+
+    def test_find_graph_task(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            wg_dir = _write_graph(
+                Path(tmp),
+                [
+                    {"kind": "task", "id": "t10", "title": "Ten", "description": "after t1"},
+                    {"kind": "task", "id": "t1", "title": "One"},
+                    {"kind": "task", "id": "tâche", "title": "Accent"},
+                ],
+            )
+            self.assertEqual("One", find_graph_task(wg_dir, "t1")["title"])  # type: ignore[index]
+            self.assertEqual("Accent", find_graph_task(wg_dir, "tâche")["title"])  # type: ignore[index]
+            self.assertIsNone(find_graph_task(wg_dir, "t2"))
+            self.assertIsNone(find_graph_task(Path(tmp) / "missing", "t1"))
+
+    def test_find_graph_task_matches_load_graph_tasks(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            wg_dir = _write_graph(
+                Path(tmp),
+                [
+                    {"kind": "task", "id": "t1", "title": "Old"},
+                    {"kind": "task", "id": "t2", "title": "Other"},
+                    {"kind": "task", "id": "t1", "title": "New"},
+                ],
+            )
+            self.assertEqual("New", find_graph_task(wg_dir, "t1")["title"])  # type: ignore[index]
+            self.assertEqual(load_graph_tasks(wg_dir)["t1"], find_graph_task(wg_dir, "t1"))  # type: ignore[index]
+
+    def test_only_no_block_tasks_are_answered(self) -> None:
+        block = "Do it.\n```yagnidrift\nschema = 1\n```"
+        with tempfile.TemporaryDirectory() as tmp:
+            wg_dir = _write_graph(
+                Path(tmp),
+                [{"kind": "task", "id": "plain", "title": "Plain"}, {"kind": "task", "id": "spec", "description": block}],
+            )
+            report = find_no_block_task(wg_dir, "plain")
+            assert report is not None
+            self.assertEqual("green", report["score"])
+            self.assertEqual("Plain", report["task_title"])
+            self.assertIsNone(find_no_block_task(wg_dir, "spec"))
+            self.assertIsNone(find_no_block_task(wg_dir, "unknown"))
+
+    def test_cli_answers_without_heavy_imports(self) -> None:
+        code = (
+            "import sys\n"
+            "from yagnidrift.cli import main\n"
+            "rc = main(sys.argv[1:])\n"
+            f"print(sorted(m for m in {_HEAVY!r} if m in sys.modules), rc, file=sys.stderr)\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            _write_graph(Path(tmp), [{"kind": "task", "id": "plain", "title": "Plain"}])
+            proc = subprocess.run(
+                [sys.executable, "-c", code, "--dir", tmp, "--no-daemon", "wg", "check", "--task", "plain", "--format", "json"],
+                capture_output=True,
+                text=True,
+                cwd=_ROOT,
+            )
+        self.assertEqual("[] 0", proc.stderr.strip())
+        self.assertEqual("no yagnidrift block", json.loads(proc.stdout)["telemetry"]["note"])
+
+
+if __name__ == "__main__":
+    unittest.main()
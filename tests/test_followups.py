@@ -0,0 +1,66 @@
+import unittest
+
+from yagnidrift.followups import FollowupPlanner, followup_task, log_message
+
+_CLOSED = frozenset({"done", "abandoned"})
+
+
+def _report(task_id: str, findings: bool = True) -> dict:
+    return {
+        "task_id": task_id,
+        "task_title": f"Title {task_id}",
+        "score": "yellow" if findings else "green",
+        "spec": {"schema": 1},
+        "findings": [{"kind": "too_many_new_files", "severity": "warn", "summary": "x"}] if findings else [],
+        "recommendations": [{"action": "Split work"}] if findings else [],
+        "_yagnidrift_block": "```yagnidrift\nschema = 1\n```",
+    }
+
+
+class TestFollowupPlanner(unittest.TestCase):
+    def test_messages_and_tasks(self) -> None:
+        self.assertEqual("Yagnidrift: OK (no findings)", log_message(_report("t1", findings=False)))
+        self.assertEqual("Yagnidrift: yellow (too_many_new_files) | next: Split work", log_message(_report("t1")))
+        self.assertIsNone(followup_task(_report("t1", findings=False)))
+        task = followup_task(_report("t1"))
+        assert task is not None
+        self.assertEqual("drift-yagni-t1", task["task_id"])
+        self.assertEqual(["t1"], task["blocked_by"])
+        self.assertIn("```yagnidrift\nschema = 1\n```", task["description"])
+
+    def test_dedupes_and_caps_across_the_run(self) -> None:
+        planner = FollowupPlanner(closed_statuses=_CLOSED)
+        for task_id in ["t1", "t2", "t3", "t4", "t5"]:
+            planner.add(_report(task_id), write_log=True, create_followups=True)
+        planner.add(_report("t6", findings=False), write_log=True, create_followups=True)
+        planner.add({**_report("t7"), "spec": None}, write_log=True, create_followups=True)
+        existing = {
+            "drift-yagni-t2": {"status": "open"},
+            "drift-yagni-old": {"status": "done"},
+            "t1": {"status": "open"},
+        }
+
+        plan = planner.plan(existing)
+        self.assertEqual(["t1", "t2", "t3", "t4", "t5", "t6", "t7"], [task_id for task_id, _ in plan.logs])
+        self.assertEqual(["drift-yagni-t1", "drift-yagni-t3"], [t["task_id"] for t in plan.create])
+        self.assertEqual(
+            [
+                {"task_id": "drift-yagni-t2", "reason": "exists"},
+                {"task_id": "drift-yagni-t4", "reason": "lane_cap"},
+                {"task_id": "drift-yagni-t5", "reason": "lane_cap"},
+            ],
+            plan.skipped,
+        )
+        self.assertFalse(planner)
+
+    def test_unreadable_graph_still_caps(self) -> None:
+        planner = FollowupPlanner(closed_statuses=_CLOSED, cap=1)
+        planner.add(_report("t1"), write_log=False, create_followups=True)
+        planner.add(_report("t2"), write_log=False, create_followups=True)
+        plan = planner.plan(None)
+        self.assertEqual([], plan.logs)
+        self.assertEqual(["drift-yagni-t1"], [t["task_id"] for t in plan.create])
+
+
+if __name__ == "__main__":
+    unittest.main()
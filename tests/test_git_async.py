@@ -0,0 +1,81 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from gitrepo import git, make_repo, write
+from yagnidrift.git_async import GitTelemetry, get_git_root_async, get_working_changes_async, run_git
+from yagnidrift.git_tools import get_git_root, get_working_changes
+
+
+class TestAsyncGit(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        make_repo(
+            self.root,
+            {
+                "src/app.py": "x\n",
+                "src/old.py": "one\ntwo\nthree\nfour\n",
+                "docs/readme.md": "x\n",
+                ".gitignore": "*.log\n",
+            },
+        )
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_matches_sync_collector(self) -> None:
+        write(self.root, "src/app.py", "changed\n")
+        write(self.root, "src/staged_new.py")
+        git(self.root, "add", "src/staged_new.py")
+        git(self.root, "mv", "src/old.py", "src/renamed.py")
+        os.remove(os.path.join(self.root, "docs/readme.md"))
+        write(self.root, "pkg/deep/nested/untracked.py")
+        write(self.root, "odd \"name\"\n.py")
+        write(self.root, "debug.log")
+        write(self.root, "src/intent.py", "intent\n")
+        git(self.root, "add", "-N", "src/intent.py")
+
+        tel = GitTelemetry()
+        changes = asyncio.run(get_working_changes_async(self.root, telemetry=tel))
+        self.assertTrue(tel.ok, tel.to_dict())
+        self.assertEqual(3, tel.calls)
+        self.assertEqual(get_working_changes(self.root), changes)
+        self.assertEqual(get_git_root(Path(self.root)), asyncio.run(get_git_root_async(Path(self.root))))
+
+    def test_failures_are_reported(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            tel = GitTelemetry()
+            changes = asyncio.run(get_working_changes_async(tmp, telemetry=tel))
+        self.assertEqual([], changes.changed_files)
+        self.assertEqual(3, len(tel.errors))
+        self.assertEqual({"exit"}, {e.kind for e in tel.errors})
+        self.assertTrue(all(e.stderr for e in tel.errors))
+
+    def test_timeout_kills_the_call(self) -> None:
+        tel = GitTelemetry()
+        started = time.monotonic()
+        out = asyncio.run(run_git(["-c", "alias.slow=!sleep 5", "slow"], cwd=self.root, timeout=0.2, telemetry=tel))
+        self.assertIsNone(out)
+        self.assertLess(time.monotonic() - started, 4)
+        self.assertEqual("timeout", tel.errors[0].kind)
+
+    def test_cancellation_is_recorded_and_propagates(self) -> None:
+        tel = GitTelemetry()
+
+        async def main() -> None:
+            task = asyncio.ensure_future(run_git(["-c", "alias.slow=!sleep 5", "slow"], cwd=self.root, telemetry=tel))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            await task
+
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(main())
+        self.assertEqual("cancelled", tel.errors[0].kind)
+
+
+if __name__ == "__main__":
+    unittest.main()
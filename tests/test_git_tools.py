@@ -0,0 +1,224 @@
+import os
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+from gitrepo import git, make_repo, write
+from yagnidrift.git_tools import (
+    EXPAND_UNTRACKED,
+    LineCount,
+    StatusEntry,
+    UntrackedDir,
+    WorkingChanges,
+    expand_untracked_dir,
+    get_branch_changes,
+    get_line_counts,
+    get_staged_changes,
+    get_staged_changes_with_counts,
+    get_working_changes,
+    merge_base,
+    parse_name_status,
+    parse_numstat,
+    parse_porcelain_v2,
+)
+
+
+def _five_call_changes(root: str) -> WorkingChanges:
+    # Reference for get_working_changes, built from separate diff / ls-files scans.
+    def names(*args: str) -> set[str]:
+        out = subprocess.check_output(["git", "-C", root, *args, "-z"])
+        return {os.fsdecode(p) for p in out.split(b"\0") if p}
+
+    untracked = names("ls-files", "--others", "--exclude-standard")
+    changed = names("diff", "--name-only") | names("diff", "--name-only", "--cached") | untracked
+    added = names("diff", "--name-only", "--diff-filter=A") | names("diff", "--name-only", "--cached", "--diff-filter=A")
+    return WorkingChanges(changed_files=sorted(changed), new_files=sorted(added | untracked))
+
+
+class TestPorcelainParsing(unittest.TestCase):
+    def test_parses_all_entry_kinds(self) -> None:
+        records = [
+            b"1 .M N... 100644 100644 100644 abc abc src/app.py",
+            b"1 A. N... 000000 100644 100644 000 abc src/new file.py",
+            b"2 R. N... 100644 100644 100644 abc abc R100 src/moved.py",
+            b"src/old.py",
+            b"u UU N... 100644 100644 100644 100644 a b c src/conflict.py",
+            b"? build/out\nput.txt",
+            b"",
+        ]
+        self.assertEqual(
+            [
+                StatusEntry("1", "src/app.py", False),
+                StatusEntry("1", "src/new file.py", True),
+                StatusEntry("2", "src/moved.py", False, "src/old.py"),
+                StatusEntry("u", "src/conflict.py", False),
+                StatusEntry("?", "build/out\nput.txt", True),
+            ],
+            list(parse_porcelain_v2(records)),
+        )
+
+    def test_parses_name_status(self) -> None:
+        records = [b"M", b"src/app.py", b"A", b"src/new.py", b"R087", b"src/old.py", b"src/moved.py"]
+        records += [b"D", b"gone.py", b""]
+        self.assertEqual(
+            [
+                StatusEntry("M", "src/app.py", False),
+                StatusEntry("A", "src/new.py", True),
+                StatusEntry("R", "src/moved.py", False, "src/old.py"),
+                StatusEntry("D", "gone.py", False),
+            ],
+            list(parse_name_status(records)),
+        )
+
+    def test_parses_numstat(self) -> None:
+        records = [b"3\t1\tsrc/app.py", b"-\t-\tlogo.png", b"2\t0\t", b"src/old.py", b"src/moved.py", b""]
+        self.assertEqual(
+            [("src/app.py", LineCount(3, 1)), ("logo.png", LineCount(None, None)), ("src/moved.py", LineCount(2, 0))],
+            list(parse_numstat(records)),
+        )
+
+
+class TestWorkingChanges(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        make_repo(
+            self.root,
+            {
+                "src/app.py": "x\n",
+                "src/old.py": "one\ntwo\nthree\nfour\n",
+                "docs/readme.md": "x\n",
+                ".gitignore": "*.log\n",
+            },
+        )
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_matches_separate_scans(self) -> None:
+        write(self.root, "src/app.py", "changed\n")
+        write(self.root, "src/staged_new.py")
+        git(self.root, "add", "src/staged_new.py")
+        git(self.root, "mv", "src/old.py", "src/renamed.py")
+        os.remove(os.path.join(self.root, "docs/readme.md"))
+        write(self.root, "pkg/deep/nested/untracked.py")
+        write(self.root, "debug.log")
+        write(self.root, "src/naïve name.py")
+        write(self.root, "src/intent.py", "intent\n")
+        git(self.root, "add", "-N", "src/intent.py")
+
+        changes = get_working_changes(self.root)
+        self.assertEqual(_five_call_changes(self.root), changes)
+        self.assertIn("src/renamed.py", changes.changed_files)
+        self.assertNotIn("src/renamed.py", changes.new_files)
+        self.assertIn("src/intent.py", changes.new_files)
+        self.assertNotIn("debug.log", changes.changed_files)
+
+    def test_staged_changes_ignore_the_worktree(self) -> None:
+        write(self.root, "src/app.py", "changed\nmore\n")
+        git(self.root, "add", "src/app.py")
+        write(self.root, "src/app.py", "unstaged\n")
+        write(self.root, "src/staged_new.py", "a\nb\nc\n")
+        git(self.root, "add", "src/staged_new.py")
+        git(self.root, "mv", "src/old.py", "src/renamed.py")
+        write(self.root, "pkg/untracked.py")
+
+        changes = get_staged_changes(self.root)
+        self.assertEqual(["src/app.py", "src/renamed.py", "src/staged_new.py"], changes.changed_files)
+        self.assertEqual(["src/staged_new.py"], changes.new_files)
+
+        with_counts, counts = get_staged_changes_with_counts(self.root)
+        self.assertEqual(changes, with_counts)
+        self.assertEqual(LineCount(3, 0), counts["src/staged_new.py"])
+        self.assertEqual(LineCount(2, 1), counts["src/app.py"])
+        self.assertEqual(LineCount(0, 0), counts["src/renamed.py"])
+
+    def test_handles_quotes_and_newlines_in_paths(self) -> None:
+        write(self.root, 'src/say "hi".py')
+        write(self.root, "src/two\nlines.py")
+        changes = get_working_changes(self.root)
+        self.assertIn('src/say "hi".py', changes.new_files)
+        self.assertIn("src/two\nlines.py", changes.new_files)
+
+    def test_branch_changes_include_committed_work(self) -> None:
+        base = git(self.root, "rev-parse", "HEAD")
+        git(self.root, "checkout", "-q", "-b", "feature")
+        write(self.root, "pkg/committed_factory.py")
+        git(self.root, "mv", "src/old.py", "src/renamed.py")
+        git(self.root, "add", "-A")
+        git(self.root, "commit", "-q", "-m", "work")
+        write(self.root, "pkg/later.py")
+        write(self.root, "src/app.py", "changed\n")
+
+        self.assertNotIn("pkg/committed_factory.py", get_working_changes(self.root).changed_files)
+        mb = merge_base(self.root, "HEAD~1")
+        self.assertEqual(base, mb)
+        changes = get_branch_changes(self.root, base)
+        self.assertEqual(["pkg/committed_factory.py", "pkg/later.py"], changes.new_files)
+        self.assertEqual(["pkg/committed_factory.py", "pkg/later.py", "src/app.py", "src/renamed.py"], changes.changed_files)
+
+    def test_line_counts(self) -> None:
+        write(self.root, "src/app.py", "a\nb\nc")
+        write(self.root, "src/staged.py", "a\nb\n")
+        git(self.root, "add", "src/staged.py")
+        git(self.root, "mv", "src/old.py", "src/renamed.py")
+        write(self.root, "pkg/untracked.py", "1\n2\n3\n4\n5\n")
+        Path(self.root, "pkg/blob.bin").write_bytes(b"\x00\x01\n\n")
+
+        changes = get_working_changes(self.root)
+        counts = get_line_counts(self.root, "HEAD", changes.new_files)
+        self.assertEqual(LineCount(3, 1), counts["src/app.py"])
+        self.assertEqual(LineCount(2, 0), counts["src/staged.py"])
+        self.assertEqual(LineCount(0, 0), counts["src/renamed.py"])
+        self.assertEqual(LineCount(5, 0), counts["pkg/untracked.py"])
+        self.assertEqual(LineCount(None, None), counts["pkg/blob.bin"])
+
+    def test_line_counts_on_unborn_head(self) -> None:
+        with tempfile.TemporaryDirectory() as other:
+            git(other, "init", "-q")
+            write(other, "a.py", "1\n2\n")
+            git(other, "add", "a.py")
+            self.assertEqual({"a.py": LineCount(2, 0)}, get_line_counts(other, "HEAD", ["a.py"]))
+
+    def test_collapse_untracked_directories(self) -> None:
+        for i in range(EXPAND_UNTRACKED + 4):
+            write(self.root, f"vendor/sdk/mod{i:03}.py")
+        write(self.root, "vendor/sdk/trace.log")
+        write(self.root, "pkg/small/a.py")
+        write(self.root, "pkg/small/b.py")
+        write(self.root, "src/loose.py")
+
+        changes = get_working_changes(self.root, collapse_untracked=True)
+        self.assertEqual(["pkg/small/a.py", "pkg/small/b.py", "src/loose.py"], changes.new_files)
+        self.assertEqual(1, len(changes.bulk_dirs))
+        bulk = changes.bulk_dirs[0]
+        self.assertEqual(("vendor", EXPAND_UNTRACKED + 4, False), bulk[:3])
+        self.assertEqual("vendor/sdk/mod000.py", bulk.examples[0])
+        self.assertEqual([], get_working_changes(self.root).bulk_dirs)
+
+        base = git(self.root, "rev-parse", "HEAD")
+        branch = get_branch_changes(self.root, base, collapse_untracked=True)
+        self.assertEqual(changes.new_files, branch.new_files)
+        self.assertEqual(changes.bulk_dirs, branch.bulk_dirs)
+
+    def test_expand_untracked_dir_stops_at_cap(self) -> None:
+        for i in range(30):
+            write(self.root, f"out/f{i:02}.txt")
+        self.assertEqual(
+            UntrackedDir("out", 10, True, ("out/f00.txt", "out/f01.txt")),
+            expand_untracked_dir(self.root, "out/", expand=2, cap=10),
+        )
+        self.assertEqual(30, len(expand_untracked_dir(self.root, "out/", expand=30)))  # type: ignore[arg-type]
+        # `truncated` means more files than the cap, not exactly that many.
+        exact, over = (expand_untracked_dir(self.root, "out/", expand=2, cap=cap) for cap in (30, 29))
+        self.assertEqual((30, False), exact[1:3])  # type: ignore[index]
+        self.assertEqual((29, True), over[1:3])  # type: ignore[index]
+
+    def test_not_a_repo_is_empty(self) -> None:
+        with tempfile.TemporaryDirectory() as other:
+            self.assertEqual([], get_working_changes(other).changed_files)
+
+
+if __name__ == "__main__":
+    unittest.main()
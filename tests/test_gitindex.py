@@ -0,0 +1,216 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from gitrepo import git, make_repo, write
+from yagnidrift import gitindex
+from yagnidrift.git_tools import expand_untracked_dir, get_working_changes
+from yagnidrift.gitignore import compile_ignore, is_ignored
+
+
+class TestNativeWorkingChanges(unittest.TestCase):
+    # Differential: every scenario must give the same WorkingChanges as `git status`.
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        make_repo(
+            self.root,
+            {
+                "src/app.py": "x\n",
+                "src/util.py": "def f():\n    return 1\n",
+                "docs/guide.md": "# guide\n",
+                "run.sh": "#!/bin/sh\n",
+                ".gitignore": "*.log\nbuild/\n!keep.log\n",
+            },
+        )
+        # Let the index timestamp move past the files', so entries are not racily clean by default.
+        time.sleep(0.01)
+        git(self.root, "update-index", "--refresh")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def assertSameAsGit(self, **kwargs) -> None:
+        expected = get_working_changes(self.root, **kwargs)
+        actual = gitindex.native_working_changes(self.root, **kwargs)
+        self.assertEqual(expected, actual)
+
+    def test_clean_tree(self) -> None:
+        self.assertSameAsGit()
+        self.assertEqual([], gitindex.native_working_changes(self.root).changed_files)
+
+    def test_worktree_edits_and_deletes(self) -> None:
+        write(self.root, "src/app.py", "y\n")  # same size, different content
+        write(self.root, "src/util.py", "longer content\n")
+        os.unlink(Path(self.root) / "docs" / "guide.md")
+        os.chmod(Path(self.root) / "run.sh", 0o755)
+        self.assertSameAsGit()
+
+    def test_touched_but_unchanged_is_clean(self) -> None:
+        os.utime(Path(self.root) / "src" / "app.py", ns=(1, 1))
+        self.assertSameAsGit()
+        self.assertEqual([], gitindex.native_working_changes(self.root).changed_files)
+
+    def test_racily_clean_entries_are_hashed(self) -> None:
+        write(self.root, "src/app.py", "a\n")
+        git(self.root, "add", "src/app.py")
+        write(self.root, "src/app.py", "b\n")  # same size and, likely, the same mtime second as the index
+        self.assertSameAsGit()
+
+    def test_staged_changes(self) -> None:
+        write(self.root, "src/new.py")
+        write(self.root, "src/app.py", "staged\n")
+        git(self.root, "add", "src/new.py", "src/app.py")
+        self.assertSameAsGit()
+        git(self.root, "reset", "-q", "src/new.py")
+        git(self.root, "rm", "-q", "--cached", "docs/guide.md")
+        self.assertSameAsGit()
+
+    def test_exact_rename_is_not_new(self) -> None:
+        git(self.root, "mv", "src/util.py", "src/helpers.py")
+        self.assertSameAsGit()
+        self.assertEqual([], gitindex.native_working_changes(self.root).new_files)
+
+    def test_possible_inexact_rename_is_unsupported(self) -> None:
+        git(self.root, "mv", "src/util.py", "src/helpers.py")
+        write(self.root, "src/helpers.py", "def f():\n    return 2\n")
+        git(self.root, "add", "src/helpers.py")
+        with self.assertRaises(gitindex.UnsupportedIndex):
+            gitindex.native_working_changes(self.root)
+        self.assertEqual(get_working_changes(self.root), get_working_changes(self.root, native=True))
+
+    def test_intent_to_add(self) -> None:
+        write(self.root, "src/later.py")
+        git(self.root, "add", "-N", "src/later.py")
+        self.assertSameAsGit()
+
+    def test_untracked_and_ignored(self) -> None:
+        write(self.root, "notes.txt")
+        write(self.root, "debug.log")
+        write(self.root, "keep.log")
+        write(self.root, "build/out.bin")
+        write(self.root, "pkg/mod/a.py")
+        write(self.root, "pkg/mod/.gitignore", "/gen\n*.tmp\n!x.tmp\n")
+        write(self.root, "pkg/mod/gen/skip.py")
+        write(self.root, "pkg/mod/y.tmp")
+        write(self.root, "pkg/mod/x.tmp")
+        write(self.root, "src/deep/er/file.py")
+        (Path(self.root) / "empty" / "dir").mkdir(parents=True)
+        Path(self.root, ".git", "info").mkdir(exist_ok=True)
+        Path(self.root, ".git", "info", "exclude").write_text("notes.txt\n", encoding="utf-8")
+        self.assertSameAsGit()
+        self.assertSameAsGit(collapse_untracked=True)
+
+    def test_tracked_file_in_ignored_directory(self) -> None:
+        write(self.root, "build/tracked.txt")
+        git(self.root, "add", "-f", "build/tracked.txt")
+        git(self.root, "commit", "-q", "-m", "forced")
+        write(self.root, "build/tracked.txt", "edited\n")
+        write(self.root, "build/untracked.txt")
+        self.assertSameAsGit()
+
+    def test_symlinks(self) -> None:
+        os.symlink("app.py", Path(self.root) / "src" / "link.py")
+        git(self.root, "add", "src/link.py")
+        git(self.root, "commit", "-q", "-m", "link")
+        os.unlink(Path(self.root) / "src" / "link.py")
+        os.symlink("util.py", Path(self.root) / "src" / "link.py")
+        os.symlink("missing", Path(self.root) / "dangling")
+        self.assertSameAsGit()
+
+    def test_collapsed_untracked_directory(self) -> None:
+        for i in range(300):
+            write(self.root, f"node_modules/p{i % 7}/f{i}.js")
+        write(self.root, "vendor/small.js")
+        self.assertSameAsGit(collapse_untracked=True)
+        self.assertSameAsGit()
+
+    def test_untracked_count_cap_matches_git(self) -> None:
+        for i in range(10):
+            write(self.root, f"out/f{i}.txt")
+        for cap in (10, 9):
+            with self.subTest(cap=cap), mock.patch.multiple(gitindex, EXPAND_UNTRACKED=2, UNTRACKED_COUNT_CAP=cap):
+                expected = expand_untracked_dir(self.root, "out/", expand=2, cap=cap)
+                bulk = gitindex.native_working_changes(self.root, collapse_untracked=True).bulk_dirs
+                self.assertEqual([expected[:3]], [b[:3] for b in bulk])  # type: ignore[index]
+                self.assertEqual(("out", cap, cap < 10), bulk[0][:3])
+
+    def test_pathspecs(self) -> None:
+        write(self.root, "src/app.py", "changed\n")
+        write(self.root, "docs/new.md")
+        write(self.root, "other/a/b/c.py")
+        for spec in (["src"], ["docs", "other/a"], ["other/a/b"]):
+            with self.subTest(spec=spec):
+                self.assertSameAsGit(pathspecs=[f":(literal){p}" for p in spec])
+
+    def test_unborn_branch(self) -> None:
+        root = os.path.join(self.root, "fresh")
+        os.mkdir(root)
+        git(root, "init", "-q")
+        write(root, "a.py")
+        write(root, "b/c.py")
+        git(root, "add", "a.py")
+        self.assertEqual(get_working_changes(root), gitindex.native_working_changes(root))
+
+    def test_index_version_4(self) -> None:
+        git(self.root, "update-index", "--index-version", "4")
+        write(self.root, "src/app.py", "v4\n")
+        write(self.root, "src/fresh.py")
+        git(self.root, "add", "src/fresh.py")
+        self.assertSameAsGit()
+
+    def test_split_index_falls_back_to_git(self) -> None:
+        git(self.root, "update-index", "--split-index")
+        write(self.root, "src/app.py", "split\n")
+        with self.assertRaisesRegex(gitindex.UnsupportedIndex, "split index"):
+            gitindex.native_working_changes(self.root)
+        self.assertEqual(get_working_changes(self.root), get_working_changes(self.root, native=True))
+
+    def test_caches_config_and_head_listing(self) -> None:
+        cache_dir = Path(self.root) / ".git" / "yd-cache"
+        write(self.root, "src/staged.py")
+        git(self.root, "add", "src/staged.py")
+        first = gitindex.native_working_changes(self.root, cache_dir=cache_dir)
+        self.assertTrue((cache_dir / "config.json").exists())
+        self.assertTrue(list(cache_dir.glob("*.tree")))
+        gitindex._config_memo.clear()
+        gitindex._head_memo.clear()
+        self.assertEqual(first, gitindex.native_working_changes(self.root, cache_dir=cache_dir))
+
+
+class TestGitignore(unittest.TestCase):
+    def _ignored(self, text: str, path: str, is_dir: bool = False, base: str = "") -> bool:
+        rules = compile_ignore(text)
+        assert rules is not None
+        return is_ignored(((base, rules),), path, is_dir)
+
+    def test_patterns(self) -> None:
+        self.assertTrue(self._ignored("*.log\n", "a/b/x.log"))
+        self.assertFalse(self._ignored("/x.log\n", "a/x.log"))
+        self.assertTrue(self._ignored("a/*.py\n", "a/m.py"))
+        self.assertFalse(self._ignored("a/*.py\n", "b/a/m.py"))
+        self.assertTrue(self._ignored("**/gen/**\n", "x/gen/y/z"))
+        self.assertFalse(self._ignored("gen/**\n", "gen", is_dir=True))
+        self.assertTrue(self._ignored("build/\n", "a/build", is_dir=True))
+        self.assertFalse(self._ignored("build/\n", "a/build"))
+        self.assertTrue(self._ignored("# c\n\\#hash\n", "#hash"))
+
+    def test_last_match_wins(self) -> None:
+        self.assertFalse(self._ignored("*.log\n!keep.log\n", "keep.log"))
+        self.assertTrue(self._ignored("!keep.log\n*.log\n", "keep.log"))
+
+    def test_relative_to_base(self) -> None:
+        self.assertTrue(self._ignored("/gen\n", "pkg/gen", is_dir=True, base="pkg"))
+        self.assertFalse(self._ignored("/gen\n", "other/gen", is_dir=True, base="pkg"))
+
+    def test_unsupported_syntax(self) -> None:
+        with self.assertRaises(ValueError):
+            compile_ignore("[^a].txt\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
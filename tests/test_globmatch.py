@@ -0,0 +1,115 @@
+import fnmatch
+import random
+import time
+import unittest
+
+from yagnidrift.globmatch import compile_patterns, match_any, match_path
+
+
+def reference_match_path(path: str, pattern: str) -> bool:
+    # The original recursive matcher; the compiled engine must agree with it exactly.
+    path_parts = [p for p in path.strip("/").split("/") if p]
+    pat_parts = [p for p in pattern.strip("/").split("/") if p]
+
+    def rec(i: int, j: int) -> bool:
+        if j >= len(pat_parts):
+            return i >= len(path_parts)
+        pat = pat_parts[j]
+        if pat == "**":
+            if rec(i, j + 1):
+                return True
+            return i < len(path_parts) and rec(i + 1, j)
+        if i >= len(path_parts):
+            return False
+        if not fnmatch.fnmatchcase(path_parts[i], pat):
+            return False
+        return rec(i + 1, j + 1)
+
+    return rec(0, 0)
+
+
+_SEGMENT_ATOMS = ["a", "b", "ab", ".", "-", "_", "*", "**", "?", "[ab]", "[!a]", "[a-c]", "[+-0]", "[!]", "[]]", "[", "\\", "&", "x.py"]
+_PATH_ATOMS = ["a", "b", "ab", "abc", "ba", ".a", "x.py", "a-b", "a_b", "[", "]", "&", "\\", "+", "0", "!", "\n"]
+
+
+def _random_pattern(rng: random.Random) -> str:
+    segs = []
+    for _ in range(rng.randint(0, 5)):
+        seg = "".join(rng.choice(_SEGMENT_ATOMS) for _ in range(rng.randint(1, 3)))
+        segs.append("**" if rng.random() < 0.25 else seg)
+    pat = "/".join(segs)
+    if rng.random() < 0.1:
+        pat = "/" + pat
+    if rng.random() < 0.1:
+        pat = pat + "/"
+    return pat
+
+
+def _random_path(rng: random.Random) -> str:
+    segs = ["".join(rng.choice(_PATH_ATOMS) for _ in range(rng.randint(1, 3))) for _ in range(rng.randint(0, 6))]
+    path = "/".join(segs)
+    if rng.random() < 0.1:
+        path = path.replace("/", "//", 1)
+    if rng.random() < 0.1:
+        path = "/" + path + "/"
+    return path
+
+
+class TestGlobMatchParity(unittest.TestCase):
+    def test_known_cases(self) -> None:
+        cases = [
+            ("src/app.py", "src/**", True),
+            ("src", "src/**", True),
+            ("src/a/b/c.py", "src/**/*.py", True),
+            ("src/c.py", "src/**/*.py", True),
+            ("lib/c.py", "src/**/*.py", False),
+            (".workgraph/graph.jsonl", ".workgraph/**", True),
+            ("a/b", "a/*/b", False),
+            ("a/x/b", "a/?/b", True),
+            ("a/+/b", "a/[+-0]/b", True),
+            ("", "**", True),
+            ("", "", True),
+            ("x", "", False),
+        ]
+        for path, pattern, expected in cases:
+            with self.subTest(path=path, pattern=pattern):
+                self.assertEqual(expected, reference_match_path(path, pattern))
+                self.assertEqual(expected, match_path(path, pattern))
+
+    def test_randomized_differential(self) -> None:
+        rng = random.Random(20261018)
+        for _ in range(400):
+            patterns = [_random_pattern(rng) for _ in range(rng.randint(1, 4))]
+            for _ in range(25):
+                path = _random_path(rng)
+                expected = any(reference_match_path(path, p) for p in patterns)
+                with self.subTest(path=path, patterns=patterns):
+                    self.assertEqual(expected, match_any(path, patterns))
+                    for p in patterns:
+                        self.assertEqual(reference_match_path(path, p), match_path(path, p))
+
+    def test_empty_patterns_never_match(self) -> None:
+        self.assertFalse(match_any("src/app.py", []))
+
+    def test_compiled_set_is_cached(self) -> None:
+        self.assertIs(compile_patterns(("src/**", "tests/**")), compile_patterns(("src/**", "tests/**")))
+
+    def test_subtrees_covered_whole(self) -> None:
+        g = compile_patterns(("vendor/**", "/build/out/**", "**/node_modules/**", "src/*/gen/**", "**/*.log"))
+        self.assertEqual(frozenset({"vendor", "build/out"}), g.subtree_dirs)
+        self.assertEqual(frozenset({"node_modules"}), g.subtree_names)
+        self.assertTrue(g.covers("web/node_modules", "node_modules"))
+        self.assertFalse(g.covers("src/a/gen", "gen"))
+        for d in ("vendor", "build/out", "web/node_modules"):
+            self.assertTrue(g.match(f"{d}/deep/er/file.txt"))
+
+    def test_repeated_double_star_is_fast(self) -> None:
+        path = "/".join(["d"] * 40) + "/file.txt"
+        t0 = time.perf_counter()
+        self.assertFalse(match_path(path, "**/**/**/**/**/**/**/**/nomatch"))
+        self.assertTrue(match_path(path, "**/**/d/**/**/*.txt"))
+        self.assertLess(time.perf_counter() - t0, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
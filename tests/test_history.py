@@ -0,0 +1,67 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from yagnidrift.history import HistoryStore, history_row
+
+_DAY = 86400.0
+
+
+def _report(task_id: str, score: str, kinds: list[str], keywords: dict[str, int] | None = None) -> dict:
+    telemetry = {"files_changed": 4, "new_files": 3, "new_dirs": 1}
+    if keywords:
+        telemetry["keyword_hits"] = keywords
+    return {
+        "task_id": task_id,
+        "score": score,
+        "spec": {"schema": 1},
+        "telemetry": telemetry,
+        "findings": [{"kind": k, "severity": "warn", "summary": k} for k in kinds],
+    }
+
+
+class TestHistoryStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = HistoryStore(Path(self._tmp.name) / "history.sqlite3")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_empty_store_answers_queries(self) -> None:
+        self.assertEqual([], self.store.trend("t1"))
+        self.assertEqual([], self.store.worst_offenders(since=0))
+        self.assertFalse(self.store.path.exists())
+
+    def test_skips_tasks_without_a_block(self) -> None:
+        report = {"task_id": "t1", "score": "green", "spec": None, "telemetry": {}, "findings": []}
+        self.assertIsNone(history_row(report))
+
+    def test_trend_and_window_queries(self) -> None:
+        now = 100 * _DAY
+        rows = [
+            history_row(_report("t1", "yellow", ["too_many_new_files"], {"factory": 2}), ts=now - 40 * _DAY),
+            history_row(_report("t1", "yellow", ["speculative_abstraction"], {"factory": 1, "base": 1}), ts=now - 2 * _DAY),
+            history_row(_report("t1", "green", []), ts=now - 1 * _DAY),
+            history_row(_report("t2", "yellow", ["speculative_abstraction"], {"adapter": 5}), ts=now - 1 * _DAY),
+            history_row(_report("t2", "yellow", ["too_many_new_dirs"]), ts=now),
+        ]
+        self.assertEqual(3, self.store.append(rows[:3]))
+        self.assertEqual(2, self.store.append(rows[3:]))
+
+        trend = self.store.trend("t1")
+        self.assertEqual(["yellow", "yellow", "green"], [r["score"] for r in trend])
+        self.assertEqual(["too_many_new_files"], trend[0]["kinds"])
+        self.assertEqual(["green"], [r["score"] for r in self.store.trend("t1", limit=1)])
+
+        since = now - 30 * _DAY
+        worst = self.store.worst_offenders(since=since)
+        self.assertEqual([("t2", 2, 2), ("t1", 1, 2)], [(r["task_id"], r["drifting"], r["runs"]) for r in worst])
+        kinds = self.store.finding_kinds(since=since)
+        self.assertEqual({"speculative_abstraction": 2, "too_many_new_dirs": 1}, {r["kind"]: r["runs"] for r in kinds})
+        keywords = self.store.keyword_frequencies(since=since)
+        self.assertEqual([("adapter", 5), ("base", 1), ("factory", 1)], [(r["keyword"], r["hits"]) for r in keywords])
+
+
+if __name__ == "__main__":
+    unittest.main()
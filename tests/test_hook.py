@@ -0,0 +1,194 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from gitrepo import git, make_repo, write
+from yagnidrift import hook
+
+_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _task(task_id: str, spec: str, status: str = "in-progress") -> dict:
+    return {
+        "kind": "task",
+        "id": task_id,
+        "title": f"Task {task_id}",
+        "status": status,
+        "description": f"Work.\n```yagnidrift\n{spec}\n```\n",
+    }
+
+
+class TestHook(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        make_repo(self.root, {"src/app.py": "x\n"})
+        env = mock.patch.dict(os.environ)
+        env.start()
+        os.environ.pop(hook.TASK_ENV, None)
+        self.addCleanup(env.stop)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _graph(self, *tasks: dict) -> Path:
+        wg_dir = Path(self.root) / ".workgraph"
+        wg_dir.mkdir(exist_ok=True)
+        (wg_dir / "graph.jsonl").write_text("".join(json.dumps(t) + "\n" for t in tasks), encoding="utf-8")
+        return wg_dir
+
+    def test_no_spec_means_no_report(self) -> None:
+        write(self.root, "src/new.py")
+        git(self.root, "add", "-A")
+        self.assertIsNone(hook.run_hook(Path(self.root)))
+
+    def test_scores_only_staged_changes(self) -> None:
+        write(self.root, hook.REPO_CONFIG, "schema = 1\nmax_new_files = 1\nmax_new_dirs = 5\n")
+        write(self.root, "src/staged_manager.py")
+        git(self.root, "add", "src/staged_manager.py")
+        for i in range(3):
+            write(self.root, f"src/untracked{i}.py")
+        write(self.root, "src/app.py", "unstaged edit\n")
+
+        report = hook.run_hook(Path(self.root))
+        assert report is not None
+        self.assertEqual({"spec": hook.REPO_CONFIG, "staged_files": 1}, report["telemetry"]["hook"])
+        kinds = [f["kind"] for f in report["findings"]]
+        self.assertNotIn("too_many_new_files", kinds)
+        self.assertIn("speculative_abstraction", kinds)
+
+    def test_line_budget_counts_staged_lines(self) -> None:
+        write(self.root, hook.REPO_CONFIG, "schema = 1\nmax_added_loc = 2\n")
+        write(self.root, "src/app.py", "x\none\ntwo\nthree\n")
+        git(self.root, "add", "src/app.py")
+        write(self.root, "src/app.py", "x\n")  # the worktree no longer has the additions
+
+        report = hook.run_hook(Path(self.root))
+        assert report is not None
+        self.assertIn("too_many_added_loc", [f["kind"] for f in report["findings"]])
+
+    def test_task_spec_wins_over_repo_config(self) -> None:
+        write(self.root, hook.REPO_CONFIG, "schema = 1\n")
+        self._graph(_task("t1", "schema = 1\nmax_new_files = 0"), _task("t2", "schema = 1", status="open"))
+        write(self.root, "src/a.py")
+        git(self.root, "add", "src/a.py")
+
+        self.assertEqual(hook.REPO_CONFIG, hook.run_hook(Path(self.root))["telemetry"]["hook"]["spec"])  # type: ignore[index]
+        report = hook.run_hook(Path(self.root), task_id="t1")
+        assert report is not None
+        self.assertEqual("task:t1", report["telemetry"]["hook"]["spec"])
+        self.assertEqual("t1", report["task_id"])
+        os.environ[hook.TASK_ENV] = "t1"
+        self.assertEqual("task:t1", hook.run_hook(Path(self.root))["telemetry"]["hook"]["spec"])  # type: ignore[index]
+
+    def test_active_task_without_repo_config(self) -> None:
+        self._graph(_task("t1", "schema = 1"), _task("t2", "schema = 1", status="done"))
+        report = hook.run_hook(Path(self.root))
+        assert report is not None
+        self.assertEqual("task:t1", report["telemetry"]["hook"]["spec"])
+
+        # Two in-progress tasks with blocks: no way to tell which one is being committed.
+        self._graph(_task("t1", "schema = 1"), _task("t2", "schema = 1"))
+        os.utime(Path(self.root) / ".workgraph" / "graph.jsonl", ns=(1, 1))
+        self.assertIsNone(hook.run_hook(Path(self.root)))
+
+    def test_task_spec_cached_until_graph_changes(self) -> None:
+        wg_dir = self._graph(_task("t1", "schema = 1"))
+        hook.resolve_hook_spec(Path(self.root), wg_dir, "t1")
+        with mock.patch.object(hook, "find_graph_task") as find:
+            spec = hook.resolve_hook_spec(Path(self.root), wg_dir, "t1")
+        find.assert_not_called()
+        self.assertEqual(("schema = 1",), spec.blocks)  # type: ignore[union-attr]
+
+        self._graph(_task("t1", "schema = 1\nmax_new_files = 2"))
+        os.utime(wg_dir / "graph.jsonl", ns=(1, 1))
+        spec = hook.resolve_hook_spec(Path(self.root), wg_dir, "t1")
+        self.assertEqual(("schema = 1\nmax_new_files = 2",), spec.blocks)  # type: ignore[union-attr]
+
+    def test_repo_config_tables_cached_until_text_changes(self) -> None:
+        write(self.root, hook.REPO_CONFIG, "schema = 1\nmax_new_files = 0\n")
+        write(self.root, "src/new.py")
+        git(self.root, "add", "src/new.py")
+        hook.run_hook(Path(self.root))
+        with mock.patch("yagnidrift.specs.parse_yagnidrift_spec") as parse:
+            report = hook.run_hook(Path(self.root))
+        parse.assert_not_called()
+        self.assertIn("too_many_new_files", [f["kind"] for f in report["findings"]])  # type: ignore[index]
+
+        write(self.root, hook.REPO_CONFIG, "schema = 1\nmax_new_files = 5\n")
+        report = hook.run_hook(Path(self.root))
+        self.assertNotIn("too_many_new_files", [f["kind"] for f in report["findings"]])  # type: ignore[index]
+
+    def test_invalid_spec_raises(self) -> None:
+        write(self.root, hook.REPO_CONFIG, "schema = [\n")
+        with self.assertRaisesRegex(ValueError, "invalid yagnidrift spec"):
+            hook.run_hook(Path(self.root))
+
+    def test_install_and_uninstall(self) -> None:
+        path = hook.install_hook(self.root, strict=True)
+        self.assertEqual(Path(self.root) / ".git" / "hooks" / "pre-commit", path)
+        self.assertIn("hook --strict", path.read_text(encoding="utf-8"))
+        self.assertTrue(os.access(path, os.X_OK))
+        hook.install_hook(self.root)  # reinstalling over our own hook is fine
+        self.assertEqual(path, hook.uninstall_hook(self.root))
+        self.assertFalse(path.exists())
+        self.assertIsNone(hook.uninstall_hook(self.root))
+
+    def test_install_keeps_foreign_hook(self) -> None:
+        path = Path(self.root) / ".git" / "hooks" / "pre-commit"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("#!/bin/sh\nexit 0\n", encoding="utf-8")
+        with self.assertRaisesRegex(ValueError, "--force"):
+            hook.install_hook(self.root)
+        self.assertIsNone(hook.uninstall_hook(self.root))
+        self.assertTrue(path.exists())
+        hook.install_hook(self.root, force=True)
+        self.assertIn(hook.HOOK_MARKER, path.read_text(encoding="utf-8"))
+
+    def test_installed_hook_blocks_commit_when_strict(self) -> None:
+        write(self.root, hook.REPO_CONFIG, "schema = 1\nmax_new_files = 0\n")
+        hook.install_hook(self.root, strict=True)
+        write(self.root, "src/new.py")
+        git(self.root, "add", "src/new.py")
+        proc = subprocess.run(
+            ["git", "-C", self.root, "-c", "user.email=t@example.com", "-c", "user.name=t", "commit", "-q", "-m", "x"],
+            capture_output=True,
+            text=True,
+        )
+        self.assertNotEqual(0, proc.returncode)
+        self.assertIn("too_many_new_files", proc.stderr)
+
+    def test_installed_command_skips_argparse_and_toml(self) -> None:
+        write(self.root, hook.REPO_CONFIG, "schema = 1\nmax_new_files = 0\n")
+        write(self.root, "src/new.py")
+        git(self.root, "add", "src/new.py")
+        hook.run_hook(Path(self.root))  # fills the spec cache, as the first commit does
+        code = (
+            "import sys\n"
+            "from yagnidrift.cli import main\n"
+            "code = main(['hook', '--strict'])\n"
+            "print(code, sorted(m for m in ('argparse', 'tomllib') if m in sys.modules))\n"
+        )
+        env = {**os.environ, "PYTHONPATH": str(_ROOT)}
+        proc = subprocess.run([sys.executable, "-c", code], cwd=self.root, env=env, capture_output=True, text=True)
+        self.assertEqual("3 []", proc.stdout.strip(), proc.stderr)
+        self.assertIn("too_many_new_files", proc.stderr)
+
+    def test_cli_is_quiet_when_clean(self) -> None:
+        write(self.root, hook.REPO_CONFIG, "schema = 1\n")
+        proc = subprocess.run(
+            [sys.executable, str(_ROOT / "bin" / "yagnidrift"), "--dir", self.root, "hook", "--strict"],
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(0, proc.returncode, proc.stderr)
+        self.assertEqual("", proc.stdout + proc.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
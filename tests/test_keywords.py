@@ -0,0 +1,53 @@
+import random
+import unittest
+from pathlib import PurePosixPath
+
+from yagnidrift.drift import _is_speculative
+from yagnidrift.keywords import KeywordHit, compile_keywords
+
+
+def reference_is_speculative(path: str, keywords: list[str]) -> bool:
+    low = path.lower()
+    stem = PurePosixPath(low).stem
+    parts = [p for p in low.replace("-", "_").split("/") if p]
+    for kw in keywords:
+        token = str(kw).strip().lower()
+        if not token:
+            continue
+        if token in stem:
+            return True
+        if any(token in part for part in parts):
+            return True
+    return False
+
+
+class TestKeywordScanner(unittest.TestCase):
+    def test_reports_keyword_and_location(self) -> None:
+        scanner = compile_keywords(("factory", "adapter", "base"))
+        self.assertEqual(
+            KeywordHit(keyword="adapter", segment="adapters", offset=0),
+            scanner.find("src/Adapters/http.py"),
+        )
+        self.assertEqual(
+            KeywordHit(keyword="factory", segment="payment_factory.py", offset=8),
+            scanner.find("src/payment-factory.py"),
+        )
+        self.assertIsNone(scanner.find("src/app.py"))
+
+    def test_hyphenated_keyword_matches_stem_only(self) -> None:
+        scanner = compile_keywords(("plug-in",))
+        self.assertEqual("plug-in", scanner.find("src/my-plug-in.py").keyword)
+        self.assertIsNone(scanner.find("plug-in/app.py"))
+
+    def test_randomized_parity_with_loop(self) -> None:
+        rng = random.Random(4)
+        alphabet = ["a", "b", "-", "_", ".", "/", "ab", "ba", "B"]
+        for _ in range(3000):
+            keywords = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 3))) for _ in range(rng.randint(1, 4))]
+            path = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 10)))
+            with self.subTest(path=path, keywords=keywords):
+                self.assertEqual(reference_is_speculative(path, keywords), _is_speculative(path, keywords))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import random
+import unittest
+
+from yagnidrift.globmatch import compile_patterns
+from yagnidrift.pathtrie import CHANGED, NEW, PathTrie, hotspots
+
+
+class TestPathTrie(unittest.TestCase):
+    def setUp(self) -> None:
+        self.new = ["a-b/x.py", "src/m/3.py", "src/n/1.py", "src/n/2.py", "vendor/p/q.py"]
+        self.changed = sorted(self.new + ["README.md", "src/app.py"])
+        self.trie = PathTrie.from_changes(self.changed, self.new)
+
+    def test_membership_and_counts(self) -> None:
+        self.assertEqual(7, len(self.trie))
+        self.assertIn("src/n/1.py", self.trie)
+        self.assertNotIn("src/n", self.trie)  # a directory, not a changed path
+        self.assertNotIn("src/n/9.py", self.trie)
+        self.assertEqual(3, self.trie.new_files_under("src"))
+        self.assertEqual(5, self.trie.new_files_under(""))
+
+    def test_walks_in_sorted_order(self) -> None:
+        self.assertEqual(self.changed, list(self.trie.paths(CHANGED)))
+        self.assertEqual(self.new, list(self.trie.paths(NEW)))
+
+    def test_ignore_prunes_subtrees_and_filters_files(self) -> None:
+        ignore = compile_patterns(("vendor/**", "**/3.py"))
+        self.assertEqual(["a-b/x.py", "src/n/1.py", "src/n/2.py"], list(self.trie.paths(NEW, ignore=ignore)))
+        self.assertEqual(["README.md"], list(self.trie.paths(CHANGED, skip_top=frozenset({"src", "a-b", "vendor"}))))
+
+    def test_rollup_and_hotspots(self) -> None:
+        rollup = self.trie.new_file_rollup(ignore=compile_patterns(("vendor/**",)))
+        self.assertEqual({"a-b": 1, "src": 3, "src/m": 1, "src/n": 2}, rollup)
+        self.assertEqual(
+            [{"dir": "src", "new_files": 3}, {"dir": "src/n", "new_files": 2}], hotspots(rollup, limit=2)
+        )
+        # A chain with one child holding everything reports only its deepest link.
+        deep = PathTrie.from_changes([], ["a/b/c/1.py", "a/b/c/2.py"]).new_file_rollup()
+        self.assertEqual([{"dir": "a/b/c", "new_files": 2}], hotspots(deep))
+
+    def test_matches_list_filtering(self) -> None:
+        rng = random.Random(7)
+        names = ["src", "lib", "vendor", "node_modules", "x", "a-b", "a"]
+        paths = sorted({"/".join(rng.choice(names) for _ in range(rng.randint(1, 5))) + ".py" for _ in range(500)})
+        new = paths[::3]
+        ignore = compile_patterns(("vendor/**", "**/node_modules/**", "a/*.py"))
+        trie = PathTrie.from_changes(paths, new)
+        self.assertEqual([p for p in paths if not ignore.match(p)], list(trie.paths(CHANGED, ignore=ignore)))
+        self.assertEqual([p for p in new if not ignore.match(p)], list(trie.paths(NEW, ignore=ignore)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from yagnidrift import scan
+
+
+def _fast_worker(project_dir: str, options: object, conn) -> None:
+    os.setpgrp()
+    conn.send({"status": "ok", "report": {"summary": {"tasks_checked": 2, "tasks_with_findings": 1}}})
+    conn.close()
+
+
+def _hung_worker(project_dir: str, options: object, conn) -> None:
+    os.setpgrp()
+    if project_dir.endswith("slow"):
+        time.sleep(60)
+    _fast_worker(project_dir, options, conn)
+
+
+def _crashing_worker(project_dir: str, options: object, conn) -> None:
+    os._exit(7)
+
+
+class TestScan(unittest.TestCase):
+    def test_expand_dirs_dedupes_and_skips_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            for name in ("a", "b"):
+                (root / name).mkdir()
+            (root / "notes.txt").write_text("x", encoding="utf-8")
+            dirs = scan.expand_dirs([str(root / "a")], [str(root / "*")])
+            self.assertEqual([str(root / "a"), str(root / "b")], dirs)
+
+    def test_timeout_does_not_stall_other_repos(self) -> None:
+        with mock.patch.object(scan, "_scan_worker", _hung_worker):
+            started = time.monotonic()
+            results = list(scan.scan_repos(["r1", "slow", "r2", "r3"], jobs=2, timeout=1.0, options=None))  # type: ignore[arg-type]
+        self.assertLess(time.monotonic() - started, 10)
+        by_dir = {r["dir"]: r["status"] for r in results}
+        self.assertEqual({"r1": "ok", "slow": "timeout", "r2": "ok", "r3": "ok"}, by_dir)
+        summary = scan.summarize_scan(results, elapsed_s=1.0)
+        self.assertEqual((4, 3, 0, 1, 6, 3), tuple(summary[k] for k in ("repos", "ok", "error", "timeout", "tasks_checked", "tasks_with_findings")))
+
+    def test_crashed_worker_is_an_error(self) -> None:
+        with mock.patch.object(scan, "_scan_worker", _crashing_worker):
+            results = list(scan.scan_repos(["r1"], jobs=1, timeout=None, options=None))  # type: ignore[arg-type]
+        self.assertEqual("error", results[0]["status"])
+        self.assertIn("7", results[0]["error"])
+
+    def test_unknown_repo_reports_error(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = list(scan.scan_repos([tmp], jobs=1, timeout=30, options=None))  # type: ignore[arg-type]
+        self.assertEqual("error", results[0]["status"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import tempfile
+import unittest
+
+from gitrepo import git, write
+from yagnidrift.contracts import extract_contract_touch, format_default_contract_block
+from yagnidrift.git_tools import WorkingChanges, get_working_changes
+from yagnidrift.scope import (
+    MAX_SHARDS,
+    literal_prefix,
+    plan_shards,
+    scope_changes,
+    scope_prefixes,
+    task_scope,
+    to_pathspecs,
+)
+
+
+class TestScope(unittest.TestCase):
+    def test_scope_sources(self) -> None:
+        contract = format_default_contract_block(mode="core", objective="x", touch=["svc/a", "lib/**/*.py"])
+        self.assertEqual(("svc/a", "lib/**/*.py"), extract_contract_touch(contract))
+        spec = "```yagnidrift\nschema = 1\n```"
+        self.assertEqual(("svc/a", "lib/**/*.py"), task_scope(f"{contract}\n{spec}"))
+        scoped = "```yagnidrift\nscope = [\"docs\"]\n```"
+        self.assertEqual(("docs",), task_scope(f"{contract}\n{scoped}"))
+        self.assertEqual((), task_scope(contract))  # no yagnidrift block: not checked at all
+
+    def test_prefixes(self) -> None:
+        self.assertEqual("src/api", literal_prefix("src/api/**/*.py"))
+        self.assertEqual("", literal_prefix("**/*.py"))
+        self.assertEqual(("src", "tests"), scope_prefixes(("src/api/**", "src", "tests/unit_*.py")))
+        self.assertIsNone(scope_prefixes(("src", "*.md")))
+        self.assertIsNone(scope_prefixes(()))
+
+    def test_scope_changes(self) -> None:
+        changes = WorkingChanges(
+            changed_files=["svc/a/x.py", "svc/ab.py", "svc/b/y.py", "lib/deep/z.py"],
+            new_files=["svc/a/x.py", "lib/deep/z.py"],
+        )
+        scoped = scope_changes(changes, ("svc/a", "lib/**/*.py"))
+        self.assertEqual(["svc/a/x.py", "lib/deep/z.py"], scoped.changed_files)
+        self.assertEqual(["svc/a/x.py", "lib/deep/z.py"], scoped.new_files)
+
+    def test_plan_shards(self) -> None:
+        self.assertIsNone(plan_shards([("svc/a",), None]))
+        self.assertIsNone(plan_shards([scope_prefixes(()), scope_prefixes(())]))
+        shards = plan_shards([("svc/a",), ("lib",), ("svc/a/new",), ("docs", "svc/b"), ("svc/b/x",)])
+        self.assertEqual(
+            [([0, 2], ("svc/a",)), ([1], ("lib",)), ([3, 4], ("docs", "svc/b"))],
+            shards,
+        )
+        many = plan_shards([(f"pkg{i}",) for i in range(MAX_SHARDS * 2)])
+        assert many is not None
+        self.assertEqual(MAX_SHARDS, len(many))
+        self.assertEqual(list(range(MAX_SHARDS * 2)), sorted(i for tasks, _ in many for i in tasks))
+
+    def test_pathspecs_limit_git(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            git(root, "init", "-q")
+            for rel in ["svc/a/x.py", "svc/ab/y.py", "lib/z.py", "weird[1]/w.py"]:
+                write(root, rel)
+            changes = get_working_changes(root, pathspecs=to_pathspecs(("svc/a", "weird[1]")))
+            self.assertEqual(["svc/a/x.py", "weird[1]/w.py"], changes.new_files)
+
+
+if __name__ == "__main__":
+    unittest.main()
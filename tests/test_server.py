@@ -0,0 +1,106 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from yagnidrift.server import CheckServer, _ensure_private_dir, default_socket_path, request, runtime_dir
+from yagnidrift.workgraph import locate_workgraph_dir
+
+
+class _FakeContext:
+    def __init__(self, wg_dir: Path) -> None:
+        self.wg_dir = wg_dir
+
+
+class TestServer(unittest.TestCase):
+    def test_ping_and_shutdown_roundtrip(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            wg_dir = Path(tmp) / ".workgraph"
+            wg_dir.mkdir()
+            sock = default_socket_path(wg_dir)
+            sock.parent.mkdir(parents=True)
+            server = CheckServer(sock, _FakeContext(wg_dir))
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                resp = request(sock, {"op": "ping"})
+                assert resp is not None
+                self.assertTrue(resp["ok"])
+                self.assertEqual(str(wg_dir), resp["wg_dir"])
+                self.assertFalse(request(sock, {"op": "bogus"})["ok"])  # type: ignore[index]
+                self.assertTrue(request(sock, {"op": "shutdown"})["ok"])  # type: ignore[index]
+                thread.join(timeout=5)
+                self.assertFalse(thread.is_alive())
+            finally:
+                server.server_close()
+
+    def test_no_daemon_returns_none(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertIsNone(request(Path(tmp) / "missing.sock", {"op": "ping"}))
+
+    def test_locates_workgraph_from_subdir(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp).resolve()
+            (root / ".workgraph").mkdir()
+            (root / "src" / "pkg").mkdir(parents=True)
+            self.assertEqual(root / ".workgraph", locate_workgraph_dir(str(root / "src" / "pkg")))
+            self.assertEqual(root / ".workgraph", locate_workgraph_dir(str(root / ".workgraph")))
+
+    def test_long_paths_fall_back_to_runtime_dir(self) -> None:
+        deep = Path("/tmp") / ("x" * 120) / ".workgraph"
+        with tempfile.TemporaryDirectory() as tmp:
+            with mock.patch.dict(os.environ, {"XDG_RUNTIME_DIR": tmp}):
+                self.assertEqual(Path(tmp), default_socket_path(deep).parent)
+            with mock.patch.dict(os.environ, {"XDG_RUNTIME_DIR": ""}):
+                path = default_socket_path(deep)
+        self.assertLessEqual(len(str(path)), 108)
+        self.assertEqual(runtime_dir(), path.parent)
+        self.assertIn(str(os.getuid()), path.parent.name)
+
+    def test_shared_runtime_dir_is_refused(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            private = Path(tmp) / "mine"
+            _ensure_private_dir(private)
+            self.assertEqual(0o700, private.stat().st_mode & 0o777)
+            shared = Path(tmp) / "shared"
+            shared.mkdir()
+            shared.chmod(0o777)
+            with self.assertRaises(RuntimeError):
+                _ensure_private_dir(shared)
+
+    def test_wedged_daemon_times_out(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "serve.sock"
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            listener.bind(str(path))
+            listener.listen(1)  # accepts the connection in the kernel backlog, never answers
+            try:
+                start = time.monotonic()
+                self.assertIsNone(request(path, {"op": "ping"}, read_timeout=0.2))
+                self.assertLess(time.monotonic() - start, 5)
+            finally:
+                listener.close()
+
+    def test_socket_owned_by_another_user_is_ignored(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            wg_dir = Path(tmp) / ".workgraph"
+            sock = default_socket_path(wg_dir)
+            sock.parent.mkdir(parents=True)
+            server = CheckServer(sock, _FakeContext(wg_dir))
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                self.assertIsNotNone(request(sock, {"op": "ping"}))
+                with mock.patch("yagnidrift.server.os.getuid", return_value=os.getuid() + 1):
+                    self.assertIsNone(request(sock, {"op": "ping"}))
+            finally:
+                server.shutdown()
+                server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import tomllib
+import unittest
+
+from yagnidrift.specs import (
+    extract_yagnidrift_blocks,
+    extract_yagnidrift_spec,
+    format_yagnidrift_blocks,
+    load_yagnidrift_spec,
+)
+
+_TEMPLATE = "```yagnidrift\nschema = 1\nmax_new_files = 4\nignore = [\"docs/**\"]\n```"
+
+
+class TestSpecs(unittest.TestCase):
+    def test_no_block(self) -> None:
+        self.assertEqual((), extract_yagnidrift_blocks("plain description with ``` fences ```"))
+        self.assertIsNone(extract_yagnidrift_spec(""))
+
+    def test_blocks_merge_in_document_order(self) -> None:
+        desc = f"intro\n{_TEMPLATE}\nmore\n```yagnidrift\nmax_new_files = 9\nignore = [\"gen/**\"]\n```\n"
+        blocks = extract_yagnidrift_blocks(desc)
+        self.assertEqual(2, len(blocks))
+        spec = load_yagnidrift_spec(blocks)
+        self.assertEqual(9, spec.max_new_files)
+        self.assertEqual(["gen/**", ".workgraph/**", ".git/**"], spec.ignore)
+        self.assertEqual(desc.count("```yagnidrift"), format_yagnidrift_blocks(blocks).count("```yagnidrift"))
+
+    def test_identical_specs_are_shared(self) -> None:
+        a = load_yagnidrift_spec(extract_yagnidrift_blocks(f"task a\n{_TEMPLATE}"))
+        b = load_yagnidrift_spec(extract_yagnidrift_blocks(f"task b\n{_TEMPLATE}"))
+        commented = _TEMPLATE.replace("schema = 1", "# copied from the template\nschema = 1")
+        c = load_yagnidrift_spec(extract_yagnidrift_blocks(commented))
+        self.assertIs(a, b)
+        self.assertIs(a, c)
+        self.assertIs(a.ignore_matcher, c.ignore_matcher)
+        self.assertTrue(a.ignore_matcher.match("docs/guide.md"))
+
+    def test_invalid_block_raises_every_time(self) -> None:
+        blocks = ("max_new_files = [",)
+        for _ in range(2):
+            with self.assertRaises(tomllib.TOMLDecodeError):
+                load_yagnidrift_spec(blocks)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from gitrepo import git
+from yagnidrift import timing
+from yagnidrift.git_tools import get_git_root, get_working_changes
+
+
+class TestTiming(unittest.TestCase):
+    def test_recording_collects_stages_and_git_calls(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            git(tmp, "init", "-q")
+            with timing.recording() as t:
+                with timing.span("collect"):
+                    root = get_git_root(Path(tmp))
+                    assert root is not None
+                    get_working_changes(root)
+                with timing.span("collect"):
+                    pass
+        out = t.to_dict()
+        self.assertEqual(["collect"], list(out["stages_ms"]))
+        self.assertEqual(2, out["git"]["calls"])
+        self.assertGreater(out["git"]["total_ms"], 0)
+
+    def test_spans_are_inert_without_a_recorder(self) -> None:
+        with timing.span("nothing"):
+            pass
+        with timing.recording() as t:
+            pass
+        self.assertEqual({}, t.stages)
+
+    def test_trace_file_gets_one_event_per_span(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.jsonl")
+            timing.configure_trace(path)
+            try:
+                with timing.span("outer", task_id="t1"):
+                    with timing.span("inner"):
+                        pass
+            finally:
+                timing.configure_trace(None)
+            events = [json.loads(line) for line in Path(path).read_text(encoding="utf-8").splitlines()]
+        self.assertEqual(["inner", "outer"], [e["name"] for e in events])
+        self.assertEqual({"task_id": "t1"}, events[1]["args"])
+        self.assertEqual("X", events[0]["ph"])
+
+
+if __name__ == "__main__":
+    unittest.main()
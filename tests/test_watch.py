@@ -0,0 +1,120 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from gitrepo import git, make_repo, write
+from yagnidrift.git_tools import get_working_changes
+from yagnidrift.watch import ChangeTracker
+
+
+class _TrackerCases:
+    mode = "poll"
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        make_repo(self.root, {"src/app.py": "app\n", "src/old.py": "old\n", ".gitignore": "*.log\n"})
+        self.tracker = ChangeTracker(self.root, mode=self.mode)
+
+    def tearDown(self) -> None:
+        self.tracker.close()
+        self._tmp.cleanup()
+
+    def assertTracks(self) -> None:
+        self.assertEqual(get_working_changes(self.root), self.tracker.snapshot())  # type: ignore[attr-defined]
+
+    def test_follows_worktree_edits_incrementally(self) -> None:
+        self.assertTracks()
+        full = self.tracker.full_scans
+
+        write(self.root, "src/app.py", "edited\n")
+        self.assertTracks()
+        write(self.root, "pkg/deep/new_module.py", "new\n")
+        self.assertTracks()
+        write(self.root, "debug.log", "ignored\n")
+        self.assertTracks()
+        os.remove(os.path.join(self.root, "src/old.py"))
+        self.assertTracks()
+        shutil.rmtree(os.path.join(self.root, "pkg"))
+        self.assertTracks()
+        write(self.root, "src/app.py", "app\n")
+        self.assertTracks()
+
+        self.assertEqual(full, self.tracker.full_scans)  # type: ignore[attr-defined]
+        self.assertGreater(self.tracker.scoped_scans, 0)  # type: ignore[attr-defined]
+
+    def test_reseeds_when_index_or_head_moves(self) -> None:
+        write(self.root, "src/new.py", "new\n")
+        self.assertTracks()
+        full = self.tracker.full_scans
+        git(self.root, "add", "src/new.py")
+        self.assertTracks()
+        git(self.root, "mv", "src/old.py", "src/renamed.py")
+        self.assertTracks()
+        write(self.root, "src/renamed.py", "old\nmore\n")
+        self.assertTracks()
+        git(self.root, "commit", "-q", "-m", "more")
+        self.assertTracks()
+        self.assertGreater(self.tracker.full_scans, full)  # type: ignore[attr-defined]
+
+
+    def test_ignored_directories_are_not_watched(self) -> None:
+        write(self.root, ".gitignore", "*.log\nnode_modules/\nbuild/\n")
+        write(self.root, "build/kept.txt", "kept\n")
+        git(self.root, "add", "-A")
+        git(self.root, "add", "-f", "build/kept.txt")
+        git(self.root, "commit", "-q", "-m", "ignore")
+        for i in range(20):
+            write(self.root, f"node_modules/p{i}/index.js", "x\n")
+        write(self.root, "build/out.bin", "x\n")
+        self.tracker.close()
+        self.tracker = ChangeTracker(self.root, mode=self.mode)
+        self.assertFalse([p for p in self.watched() if p.startswith("node_modules")])
+        self.assertIn("build", self.watched())  # holds a tracked file
+
+        write(self.root, "node_modules/p0/index.js", "edited\n")
+        write(self.root, "build/kept.txt", "edited\n")
+        self.assertTracks()
+
+        write(self.root, "node_modules/late/kept.js", "x\n")
+        git(self.root, "add", "-f", "node_modules/late/kept.js")
+        git(self.root, "commit", "-q", "-m", "force")
+        self.assertTracks()
+        write(self.root, "node_modules/late/kept.js", "edited\n")
+        self.assertTracks()
+
+    def test_unignored_directory_is_picked_up(self) -> None:
+        write(self.root, ".gitignore", "*.log\ngen/\n")
+        git(self.root, "commit", "-q", "-am", "ignore gen")
+        write(self.root, "gen/a.py", "a\n")
+        self.tracker.close()
+        self.tracker = ChangeTracker(self.root, mode=self.mode)
+        self.assertTracks()
+        write(self.root, ".gitignore", "*.log\n")
+        self.assertTracks()
+        write(self.root, "gen/b.py", "b\n")
+        self.assertTracks()
+
+
+class TestPollingTracker(_TrackerCases, unittest.TestCase):
+    mode = "poll"
+
+    def watched(self) -> set[str]:
+        return {p.rpartition("/")[0] for p in self.tracker._watcher._stats}  # type: ignore[union-attr]
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+class TestInotifyTracker(_TrackerCases, unittest.TestCase):
+    mode = "inotify"
+
+    def watched(self) -> set[str]:
+        return set(self.tracker._watcher._dirs.values())  # type: ignore[union-attr]
+
+    def test_uses_inotify(self) -> None:
+        self.assertEqual("inotify", self.tracker.backend)
+
+
+if __name__ == "__main__":
+    unittest.main()
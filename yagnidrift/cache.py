@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+from yagnidrift import __version__
+from yagnidrift.git_tools import (
+    common_dir,
+    find_git_dir,
+    find_worktree_root,
+    merge_base,
+    read_head_oid,
+    read_index_checksum,
+    resolve_ref_oid,
+)
+from yagnidrift.gitignore import DirPruner, Sources
+
+MAX_ENTRIES = 512
+MAX_BYTES = 32 * 1024 * 1024
+MAX_AGE_SECONDS = 7 * 24 * 3600
+# Bumped whenever the same inputs would produce a different report, so stale entries miss.
+KEY_SCHEMA = 4
+
+def _walk_stats(root: str, h: Any, git_dir: Path, skip: frozenset[str]) -> None:
+    # Ignored directories are skipped (see DirPruner): their contents can never be working changes.
+    # So are the worktree-relative paths in `skip`.
+    pruner = DirPruner(git_dir, common_dir(git_dir) / "info" / "exclude")
+    stack: list[tuple[str, Sources | None]] = [("", pruner.root())]
+    while stack:
+        rel_dir, sources = stack.pop()
+        try:
+            with os.scandir(os.path.join(root, rel_dir) if rel_dir else root) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        sources = pruner.enter(rel_dir, entries, sources)
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if rel in skip:
+                continue
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if os.path.exists(os.path.join(entry.path, ".git")):
+                    h.update(f"S{rel}\0".encode("utf-8", "surrogateescape"))
+                elif not pruner.prune(rel, sources):
+                    stack.append((rel, sources))
+                continue
+            h.update(f"F{rel}\0{st.st_mtime_ns}\0{st.st_size}\0{st.st_mode}\0".encode("utf-8", "surrogateescape"))
+
+
+def worktree_fingerprint(project_dir: Path, wg_dir: Path | None = None) -> str | None:
+    # HEAD + index checksum cover committed and staged state; the stat walk covers unstaged edits
+    # and untracked files outside ignored directories. Reading these never spawns git. `wg_dir` is
+    # left out wherever it sits in the worktree: every check writes its cache and state there.
+    worktree = find_worktree_root(project_dir)
+    if worktree is None:
+        return None
+    git_dir = find_git_dir(worktree)
+    if git_dir is None:
+        return None
+    head = read_head_oid(git_dir)
+    index = read_index_checksum(git_dir)
+    if head is None or index is None:
+        return None
+
+    skip = {".git"}
+    if wg_dir is not None:
+        try:
+            skip.add(wg_dir.resolve().relative_to(worktree).as_posix())
+        except ValueError:
+            pass  # outside the worktree: never walked
+
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{worktree}\0{head}\0{index}\0".encode("utf-8", "surrogateescape"))
+    _walk_stats(str(worktree), h, git_dir, frozenset(skip))
+    return h.hexdigest()
+
+
+def cache_key(
+    *,
+    fingerprint: str,
+    task_id: str,
+    task_title: str,
+    raw_block: str,
+    options: dict[str, Any] | None = None,
+    scope: tuple[str, ...] = (),
+) -> str:
+    # `scope` is the resolved task scope: it can come from the wg-contract `touch` list, outside the block.
+    payload = json.dumps(
+        [__version__, KEY_SCHEMA, fingerprint, task_id, task_title, raw_block, options or {}, list(scope)],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(
+        self,
+        cache_dir: Path,
+        *,
+        max_entries: int = MAX_ENTRIES,
+        max_bytes: int = MAX_BYTES,
+        max_age_seconds: float = MAX_AGE_SECONDS,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+    @staticmethod
+    def for_workgraph(wg_dir: Path) -> "ResultCache":
+        return ResultCache(wg_dir / ".yagnidrift" / "cache")
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        path = self._path(key)
+        try:
+            st = path.stat()
+            if time.time() - st.st_mtime > self.max_age_seconds:
+                return None
+            report = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(report, dict):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return report
+
+    def put(self, key: str, report: dict[str, Any]) -> None:
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_dir / f".{key}.{os.getpid()}.tmp"
+            tmp.write_text(json.dumps(report, sort_keys=False) + "\n", encoding="utf-8")
+            os.replace(tmp, self._path(key))
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        try:
+            entries = []
+            with os.scandir(self.cache_dir) as it:
+                for e in it:
+                    if e.name.endswith(".json") and e.is_file():
+                        st = e.stat()
+                        entries.append((st.st_mtime, st.st_size, e.path))
+        except OSError:
+            return
+
+        now = time.time()
+        entries.sort(reverse=True)
+        kept = 0
+        kept_bytes = 0
+        for mtime, size, path in entries:
+            expired = now - mtime > self.max_age_seconds
+            over = kept >= self.max_entries or kept_bytes + size > self.max_bytes
+            if expired or over:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            kept += 1
+            kept_bytes += size
+
+
+class MergeBaseCache:
+    # merge-base(HEAD, base) is fixed once both commits are, so answers are kept on disk keyed by
+    # the two oids; refs are resolved from files, so a hit spawns no git.
+    MAX_ENTRIES = 256
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._entries: dict[str, str] | None = None
+
+    @staticmethod
+    def for_workgraph(wg_dir: Path) -> "MergeBaseCache":
+        return MergeBaseCache(wg_dir / ".yagnidrift" / "merge-base.json")
+
+    def _load(self) -> dict[str, str]:
+        if self._entries is None:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                self._entries = {str(k): str(v) for k, v in data.items()} if isinstance(data, dict) else {}
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self) -> None:
+        entries = self._load()
+        while len(entries) > self.MAX_ENTRIES:
+            entries.pop(next(iter(entries)))
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(entries, indent=0) + "\n", encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def lookup(self, git_root: str, base: str) -> str | None:
+        git_dir = find_git_dir(Path(git_root))
+        head = resolve_ref_oid(git_dir, "HEAD") if git_dir is not None else None
+        base_oid = resolve_ref_oid(git_dir, base) if git_dir is not None else None
+        key = f"{head}:{base_oid}" if head and base_oid else None
+        if key is not None:
+            hit = self._load().get(key)
+            if hit is not None:
+                return hit
+        mb = merge_base(git_root, base)
+        if mb is not None and key is not None:
+            self._load()[key] = mb
+            self._save()
+        return mb
@@ -0,0 +1,683 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import sqlite3
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+
+from yagnidrift.cache import MergeBaseCache, ResultCache, cache_key, worktree_fingerprint
+from yagnidrift.content import ContentAnalysis, analyze_paths
+from yagnidrift.dirindex import tracked_dirs
+from yagnidrift.drift import compute_yagni_drift, stream_yagni_drift
+from yagnidrift.fastpath import no_block_report
+from yagnidrift.followups import FollowupPlan, FollowupPlanner, commit_plan
+from yagnidrift.git_async import GitTelemetry, get_git_root_async, get_working_changes_async
+from yagnidrift.git_tools import (
+    LineCount,
+    WorkingChanges,
+    find_git_dir,
+    find_worktree_root,
+    get_branch_changes,
+    get_git_root,
+    get_line_counts,
+    get_working_changes,
+    resolve_ref_oid,
+)
+from yagnidrift.history import HistoryStore, history_row
+from yagnidrift.scope import plan_shards, resolve_scope, scope_changes, scope_prefixes, task_scope, to_pathspecs
+from yagnidrift.specs import (
+    YagnidriftSpec,
+    extract_yagnidrift_blocks,
+    format_yagnidrift_blocks,
+    load_yagnidrift_spec,
+)
+from yagnidrift.timing import span
+from yagnidrift.watch import ChangeTracker
+from yagnidrift.workgraph import CLOSED_STATUSES, Workgraph, find_workgraph_dir, load_graph_tasks
+
+
+@dataclass(frozen=True)
+class CheckOptions:
+    write_log: bool = False
+    create_followups: bool = False
+    use_cache: bool = True
+    base: str | None = None
+    # Count large untracked directories instead of listing them (see get_working_changes). The result
+    # cache is bypassed: its worktree stat walk would enumerate those directories anyway.
+    collapse_untracked: bool = False
+    # Collect working changes by reading .git/index directly (see gitindex.py), with git as fallback.
+    native_index: bool = False
+
+
+def _state_path_for_task(wg_dir: Path, task_id: str) -> Path:
+    safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in task_id) or "_"
+    return wg_dir / ".yagnidrift" / "tasks" / safe / "last.json"
+
+
+def _write_json(path: Path, payload: dict) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(payload, indent=2, sort_keys=False) + "\n", encoding="utf-8")
+    except Exception:
+        pass
+
+
+def _write_state(*, wg_dir: Path, report: dict, latest: bool = True) -> None:
+    task_id = report.get("task_id")
+    if task_id:
+        _write_json(_state_path_for_task(wg_dir, str(task_id)), report)
+    if latest:
+        _write_json(wg_dir / ".yagnidrift" / "last.json", report)
+
+
+class ChangeSnapshot:
+    # Git state is collected at most once per snapshot and shared by every task checked against it.
+    def __init__(
+        self,
+        project_dir: Path,
+        *,
+        cache: ResultCache | None = None,
+        git_root: str | None = None,
+        collect: Callable[[str], WorkingChanges] = get_working_changes,
+        key_options: dict | None = None,
+        state_dir: Path | None = None,
+        pathspecs: list[str] | None = None,
+        wg_dir: Path | None = None,
+    ) -> None:
+        self.project_dir = project_dir
+        # Left out of the worktree fingerprint: checks write their state and the graph's log there.
+        self.wg_dir = wg_dir
+        # Set when `collect` only walks part of the worktree (tasks scoped to those paths).
+        self.pathspecs = pathspecs
+        self.cache = cache
+        # On-disk home for derived git data (tracked-dir listings, parsed-file facts); None keeps it in memory.
+        self.state_dir = state_dir
+        # Commit the changes are measured against: its tree decides which directories already exist and
+        # line counts are diffed from it (the merge-base in --base mode).
+        self.base_commit = "HEAD"
+        self._tracked_dirs: frozenset[str] | None = None
+        self._dirs_loaded = False
+        self._line_counts: dict[str, LineCount] | None = None
+        # Folded into result-cache keys and report telemetry (e.g. the --base ref being diffed against).
+        self.key_options = key_options or {}
+        self.telemetry: dict = {}
+        self._known_git_root = git_root
+        self._collect = collect
+        self._loaded = False
+        self._git_root: str | None = None
+        self._changes: WorkingChanges | None = None
+        self._fingerprint: str | None = None
+        self._fingerprinted = False
+
+    @classmethod
+    def preloaded(
+        cls,
+        project_dir: Path,
+        *,
+        git_root: str | None,
+        changes: WorkingChanges | None,
+        cache: ResultCache | None = None,
+        wg_dir: Path | None = None,
+    ) -> "ChangeSnapshot":
+        snapshot = cls(project_dir, cache=cache, git_root=git_root, wg_dir=wg_dir)
+        snapshot._git_root, snapshot._changes, snapshot._loaded = git_root, changes, True
+        return snapshot
+
+    def load(self) -> tuple[str | None, WorkingChanges | None]:
+        if not self._loaded:
+            self._git_root = self._known_git_root or get_git_root(self.project_dir)
+            self._changes = self._collect(self._git_root) if self._git_root else None
+            self._loaded = True
+        return self._git_root, self._changes
+
+    @property
+    def git_root(self) -> str | None:
+        return self._git_root
+
+    def tracked_dirs(self) -> frozenset[str] | None:
+        if not self._dirs_loaded:
+            git_root, _changes = self.load()
+            cache_dir = self.state_dir / "dirs" if self.state_dir else None
+            if git_root is not None:
+                with span("tracked_dirs"):
+                    self._tracked_dirs = tracked_dirs(git_root, self.base_commit, cache_dir=cache_dir)
+            self._dirs_loaded = True
+        return self._tracked_dirs
+
+    def line_counts(self) -> dict[str, LineCount] | None:
+        # One numstat per snapshot, shared by every task that sets a line budget.
+        if self._line_counts is None:
+            git_root, changes = self.load()
+            if git_root is None or changes is None:
+                return None
+            with span("line_counts"):
+                self._line_counts = get_line_counts(
+                    git_root, self.base_commit, changes.new_files, pathspecs=self.pathspecs
+                )
+        return self._line_counts
+
+    def fingerprint(self) -> str | None:
+        if not self._fingerprinted:
+            self._fingerprint = worktree_fingerprint(self.project_dir, wg_dir=self.wg_dir)
+            self._fingerprinted = True
+        return self._fingerprint
+
+
+async def load_snapshot_async(
+    project_dir: Path,
+    *,
+    cache: ResultCache | None = None,
+    timeout: float | None = None,
+    wg_dir: Path | None = None,
+) -> tuple[ChangeSnapshot, GitTelemetry]:
+    # Collects git state without blocking the event loop; evaluate_task then runs on the loaded snapshot.
+    telemetry = GitTelemetry()
+    git_root = await get_git_root_async(project_dir, timeout=timeout, telemetry=telemetry)
+    changes = None
+    if git_root is not None:
+        changes = await get_working_changes_async(git_root, timeout=timeout, telemetry=telemetry)
+    snapshot = ChangeSnapshot.preloaded(project_dir, git_root=git_root, changes=changes, cache=cache, wg_dir=wg_dir)
+    return snapshot, telemetry
+
+
+def analyze_content(
+    spec: YagnidriftSpec, snapshot: ChangeSnapshot, git_root: str | None, changes: WorkingChanges | None
+) -> ContentAnalysis | None:
+    if not spec.content_analysis or git_root is None or not changes:
+        return None
+    ignore = spec.ignore_matcher
+    allow = spec.allow_matcher
+    paths = [p for p in changes.changed_files if p.endswith(".py") and not ignore.match(p)]
+    added = set(changes.new_files)
+    new_paths = frozenset(p for p in paths if p in added and not allow.match(p))
+    with span("content_analysis"):
+        return analyze_paths(
+            git_root,
+            paths,
+            new_paths=new_paths,
+            cache_dir=snapshot.state_dir / "ast" if snapshot.state_dir else None,
+        )
+
+
+def _invalid_spec_report(*, task_id: str, title: str, error: Exception, blocks: tuple[str, ...]) -> dict:
+    report = {
+        "task_id": task_id,
+        "task_title": title,
+        "git_root": None,
+        "score": "yellow",
+        "spec": None,
+        "telemetry": {"parse_error": str(error)},
+        "findings": [
+            {
+                "kind": "invalid_yagnidrift_spec",
+                "severity": "warn",
+                "summary": "yagnidrift block present but could not be parsed",
+            }
+        ],
+        "recommendations": [
+            {
+                "priority": "high",
+                "action": "Fix the yagnidrift TOML block so it parses",
+                "rationale": "Yagnidrift can only advise on complexity drift when it can read the configuration.",
+            }
+        ],
+    }
+    report["_yagnidrift_block"] = format_yagnidrift_blocks(blocks)
+    return report
+
+
+def evaluate_task(*, task_id: str, task: dict, snapshot: ChangeSnapshot) -> dict | None:
+    title = str(task.get("title") or task_id)
+    description = str(task.get("description") or "")
+
+    with span("parse_spec", task_id=task_id):
+        blocks = extract_yagnidrift_blocks(description)
+        if not blocks:
+            return None
+        try:
+            spec = load_yagnidrift_spec(blocks)
+        except Exception as e:
+            return _invalid_spec_report(task_id=task_id, title=title, error=e, blocks=blocks)
+    raw_block = "\n\n".join(blocks)
+    scope = resolve_scope(spec, description)
+
+    key: str | None = None
+    if snapshot.cache is not None:
+        with span("cache_lookup", task_id=task_id):
+            fingerprint = snapshot.fingerprint()
+            cached = None
+            if fingerprint is not None:
+                key = cache_key(
+                    fingerprint=fingerprint,
+                    task_id=task_id,
+                    task_title=title,
+                    raw_block=raw_block,
+                    options=snapshot.key_options,
+                    scope=scope,
+                )
+                cached = snapshot.cache.get(key)
+        if cached is not None:
+            cached.setdefault("telemetry", {})["cache"] = "hit"
+            return cached
+
+    with span("git_changes"):
+        git_root, changes = snapshot.load()
+    if scope and changes is not None:
+        changes = scope_changes(changes, scope)
+    dirs = snapshot.tracked_dirs() if changes and changes.new_files else None
+    content = analyze_content(spec, snapshot, git_root, changes)
+    line_counts = snapshot.line_counts() if spec.has_loc_budget and changes else None
+
+    with span("classify", task_id=task_id):
+        report = compute_yagni_drift(
+            task_id=task_id,
+            task_title=title,
+            description=description,
+            spec=spec,
+            git_root=git_root,
+            changes=changes,
+            tracked_dirs=dirs,
+            content=content,
+            line_counts=line_counts,
+        )
+    report["telemetry"].update(snapshot.telemetry)
+    if scope:
+        report["telemetry"]["scope"] = list(scope)
+    report["_yagnidrift_block"] = format_yagnidrift_blocks(blocks)
+    if key is not None and snapshot.cache is not None:
+        with span("cache_store", task_id=task_id):
+            snapshot.cache.put(key, report)
+    return report
+
+
+def stream_task(*, task_id: str, task: dict, snapshot: ChangeSnapshot) -> Iterator[dict] | None:
+    # Streaming form of evaluate_task (None when the task has no block). The result cache is not
+    # consulted, since cached reports only carry truncated path lists; the final report is stored.
+    title = str(task.get("title") or task_id)
+    description = str(task.get("description") or "")
+
+    blocks = extract_yagnidrift_blocks(description)
+    if not blocks:
+        return None
+
+    try:
+        spec = load_yagnidrift_spec(blocks)
+    except Exception as e:
+        report = _invalid_spec_report(task_id=task_id, title=title, error=e, blocks=blocks)
+        return iter([{"type": "report", "report": report}])
+    raw_block = "\n\n".join(blocks)
+    scope = resolve_scope(spec, description)
+
+    def records() -> Iterator[dict]:
+        git_root, changes = snapshot.load()
+        if scope and changes is not None:
+            changes = scope_changes(changes, scope)
+        for record in stream_yagni_drift(
+            task_id=task_id,
+            task_title=title,
+            description=description,
+            spec=spec,
+            git_root=git_root,
+            changes=changes,
+            tracked_dirs=snapshot.tracked_dirs() if changes and changes.new_files else None,
+            content=analyze_content(spec, snapshot, git_root, changes),
+            line_counts=snapshot.line_counts() if spec.has_loc_budget and changes else None,
+        ):
+            if record["type"] == "report":
+                report = record["report"]
+                report["telemetry"].update(snapshot.telemetry)
+                if scope:
+                    report["telemetry"]["scope"] = list(scope)
+                report["_yagnidrift_block"] = format_yagnidrift_blocks(blocks)
+                if snapshot.cache is not None:
+                    fingerprint = snapshot.fingerprint()
+                    if fingerprint is not None:
+                        key = cache_key(
+                            fingerprint=fingerprint,
+                            task_id=task_id,
+                            task_title=title,
+                            raw_block=raw_block,
+                            options=snapshot.key_options,
+                            scope=scope,
+                        )
+                        snapshot.cache.put(key, report)
+            yield record
+
+    return records()
+
+
+def summarize(reports: list[dict]) -> dict:
+    scores = {"green": 0, "yellow": 0, "red": 0}
+    for r in reports:
+        score = str(r.get("score"))
+        scores[score] = scores.get(score, 0) + 1
+    return {
+        "tasks_checked": len(reports),
+        "tasks_with_findings": sum(1 for r in reports if r.get("findings")),
+        "scores": scores,
+    }
+
+
+class CheckContext:
+    def __init__(self, wg_dir: Path) -> None:
+        self.wg_dir = wg_dir
+        self.project_dir = wg_dir.parent
+        self.state_dir = wg_dir / ".yagnidrift"
+        self.wg = Workgraph(wg_dir=wg_dir, project_dir=self.project_dir)
+        self.history = HistoryStore.for_workgraph(wg_dir)
+        # Rows for reports produced since the last flush; written in one transaction per command.
+        self._history_rows: list[dict] = []
+        # Log lines and follow-ups, likewise applied once per command.
+        self.followups = FollowupPlanner(closed_statuses=CLOSED_STATUSES)
+        self.last_followup_plan: FollowupPlan | None = None
+
+    @classmethod
+    def discover(cls, dir: str | None) -> "CheckContext":
+        with span("find_workgraph_dir"):
+            wg_dir = find_workgraph_dir(Path(dir) if dir else None)
+        return cls(wg_dir)
+
+    def new_snapshot(
+        self, options: CheckOptions, *, prefixes: tuple[str, ...] | None = None, git_root: str | None = None
+    ) -> ChangeSnapshot:
+        # `prefixes` limits collection to those directories (see scope.py); None walks everything.
+        use_cache = options.use_cache and not options.collapse_untracked
+        cache = ResultCache.for_workgraph(self.wg_dir) if use_cache else None
+        pathspecs = to_pathspecs(prefixes) if prefixes else None
+        if options.base:
+            return self.base_snapshot(
+                options.base,
+                cache=cache,
+                git_root=git_root,
+                pathspecs=pathspecs,
+                collapse_untracked=options.collapse_untracked,
+            )
+        collect: Callable[[str], WorkingChanges] = get_working_changes
+        if options.native_index:
+            collect = partial(
+                get_working_changes,
+                pathspecs=pathspecs,
+                collapse_untracked=options.collapse_untracked,
+                native=True,
+                cache_dir=self.state_dir / "gitindex",
+            )
+        elif pathspecs or options.collapse_untracked:
+            collect = partial(
+                get_working_changes, pathspecs=pathspecs, collapse_untracked=options.collapse_untracked
+            )
+        return ChangeSnapshot(
+            self.project_dir,
+            cache=cache,
+            git_root=git_root,
+            collect=collect,
+            state_dir=self.state_dir,
+            pathspecs=pathspecs,
+            wg_dir=self.wg_dir,
+        )
+
+    def base_snapshot(
+        self,
+        base: str,
+        *,
+        cache: ResultCache | None,
+        git_root: str | None = None,
+        pathspecs: list[str] | None = None,
+        collapse_untracked: bool = False,
+    ) -> ChangeSnapshot:
+        # Scores everything the branch changed since it left `base`, committed or not.
+        worktree = find_worktree_root(self.project_dir)
+        git_dir = find_git_dir(worktree) if worktree is not None else None
+        base_oid = resolve_ref_oid(git_dir, base) if git_dir is not None else None
+        if base_oid is None:
+            # HEAD is in the fingerprint, but an expression like `main~2` also depends on refs it
+            # does not cover; such reports are not cached.
+            cache = None
+        merge_bases = MergeBaseCache.for_workgraph(self.wg_dir)
+        snapshot: ChangeSnapshot
+
+        def collect(root: str) -> WorkingChanges:
+            with span("merge_base"):
+                mb = merge_bases.lookup(root, base)
+            if mb is None:
+                raise ValueError(f"No merge-base between HEAD and {base!r}")
+            snapshot.telemetry.update({"base": base, "merge_base": mb})
+            snapshot.base_commit = mb
+            return get_branch_changes(root, mb, pathspecs=pathspecs, collapse_untracked=collapse_untracked)
+
+        snapshot = ChangeSnapshot(
+            self.project_dir,
+            cache=cache,
+            git_root=git_root,
+            collect=collect,
+            key_options={"base": base, "base_oid": base_oid},
+            state_dir=self.state_dir,
+            pathspecs=pathspecs,
+            wg_dir=self.wg_dir,
+        )
+        return snapshot
+
+    def load_task(self, task_id: str) -> dict:
+        with span("show_task", task_id=task_id):
+            task = self.wg.show_task(task_id)
+        if not task:
+            raise ValueError(f"Task not found: {task_id}")
+        return task
+
+    def flush(self) -> None:
+        # Applies the writes collected by apply_side_effects since the last flush.
+        rows, self._history_rows = self._history_rows, []
+        self.last_followup_plan = None
+        if rows:
+            with span("write_history"):
+                try:
+                    self.history.append(rows)
+                except (OSError, sqlite3.Error):
+                    pass
+        if self.followups:
+            with span("load_graph"):
+                graph = load_graph_tasks(self.wg_dir)
+            plan = self.followups.plan(graph)
+            with span("wg_writes", logs=len(plan.logs), followups=len(plan.create)):
+                commit_plan(self.wg, plan)
+            self.last_followup_plan = plan
+
+    def apply_side_effects(self, report: dict, options: CheckOptions, *, latest: bool) -> None:
+        with span("write_state"):
+            _write_state(wg_dir=self.wg_dir, report=report, latest=latest)
+        row = history_row(report)
+        if row is not None:
+            self._history_rows.append(row)
+        self.followups.add(report, write_log=options.write_log, create_followups=options.create_followups)
+
+    def _task_snapshot(self, task: dict, options: CheckOptions) -> ChangeSnapshot:
+        prefixes = scope_prefixes(task_scope(str(task.get("description") or "")))
+        return self.new_snapshot(options, prefixes=prefixes)
+
+    def check_task(self, task_id: str, options: CheckOptions) -> dict:
+        task = self.load_task(task_id)
+        report = evaluate_task(task_id=task_id, task=task, snapshot=self._task_snapshot(task, options))
+        if report is None:
+            return no_block_report(task_id=task_id, title=str(task.get("title") or task_id))
+        self.apply_side_effects(report, options, latest=True)
+        self.flush()
+        return report
+
+    def _stream(
+        self, task_id: str, task: dict, snapshot: ChangeSnapshot, options: CheckOptions, *, latest: bool
+    ) -> Iterator[dict]:
+        records = stream_task(task_id=task_id, task=task, snapshot=snapshot)
+        if records is None:
+            yield {"type": "report", "report": no_block_report(task_id=task_id, title=str(task.get("title") or task_id))}
+            return
+        for record in records:
+            if record["type"] == "report":
+                self.apply_side_effects(record["report"], options, latest=latest)
+            yield record
+
+    def stream_task(self, task_id: str, options: CheckOptions) -> Iterator[dict]:
+        task = self.load_task(task_id)
+        try:
+            yield from self._stream(task_id, task, self._task_snapshot(task, options), options, latest=True)
+        finally:
+            self.flush()
+
+    def select_tasks(self, task_ids: list[str], *, include_closed: bool) -> list[tuple[str, dict]]:
+        with span("load_graph"):
+            graph = load_graph_tasks(self.wg_dir)
+
+        if not task_ids:
+            if graph is None:
+                raise ValueError(
+                    f"Cannot list tasks: {self.wg_dir / 'graph.jsonl'} not readable (pass --task or --tasks-from)"
+                )
+            selected: list[tuple[str, dict]] = []
+            for task_id, task in graph.items():
+                if not include_closed and str(task.get("status") or "") in CLOSED_STATUSES:
+                    continue
+                if not extract_yagnidrift_blocks(str(task.get("description") or "")):
+                    continue
+                selected.append((task_id, task))
+            return selected
+
+        selected = []
+        seen: set[str] = set()
+        for task_id in task_ids:
+            if task_id in seen:
+                continue
+            seen.add(task_id)
+            task = (graph or {}).get(task_id) or self.load_task(task_id)
+            selected.append((task_id, task))
+        return selected
+
+    def shard_snapshots(self, tasks: list[tuple[str, dict]], options: CheckOptions) -> list[ChangeSnapshot]:
+        # One snapshot per task. When every task is scoped, tasks whose scopes overlap share a snapshot
+        # collected for their paths only, and the shards are collected concurrently; otherwise all
+        # tasks share one full snapshot.
+        shards = plan_shards([scope_prefixes(task_scope(str(t.get("description") or ""))) for _, t in tasks])
+        if shards is None:
+            return [self.new_snapshot(options)] * len(tasks)
+        snapshots: list[ChangeSnapshot] = [None] * len(tasks)  # type: ignore[list-item]
+        shard_snapshots = []
+        git_root = get_git_root(self.project_dir) if len(shards) > 1 else None
+        for indices, prefixes in shards:
+            snapshot = self.new_snapshot(options, prefixes=prefixes, git_root=git_root)
+            shard_snapshots.append(snapshot)
+            for i in indices:
+                snapshots[i] = snapshot
+        if len(shard_snapshots) > 1:
+            with span("shards", n=len(shard_snapshots)), ThreadPoolExecutor(len(shard_snapshots)) as pool:
+                # Each load runs in a copy of this context so its git spans land in the same timings.
+                futures = [pool.submit(contextvars.copy_context().run, s.load) for s in shard_snapshots]
+                for f in futures:
+                    f.result()
+        return snapshots
+
+    def check_all(self, task_ids: list[str], *, include_closed: bool, options: CheckOptions) -> dict:
+        tasks = self.select_tasks(task_ids, include_closed=include_closed)
+
+        snapshots = self.shard_snapshots(tasks, options)
+        reports: list[dict] = []
+        for (task_id, task), snapshot in zip(tasks, snapshots):
+            report = evaluate_task(task_id=task_id, task=task, snapshot=snapshot)
+            if report is None:
+                report = no_block_report(task_id=task_id, title=str(task.get("title") or task_id))
+            else:
+                self.apply_side_effects(report, options, latest=False)
+            reports.append(report)
+        self.flush()
+
+        combined = {
+            "git_root": _git_root_of(snapshots),
+            "summary": summarize(reports),
+            "reports": reports,
+        }
+        if options.create_followups and self.last_followup_plan is not None:
+            combined["followups"] = self.last_followup_plan.to_dict()
+        _write_json(self.wg_dir / ".yagnidrift" / "check-all.json", combined)
+        return combined
+
+    def stream_all(self, task_ids: list[str], *, include_closed: bool, options: CheckOptions) -> Iterator[dict]:
+        # Records from every task in turn, then {"type": "summary"}. Only the summary is kept in memory.
+        tasks = self.select_tasks(task_ids, include_closed=include_closed)
+        snapshots = self.shard_snapshots(tasks, options)
+        reports: list[dict] = []
+        try:
+            for (task_id, task), snapshot in zip(tasks, snapshots):
+                for record in self._stream(task_id, task, snapshot, options, latest=False):
+                    if record["type"] == "report":
+                        report = record["report"]
+                        reports.append({"score": report.get("score"), "findings": bool(report.get("findings"))})
+                    yield record
+        finally:
+            self.flush()
+        yield {"type": "summary", "git_root": _git_root_of(snapshots), **summarize(reports)}
+
+
+def _git_root_of(snapshots: list[ChangeSnapshot]) -> str | None:
+    return next((s.git_root for s in snapshots if s.git_root is not None), None)
+
+
+class WarmCheckContext(CheckContext):
+    # Long-lived context for `yagnidrift serve`. The git root is resolved once. With `watch` set,
+    # a ChangeTracker keeps working changes current from filesystem events; otherwise one change
+    # snapshot is reused for up to `snapshot_ttl` seconds (0 re-collects on every request).
+    def __init__(self, wg_dir: Path, *, snapshot_ttl: float = 0.0, watch: str = "off") -> None:
+        super().__init__(wg_dir)
+        self.snapshot_ttl = snapshot_ttl
+        self.git_root = get_git_root(self.project_dir)
+        self.tracker: ChangeTracker | None = None
+        if watch != "off" and self.git_root:
+            self.tracker = ChangeTracker(self.git_root, mode=watch)
+        self._snapshot: ChangeSnapshot | None = None
+        self._snapshot_at = 0.0
+
+    def _shares_snapshot(self, options: CheckOptions) -> bool:
+        # The tracker and the shared snapshot follow worktree-vs-HEAD changes, file by file.
+        return not (options.base or options.collapse_untracked or (options.native_index and self.tracker is None))
+
+    def shard_snapshots(self, tasks: list[tuple[str, dict]], options: CheckOptions) -> list[ChangeSnapshot]:
+        # One snapshot for every task: evaluate_task applies each task's scope to it. Per-shard
+        # snapshots would load the same tracker (which is not thread-safe) or the same TTL snapshot
+        # from several threads at once.
+        if not self._shares_snapshot(options):
+            return super().shard_snapshots(tasks, options)
+        return [self.new_snapshot(options)] * len(tasks)
+
+    def new_snapshot(
+        self, options: CheckOptions, *, prefixes: tuple[str, ...] | None = None, git_root: str | None = None
+    ) -> ChangeSnapshot:
+        # Scoped tasks are filtered from the full change set here: the tracker (or the shared snapshot)
+        # already covers the whole worktree, so `prefixes` is only used for --base collections.
+        if not self._shares_snapshot(options):
+            return super().new_snapshot(options, prefixes=prefixes, git_root=self.git_root)
+        if self.tracker is not None:
+            # The tracker already makes a re-check cost O(changed paths); the result cache's
+            # worktree stat walk would cost more than it saves.
+            tracker = self.tracker
+            return ChangeSnapshot(
+                self.project_dir,
+                git_root=self.git_root,
+                collect=lambda _root: tracker.snapshot(),
+                state_dir=self.state_dir,
+                wg_dir=self.wg_dir,
+            )
+
+        now = time.monotonic()
+        snap = self._snapshot
+        if snap is None or now - self._snapshot_at > self.snapshot_ttl or (snap.cache is not None) != options.use_cache:
+            cache = ResultCache.for_workgraph(self.wg_dir) if options.use_cache else None
+            snap = ChangeSnapshot(
+                self.project_dir, cache=cache, git_root=self.git_root, state_dir=self.state_dir, wg_dir=self.wg_dir
+            )
+            self._snapshot = snap
+            self._snapshot_at = now
+        return snap
+
+    def close(self) -> None:
+        if self.tracker is not None:
+            self.tracker.close()
@@ -1,19 +1,31 @@
 from __future__ import annotations
 
-import argparse
+import contextlib
 import json
+import os
 import sys
+import time
+from collections.abc import Iterator
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from yagnidrift.contracts import format_default_contract_block
-from yagnidrift.drift import compute_yagni_drift
-from yagnidrift.git_tools import get_git_root, get_working_changes
-from yagnidrift.specs import YagnidriftSpec, extract_yagnidrift_spec, parse_yagnidrift_spec
-from yagnidrift.workgraph import Workgraph, find_workgraph_dir
+from yagnidrift.workgraph import locate_workgraph_dir
+
+if TYPE_CHECKING:
+    import argparse
+
+    from yagnidrift.checks import CheckOptions
+    from yagnidrift.timing import Timings
+
+# The check engine, git helpers, daemon client and SDK are imported inside the commands that use them:
+# `wg check` on a task without a yagnidrift block answers from graph.jsonl before any of them load
+# (see fastpath.py and benchmarks/importtime.py). argparse too: the installed pre-commit hook's
+# command line is answered without it (see main).
 
 
 class ExitCode:
     ok = 0
+    error = 1
     findings = 3
     usage = 2
 
@@ -35,176 +47,365 @@ def _emit_text(report: dict) -> None:
         print(f"- [{f.get('severity')}] {f.get('kind')}: {f.get('summary')}")
 
 
-def _write_state(*, wg_dir: Path, report: dict) -> None:
+def _emit_report(report: dict, *, as_json: bool) -> None:
+    if as_json:
+        print(json.dumps(report, indent=2, sort_keys=False))
+    else:
+        _emit_text(report)
+
+
+def _emit_check_all(combined: dict, *, as_json: bool) -> None:
+    if as_json:
+        print(json.dumps(combined, indent=2, sort_keys=False))
+        return
+    reports = combined.get("reports") or []
+    for i, report in enumerate(reports):
+        if i:
+            print()
+        _emit_text(report)
+    summary = combined.get("summary") or {}
+    if reports:
+        print()
+    print(f"checked: {summary.get('tasks_checked', 0)} tasks, {summary.get('tasks_with_findings', 0)} with findings")
+
+
+def _options(args: argparse.Namespace) -> CheckOptions:
+    from yagnidrift.checks import CheckOptions
+
+    return CheckOptions(
+        write_log=bool(args.write_log),
+        create_followups=bool(args.create_followups),
+        use_cache=not args.no_cache,
+        base=args.base or None,
+        collapse_untracked=bool(args.collapse_untracked),
+        native_index=bool(args.native_index),
+    )
+
+
+def _timed(args: argparse.Namespace) -> contextlib.AbstractContextManager[Timings | None]:
+    if not args.timings:
+        return contextlib.nullcontext()
+    from yagnidrift.timing import recording
+
+    return recording()
+
+
+def _emit_records(records: Iterator[dict]) -> bool:
+    # NDJSON: one line per record, flushed as produced. Returns whether any task had findings.
+    findings = False
     try:
-        out_dir = wg_dir / ".yagnidrift"
-        out_dir.mkdir(parents=True, exist_ok=True)
-        (out_dir / "last.json").write_text(json.dumps(report, indent=2, sort_keys=False) + "\n", encoding="utf-8")
-    except Exception:
-        pass
+        for record in records:
+            if record.get("type") == "report":
+                findings = findings or bool(record["report"].get("findings"))
+            print(json.dumps(record, sort_keys=False), flush=True)
+    except BrokenPipeError:
+        # The reader went away (`| head`): stop, and point stdout at devnull so later writes and the
+        # interpreter's final flush do not fail again.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        os.close(devnull)
+    return findings
+
+
+def _via_daemon(args: argparse.Namespace, payload: dict) -> dict | None:
+    if args.no_daemon:
+        return None
+    wg_dir = locate_workgraph_dir(args.dir)
+    if wg_dir is None:
+        return None
+    from yagnidrift.server import default_socket_path, request
+
+    payload = {
+        **payload,
+        "write_log": bool(args.write_log),
+        "create_followups": bool(args.create_followups),
+        "no_cache": bool(args.no_cache),
+        "timings": bool(args.timings),
+        "base": args.base,
+        "collapse_untracked": bool(args.collapse_untracked),
+        "native_index": bool(args.native_index),
+    }
+    return request(Path(args.socket) if args.socket else default_socket_path(wg_dir), payload)
+
+
+def _fast_no_block(args: argparse.Namespace, task_id: str) -> dict | None:
+    wg_dir = locate_workgraph_dir(args.dir)
+    if wg_dir is None:
+        return None
+    from yagnidrift.fastpath import find_no_block_task
+
+    return find_no_block_task(wg_dir, task_id)
 
 
-def _maybe_write_log(wg: Workgraph, task_id: str, report: dict) -> None:
-    findings = report.get("findings") or []
-    score = report.get("score", "unknown")
-    recs = report.get("recommendations") or []
+def cmd_wg_check(args: argparse.Namespace) -> int:
+    if not args.task:
+        print("error: --task is required", file=sys.stderr)
+        return ExitCode.usage
 
-    if not findings:
-        msg = "Yagnidrift: OK (no findings)"
+    task_id = str(args.task)
+    if not (args.timings or args.profile):
+        report = _fast_no_block(args, task_id)
+        if report is not None:
+            if args.format == "ndjson":
+                print(json.dumps({"type": "report", "report": report}, sort_keys=False), flush=True)
+            else:
+                _emit_report(report, as_json=args.json or args.format == "json")
+            return ExitCode.ok
+
+    from yagnidrift.checks import CheckContext
+
+    if args.format == "ndjson":
+        try:
+            with _timed(args) as timings:
+                findings = _emit_records(CheckContext.discover(args.dir).stream_task(task_id, _options(args)))
+        except (OSError, ValueError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            return ExitCode.usage
+        if timings is not None:
+            print(json.dumps({"type": "timings", **timings.to_dict()}), flush=True)
+        return ExitCode.findings if findings else ExitCode.ok
+
+    resp = _via_daemon(args, {"op": "check", "task": task_id})
+    if resp is not None and not resp.get("ok"):
+        print(f"error: {resp.get('error')}", file=sys.stderr)
+        return ExitCode.usage
+    if resp is not None:
+        report = resp["report"]
     else:
-        kinds = ", ".join(sorted({str(f.get("kind")) for f in findings}))
-        msg = f"Yagnidrift: {score} ({kinds})"
-        if recs:
-            next_action = str(recs[0].get("action") or "").strip()
-            if next_action:
-                msg += f" | next: {next_action}"
+        try:
+            with _timed(args) as timings:
+                report = CheckContext.discover(args.dir).check_task(task_id, _options(args))
+        except (OSError, ValueError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            return ExitCode.usage
+        if timings is not None:
+            report.setdefault("telemetry", {})["timings"] = timings.to_dict()
+
+    _emit_report(report, as_json=args.json or args.format == "json")
+    return ExitCode.findings if report.get("findings") else ExitCode.ok
 
-    wg.wg_log(task_id, msg)
 
+def _read_task_ids(source: str) -> list[str]:
+    if source == "-":
+        text = sys.stdin.read()
+    else:
+        text = Path(source).read_text(encoding="utf-8")
+    ids: list[str] = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            ids.append(line)
+    return ids
+
+
+def cmd_wg_check_all(args: argparse.Namespace) -> int:
+    from yagnidrift.checks import CheckContext
+
+    task_ids = [str(t) for t in (args.task or [])]
+    if args.tasks_from:
+        task_ids.extend(_read_task_ids(args.tasks_from))
+
+    if args.format == "ndjson":
+        try:
+            with _timed(args) as timings:
+                records = CheckContext.discover(args.dir).stream_all(
+                    task_ids, include_closed=args.include_closed, options=_options(args)
+                )
+                findings = _emit_records(records)
+        except (OSError, ValueError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            return ExitCode.usage
+        if timings is not None:
+            print(json.dumps({"type": "timings", **timings.to_dict()}), flush=True)
+        return ExitCode.findings if findings else ExitCode.ok
+
+    resp = _via_daemon(args, {"op": "check-all", "tasks": task_ids, "include_closed": bool(args.include_closed)})
+    if resp is not None and not resp.get("ok"):
+        print(f"error: {resp.get('error')}", file=sys.stderr)
+        return ExitCode.usage
+    if resp is not None:
+        combined = resp["report"]
+    else:
+        try:
+            with _timed(args) as timings:
+                combined = CheckContext.discover(args.dir).check_all(
+                    task_ids, include_closed=args.include_closed, options=_options(args)
+                )
+        except (OSError, ValueError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            return ExitCode.usage
+        if timings is not None:
+            combined.setdefault("telemetry", {})["timings"] = timings.to_dict()
+
+    _emit_check_all(combined, as_json=args.json or args.format == "json")
+    return ExitCode.findings if any(r.get("findings") for r in combined.get("reports") or []) else ExitCode.ok
+
+
+def cmd_scan(args: argparse.Namespace) -> int:
+    from yagnidrift.scan import default_jobs, expand_dirs, scan_repos, summarize_scan
+
+    dirs = expand_dirs(list(args.dirs or []), list(args.glob or []))
+    if not dirs:
+        print("error: no project directories to scan (pass dirs or --glob)", file=sys.stderr)
+        return ExitCode.usage
 
-def _maybe_create_followups(wg: Workgraph, report: dict) -> None:
-    task_id = str(report["task_id"])
-    task_title = str(report.get("task_title") or task_id)
-    findings = report.get("findings") or []
-    if not findings:
-        return
+    started = time.monotonic()
+    results: list[dict] = []
+    jobs = args.jobs or default_jobs()
+    for result in scan_repos(dirs, jobs=jobs, timeout=args.timeout or None, options=_options(args)):
+        results.append(result)
+        print(json.dumps(result, sort_keys=False), flush=True)
+    summary = summarize_scan(results, elapsed_s=time.monotonic() - started)
+    print(json.dumps(summary, sort_keys=False), flush=True)
 
-    follow_id = f"drift-yagni-{task_id}"
-    title = f"yagni: {task_title}"
-    recs = report.get("recommendations") or []
-    action_lines = "\n".join([f"- {str(r.get('action') or '').strip()}" for r in recs if str(r.get("action") or "").strip()])
-    if not action_lines:
-        action_lines = "- Reduce speculative complexity and keep only what current acceptance needs."
-
-    desc = (
-        "Reduce speculative complexity for this task.\n\n"
-        "Context:\n"
-        f"- Origin task: {task_id}\n"
-        f"- Findings: {', '.join(sorted({str(f.get('kind')) for f in findings}))}\n\n"
-        "Recommended actions:\n"
-        f"{action_lines}\n\n"
-        + format_default_contract_block(mode="core", objective=title, touch=[])
-        + "\n"
-        + (report.get("_yagnidrift_block") or "").strip()
-        + "\n"
-    )
+    if summary["error"] or summary["timeout"]:
+        return ExitCode.error
+    return ExitCode.findings if summary["tasks_with_findings"] else ExitCode.ok
 
-    wg.ensure_task(
-        task_id=follow_id,
-        title=title,
-        description=desc,
-        blocked_by=[task_id],
-        tags=["drift", "yagni"],
-    )
 
+def _emit_rows(rows: list[dict], columns: list[str]) -> None:
+    widths = [max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)).rstrip())
+    for r in rows:
+        print("  ".join(str(r.get(c, "")).ljust(w) for c, w in zip(columns, widths)).rstrip())
 
-def _load_task(*, wg: Workgraph, task_id: str) -> dict:
-    task = wg.show_task(task_id)
-    if not task:
-        raise ValueError(f"Task not found: {task_id}")
-    return task
 
+def cmd_history(args: argparse.Namespace) -> int:
+    wg_dir = locate_workgraph_dir(args.dir)
+    if wg_dir is None:
+        print("error: no .workgraph directory found", file=sys.stderr)
+        return ExitCode.usage
+    from yagnidrift.history import HistoryStore
+
+    store = HistoryStore.for_workgraph(wg_dir)
+    since = time.time() - args.days * 86400
+
+    if args.query == "trend":
+        if not args.task:
+            print("error: --task is required for trend", file=sys.stderr)
+            return ExitCode.usage
+        rows = store.trend(args.task, limit=args.limit)
+        for r in rows:
+            r["when"] = time.strftime("%Y-%m-%d %H:%M", time.localtime(r["ts"]))
+            r["kinds"] = ",".join(r["kinds"]) if not args.json else r["kinds"]
+        columns = ["when", "score", "new_files", "new_dirs", "new_loc", "kinds"]
+    elif args.query == "worst":
+        rows = store.worst_offenders(since=since, limit=args.limit)
+        columns = ["task_id", "drifting", "runs"]
+    elif args.query == "kinds":
+        rows = store.finding_kinds(since=since, limit=args.limit)
+        columns = ["kind", "runs", "tasks"]
+    else:
+        rows = store.keyword_frequencies(since=since, limit=args.limit)
+        columns = ["keyword", "hits", "tasks"]
 
-def cmd_wg_check(args: argparse.Namespace) -> int:
-    if not args.task:
-        print("error: --task is required", file=sys.stderr)
+    if args.json:
+        print(json.dumps(rows, indent=2, sort_keys=False))
+    elif rows:
+        _emit_rows(rows, columns)
+    else:
+        print("no history")
+    return ExitCode.ok
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    wg_dir = locate_workgraph_dir(args.dir)
+    if wg_dir is None:
+        print("error: no .workgraph directory found", file=sys.stderr)
         return ExitCode.usage
+    from yagnidrift.server import default_socket_path, request, serve
 
-    wg_dir = find_workgraph_dir(Path(args.dir) if args.dir else None)
-    project_dir = wg_dir.parent
-    wg = Workgraph(wg_dir=wg_dir, project_dir=project_dir)
+    socket_path = Path(args.socket) if args.socket else default_socket_path(wg_dir)
 
-    task_id = str(args.task)
-    task = _load_task(wg=wg, task_id=task_id)
-    title = str(task.get("title") or task_id)
-    description = str(task.get("description") or "")
-
-    raw_block = extract_yagnidrift_spec(description)
-    if raw_block is None:
-        report = {
-            "task_id": task_id,
-            "task_title": title,
-            "git_root": None,
-            "score": "green",
-            "spec": None,
-            "telemetry": {"note": "no yagnidrift block"},
-            "findings": [],
-            "recommendations": [],
-        }
-        if args.json:
-            print(json.dumps(report, indent=2, sort_keys=False))
-        else:
-            _emit_text(report)
+    if args.status or args.stop:
+        resp = request(socket_path, {"op": "shutdown" if args.stop else "ping"})
+        if resp is None:
+            print(f"not running ({socket_path})", file=sys.stderr)
+            return ExitCode.usage
+        print(json.dumps(resp, indent=2, sort_keys=False) if args.json or args.status else "stopped")
         return ExitCode.ok
 
     try:
-        spec_raw = parse_yagnidrift_spec(raw_block)
-        spec = YagnidriftSpec.from_raw(spec_raw)
-    except Exception as e:
-        report = {
-            "task_id": task_id,
-            "task_title": title,
-            "git_root": None,
-            "score": "yellow",
-            "spec": None,
-            "telemetry": {"parse_error": str(e)},
-            "findings": [
-                {
-                    "kind": "invalid_yagnidrift_spec",
-                    "severity": "warn",
-                    "summary": "yagnidrift block present but could not be parsed",
-                }
-            ],
-            "recommendations": [
-                {
-                    "priority": "high",
-                    "action": "Fix the yagnidrift TOML block so it parses",
-                    "rationale": "Yagnidrift can only advise on complexity drift when it can read the configuration.",
-                }
-            ],
-        }
-        report["_yagnidrift_block"] = f"```yagnidrift\n{raw_block}\n```"
-        _write_state(wg_dir=wg_dir, report=report)
-        if args.write_log:
-            _maybe_write_log(wg, task_id, report)
-        if args.json:
-            print(json.dumps(report, indent=2, sort_keys=False))
-        else:
-            _emit_text(report)
-        return ExitCode.findings
+        return serve(wg_dir, socket_path=socket_path, snapshot_ttl=args.snapshot_ttl, watch=args.watch)
+    except RuntimeError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return ExitCode.usage
 
-    git_root = get_git_root(project_dir)
-    changes = get_working_changes(git_root) if git_root else None
 
-    report = compute_yagni_drift(
-        task_id=task_id,
-        task_title=title,
-        description=description,
-        spec=spec,
-        git_root=git_root,
-        changes=changes,
-    )
-    report["_yagnidrift_block"] = f"```yagnidrift\n{raw_block}\n```"
+def cmd_hook(args: argparse.Namespace) -> int:
+    from yagnidrift.git_tools import find_worktree_root
+    from yagnidrift.hook import install_hook, uninstall_hook
+
+    project_dir = Path(args.dir) if args.dir else Path.cwd()
+    if args.install or args.uninstall:
+        worktree = find_worktree_root(project_dir)
+        if worktree is None:
+            print(f"error: not inside a git worktree: {project_dir}", file=sys.stderr)
+            return ExitCode.usage
+        if args.uninstall:
+            removed = uninstall_hook(str(worktree))
+            print(f"removed {removed}" if removed else "no yagnidrift pre-commit hook installed")
+            return ExitCode.ok
+        try:
+            path = install_hook(str(worktree), strict=args.strict, force=args.force)
+        except ValueError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return ExitCode.usage
+        print(f"installed {path}")
+        return ExitCode.ok
 
-    _write_state(wg_dir=wg_dir, report=report)
+    return _check_staged(project_dir, task_id=args.task, strict=args.strict, as_json=args.json, timed=_timed(args))
 
-    if args.write_log:
-        _maybe_write_log(wg, task_id, report)
-    if args.create_followups:
-        _maybe_create_followups(wg, report)
 
-    if args.json:
-        print(json.dumps(report, indent=2, sort_keys=False))
-    else:
-        _emit_text(report)
+def _check_staged(
+    project_dir: Path,
+    *,
+    task_id: str | None,
+    strict: bool,
+    as_json: bool,
+    timed: contextlib.AbstractContextManager[Timings | None],
+) -> int:
+    from yagnidrift.hook import run_hook
 
-    return ExitCode.findings if report.get("findings") else ExitCode.ok
+    try:
+        with timed as timings:
+            report = run_hook(project_dir, task_id=task_id)
+    except ValueError as e:
+        # A broken spec must not block commits unless the hook was installed --strict.
+        print(f"yagnidrift: {e}", file=sys.stderr)
+        return ExitCode.usage if strict else ExitCode.ok
+    if report is None:
+        return ExitCode.ok
+    if timings is not None:
+        report["telemetry"]["timings"] = timings.to_dict()
+    if as_json:
+        _emit_report(report, as_json=True)
+    elif report.get("findings"):
+        # Hook output goes to stderr, where git shows it next to the commit.
+        with contextlib.redirect_stdout(sys.stderr):
+            _emit_text(report)
+    if report.get("findings") and strict:
+        return ExitCode.findings
+    return ExitCode.ok
 
 
 def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv in (["hook"], ["hook", "--strict"]):
+        # What the installed pre-commit hook runs on every commit. Importing argparse and building this
+        # parser cost a fair share of the hook's latency budget, so its exact command line skips both.
+        timed = contextlib.nullcontext()
+        return _check_staged(Path.cwd(), task_id=None, strict=len(argv) == 2, as_json=False, timed=timed)
+
+    import argparse
+
     p = argparse.ArgumentParser(prog="yagnidrift")
     p.add_argument("--dir", help="Project directory (or .workgraph dir). Defaults to cwd search.")
     p.add_argument("--json", action="store_true", help="JSON output (where supported)")
+    p.add_argument("--socket", help="Daemon socket path (default: .workgraph/.yagnidrift/serve.sock)")
+    p.add_argument("--no-daemon", action="store_true", help="Always run in-process, even if a daemon is running")
+    p.add_argument("--timings", action="store_true", help="Add per-stage wall time and git call stats to telemetry")
+    p.add_argument("--profile", metavar="OUT", help="Run under cProfile and write stats to OUT (.pstats)")
 
     sub = p.add_subparsers(dest="cmd", required=True)
 
@@ -215,10 +416,128 @@ def main(argv: list[str] | None = None) -> int:
     check.add_argument("--task", help="Task id to check")
     check.add_argument("--write-log", action="store_true", help="Write summary into wg log")
     check.add_argument("--create-followups", action="store_true", help="Create follow-up tasks for findings")
+    check.add_argument("--no-cache", action="store_true", help="Ignore and do not update the result cache")
+    check.add_argument("--base", metavar="REF", help="Also score changes committed since the merge-base with REF")
+    check.add_argument(
+        "--collapse-untracked",
+        action="store_true",
+        help="Count large untracked directories (e.g. node_modules) instead of listing every file in them",
+    )
+    check.add_argument(
+        "--native-index",
+        action="store_true",
+        help="Read .git/index directly instead of running git status (falls back to git when unsupported)",
+    )
+    check.add_argument(
+        "--format",
+        choices=["text", "json", "ndjson"],
+        help="Output format (ndjson streams every offending path as it is classified; runs in-process)",
+    )
     check.set_defaults(func=cmd_wg_check)
 
+    check_all = wg_sub.add_parser(
+        "check-all",
+        help="Check every open task with a yagnidrift block against one shared git snapshot",
+    )
+    check_all.add_argument("--task", action="append", help="Task id to check (repeatable; default: all open tasks)")
+    check_all.add_argument("--tasks-from", help="Read task ids from a file, one per line ('-' for stdin)")
+    check_all.add_argument("--include-closed", action="store_true", help="Also check done/abandoned tasks")
+    check_all.add_argument("--write-log", action="store_true", help="Write summary into wg log for each task")
+    check_all.add_argument("--create-followups", action="store_true", help="Create follow-up tasks for findings")
+    check_all.add_argument("--no-cache", action="store_true", help="Ignore and do not update the result cache")
+    check_all.add_argument("--base", metavar="REF", help="Also score changes committed since the merge-base with REF")
+    check_all.add_argument(
+        "--collapse-untracked",
+        action="store_true",
+        help="Count large untracked directories (e.g. node_modules) instead of listing every file in them",
+    )
+    check_all.add_argument(
+        "--native-index",
+        action="store_true",
+        help="Read .git/index directly instead of running git status (falls back to git when unsupported)",
+    )
+    check_all.add_argument(
+        "--format",
+        choices=["text", "json", "ndjson"],
+        help="Output format (ndjson streams every offending path as it is classified; runs in-process)",
+    )
+    check_all.set_defaults(func=cmd_wg_check_all)
+
+    scan = sub.add_parser("scan", help="Check every open task in many workgraph repos concurrently (NDJSON output)")
+    scan.add_argument("dirs", nargs="*", help="Project directories to scan")
+    scan.add_argument("--glob", action="append", help="Glob of project directories (repeatable), e.g. 'repos/*'")
+    scan.add_argument("--jobs", type=int, help="Repos scanned concurrently (default: min(8, cpus))")
+    scan.add_argument("--timeout", type=float, default=300.0, help="Per-repo timeout in seconds (0 disables; default: 300)")
+    scan.add_argument("--write-log", action="store_true", help="Write summary into wg log for each task")
+    scan.add_argument("--create-followups", action="store_true", help="Create follow-up tasks for findings")
+    scan.add_argument("--no-cache", action="store_true", help="Ignore and do not update the result cache")
+    scan.add_argument("--base", metavar="REF", help="Also score changes committed since the merge-base with REF")
+    scan.add_argument(
+        "--collapse-untracked",
+        action="store_true",
+        help="Count large untracked directories (e.g. node_modules) instead of listing every file in them",
+    )
+    scan.add_argument(
+        "--native-index",
+        action="store_true",
+        help="Read .git/index directly instead of running git status (falls back to git when unsupported)",
+    )
+    scan.set_defaults(func=cmd_scan)
+
+    hist = sub.add_parser("history", help="Query the record of past check results")
+    hist.add_argument(
+        "query",
+        choices=["trend", "worst", "kinds", "keywords"],
+        help="trend: one task's recent runs; worst: tasks drifting most often; kinds/keywords: most frequent "
+        "finding kinds / abstraction keywords",
+    )
+    hist.add_argument("--task", help="Task id (trend)")
+    hist.add_argument("--days", type=float, default=30.0, help="Window for worst/kinds/keywords (default: 30)")
+    hist.add_argument("--limit", type=int, default=20, help="Maximum rows (default: 20)")
+    hist.set_defaults(func=cmd_history)
+
+    srv = sub.add_parser("serve", help="Run a daemon that answers wg check requests over a Unix socket")
+    srv.add_argument(
+        "--snapshot-ttl",
+        type=float,
+        default=0.0,
+        help="With --watch off, reuse one git change snapshot for this many seconds (default: 0)",
+    )
+    srv.add_argument(
+        "--watch",
+        choices=["auto", "inotify", "poll", "off"],
+        default="auto",
+        help="Track working changes incrementally from filesystem events (default: auto, inotify with polling fallback)",
+    )
+    srv.add_argument("--status", action="store_true", help="Report whether a daemon is running, then exit")
+    srv.add_argument("--stop", action="store_true", help="Stop a running daemon, then exit")
+    srv.set_defaults(func=cmd_serve)
+
+    hook = sub.add_parser("hook", help="Check the staged changes (git pre-commit hook; advisory unless --strict)")
+    hook.add_argument(
+        "--task",
+        help="Task whose spec applies (default: $YAGNIDRIFT_TASK, else .yagnidrift.toml, else the one "
+        "in-progress task with a yagnidrift block)",
+    )
+    hook.add_argument("--strict", action="store_true", help="Fail the commit on findings or an invalid spec")
+    hook.add_argument("--install", action="store_true", help="Install as this repository's pre-commit hook")
+    hook.add_argument("--uninstall", action="store_true", help="Remove the pre-commit hook installed by --install")
+    hook.add_argument("--force", action="store_true", help="With --install, replace an existing pre-commit hook")
+    hook.set_defaults(func=cmd_hook)
+
     args = p.parse_args(argv)
-    return int(args.func(args))
+    if not args.profile:
+        return int(args.func(args))
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return int(args.func(args))
+    finally:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+# Optional content analysis (spec: content_analysis = true). New and changed Python files are parsed
+# with `ast`; facts are cached per blob id so an unchanged file is never parsed twice. Issues are only
+# raised for definitions in new files: changed files contribute implementations, not suspects.
+
+# Bumped whenever analyze_source changes what it records, so cached facts are re-derived.
+ANALYZER_VERSION = 1
+MAX_FILE_BYTES = 1 << 20
+# Below this many cache misses a process pool costs more to start than it saves.
+POOL_THRESHOLD = 16
+
+_CREATOR_RE = re.compile(r"^(create|make|build|new)_")
+_REGISTRY_RE = re.compile(r"registr(y|ies)", re.IGNORECASE)
+
+
+def blob_id(data: bytes) -> str:
+    # Same id `git hash-object` gives a file in a SHA-1 repo (before clean filters).
+    h = hashlib.sha1(b"blob %d\0" % len(data))
+    h.update(data)
+    return h.hexdigest()
+
+
+def _name(node: ast.expr) -> str | None:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Subscript):
+        return _name(node.value)
+    return None
+
+
+def _is_abstractmethod(fn: ast.FunctionDef | ast.AsyncFunctionDef) -> bool:
+    return any(_name(d) in ("abstractmethod", "abstractproperty") for d in fn.decorator_list)
+
+
+def _returned_classes(fn: ast.FunctionDef | ast.AsyncFunctionDef) -> set[str]:
+    out: set[str] = set()
+    for node in ast.walk(fn):
+        if isinstance(node, ast.Return) and isinstance(node.value, ast.Call):
+            callee = _name(node.value.func)
+            if callee and callee[:1].isupper():
+                out.add(callee)
+    return out
+
+
+def _assigns_subscript(fn: ast.FunctionDef | ast.AsyncFunctionDef) -> bool:
+    for node in ast.walk(fn):
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Subscript) for t in node.targets):
+            return True
+    return False
+
+
+def _function_patterns(fn: ast.FunctionDef | ast.AsyncFunctionDef, owner: str | None) -> list[dict[str, Any]]:
+    qualname = f"{owner}.{fn.name}" if owner else fn.name
+    out = []
+    if _CREATOR_RE.match(fn.name) and len(_returned_classes(fn)) >= 2:
+        out.append({"kind": "factory", "name": qualname, "line": fn.lineno})
+    if fn.name.startswith("register") and _assigns_subscript(fn):
+        out.append({"kind": "registry", "name": qualname, "line": fn.lineno})
+    return out
+
+
+def analyze_source(source: bytes) -> dict[str, Any]:
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError) as e:
+        return {"classes": [], "patterns": [], "error": f"{type(e).__name__}: {e}"}
+
+    classes: list[dict[str, Any]] = []
+    patterns: list[dict[str, Any]] = []
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            bases = [b for b in (_name(x) for x in node.bases) if b]
+            metaclass = next((_name(k.value) for k in node.keywords if k.arg == "metaclass"), None)
+            methods = [n for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+            abstract = "ABC" in bases or metaclass == "ABCMeta" or any(_is_abstractmethod(m) for m in methods)
+            public = sorted({m.name for m in methods if not m.name.startswith("_") or m.name == "__call__"})
+            classes.append(
+                {
+                    "name": node.name,
+                    "bases": bases,
+                    "abstract": abstract,
+                    "protocol": "Protocol" in bases,
+                    "methods": public,
+                    "line": node.lineno,
+                }
+            )
+            if node.name.endswith("Factory"):
+                patterns.append({"kind": "factory", "name": node.name, "line": node.lineno})
+            elif node.name.endswith("Registry"):
+                patterns.append({"kind": "registry", "name": node.name, "line": node.lineno})
+            for m in methods:
+                patterns.extend(_function_patterns(m, node.name))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            patterns.extend(_function_patterns(node, None))
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            value = node.value
+            is_mapping = isinstance(value, ast.Dict) or (isinstance(value, ast.Call) and _name(value.func) == "dict")
+            for t in targets:
+                if isinstance(t, ast.Name) and is_mapping and _REGISTRY_RE.search(t.id):
+                    patterns.append({"kind": "registry", "name": t.id, "line": node.lineno})
+    return {"classes": classes, "patterns": patterns, "error": None}
+
+
+@dataclass
+class ContentAnalysis:
+    # `new_paths` are the analyzed files the task added; only their definitions can raise issues.
+    new_paths: frozenset[str] = frozenset()
+    facts: dict[str, dict[str, Any]] = field(default_factory=dict)
+    parsed: int = 0
+    cache_hits: int = 0
+    skipped: int = 0
+
+    def issues(self) -> list[dict[str, Any]]:
+        new_paths = self.new_paths
+        classes = [(path, c) for path, f in self.facts.items() for c in f["classes"]]
+        out: list[dict[str, Any]] = []
+        for path, cls in classes:
+            if path not in new_paths or not (cls["abstract"] or cls["protocol"]):
+                continue
+            if cls["protocol"]:
+                wanted = set(cls["methods"])
+                impls = [
+                    f"{p}:{c['name']}"
+                    for p, c in classes
+                    if c is not cls
+                    and not c["protocol"]
+                    and (cls["name"] in c["bases"] or (wanted and wanted <= set(c["methods"])))
+                ]
+                kind = "single_implementation_protocol"
+            else:
+                impls = [f"{p}:{c['name']}" for p, c in classes if cls["name"] in c["bases"] and not c["abstract"]]
+                kind = "single_implementation_abstraction"
+            if len(impls) <= 1:
+                out.append(
+                    {"kind": kind, "path": path, "name": cls["name"], "line": cls["line"], "implementations": impls}
+                )
+        for path in sorted(new_paths):
+            for pat in self.facts.get(path, {}).get("patterns", []):
+                out.append(
+                    {
+                        "kind": "factory_or_registry",
+                        "pattern": pat["kind"],
+                        "path": path,
+                        "name": pat["name"],
+                        "line": pat["line"],
+                    }
+                )
+        return out
+
+    def clean(self) -> frozenset[str]:
+        # New files that parsed and declare no abstraction, protocol, factory or registry.
+        out = set()
+        for path in self.new_paths:
+            f = self.facts.get(path)
+            if f is None or f["error"] or f["patterns"]:
+                continue
+            if not any(c["abstract"] or c["protocol"] for c in f["classes"]):
+                out.add(path)
+        return frozenset(out)
+
+    def telemetry(self) -> dict[str, int]:
+        return {"parsed": self.parsed, "cache_hits": self.cache_hits, "skipped": self.skipped}
+
+
+def analyze_paths(
+    git_root: str,
+    paths: list[str],
+    *,
+    new_paths: frozenset[str] = frozenset(),
+    cache_dir: Path | None = None,
+    jobs: int | None = None,
+) -> ContentAnalysis:
+    result = ContentAnalysis(new_paths=new_paths)
+    misses: dict[str, bytes] = {}
+    miss_paths: dict[str, list[str]] = {}
+    for rel in paths:
+        try:
+            with open(os.path.join(git_root, rel), "rb") as f:
+                data = f.read(MAX_FILE_BYTES + 1)
+        except OSError:
+            result.skipped += 1  # deleted, or not a regular file
+            continue
+        if len(data) > MAX_FILE_BYTES:
+            result.skipped += 1
+            continue
+        oid = blob_id(data)
+        cached = _cache_get(cache_dir, oid)
+        if cached is not None:
+            result.facts[rel] = cached
+            result.cache_hits += 1
+            continue
+        misses[oid] = data
+        miss_paths.setdefault(oid, []).append(rel)
+
+    if misses:
+        oids = list(misses)
+        if len(oids) >= POOL_THRESHOLD and (jobs or os.cpu_count() or 1) > 1:
+            workers = min(jobs or os.cpu_count() or 1, 8, len(oids))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                analyzed = list(pool.map(analyze_source, (misses[o] for o in oids), chunksize=8))
+        else:
+            analyzed = [analyze_source(misses[o]) for o in oids]
+        for oid, facts in zip(oids, analyzed):
+            _cache_put(cache_dir, oid, facts)
+            result.parsed += 1
+            for rel in miss_paths[oid]:
+                result.facts[rel] = facts
+    return result
+
+
+def _cache_path(cache_dir: Path, oid: str) -> Path:
+    return cache_dir / f"v{ANALYZER_VERSION}" / oid[:2] / f"{oid[2:]}.json"
+
+
+def _cache_get(cache_dir: Path | None, oid: str) -> dict[str, Any] | None:
+    if cache_dir is None:
+        return None
+    try:
+        data = json.loads(_cache_path(cache_dir, oid).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _cache_put(cache_dir: Path | None, oid: str, facts: dict[str, Any]) -> None:
+    if cache_dir is None:
+        return
+    path = _cache_path(cache_dir, oid)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(facts, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import re
+from functools import lru_cache
+
 DEFAULT_NON_GOALS = ["No fallbacks/retries/guardrails unless acceptance requires it"]
 
 
@@ -31,3 +34,28 @@ def format_default_contract_block(*, mode: str, objective: str, touch: list[str]
     lines.append("auto_followups = true")
     lines.append("```")
     return "\n".join(lines).rstrip() + "\n"
+
+
+_CONTRACT_FENCE = "```wg-contract"
+_CONTRACT_RE = re.compile(r"```wg-contract\s*\n(?P<body>.*?)\n```", re.DOTALL)
+
+
+@lru_cache(maxsize=256)
+def _touch_of(body: str) -> tuple[str, ...]:
+    import tomllib  # only once a task has a contract block; see parse_yagnidrift_spec
+
+    try:
+        touch = tomllib.loads(body).get("touch")
+    except tomllib.TOMLDecodeError:
+        return ()
+    if not isinstance(touch, list):
+        return ()
+    return tuple(str(t).strip() for t in touch if str(t).strip())
+
+
+def extract_contract_touch(description: str) -> tuple[str, ...]:
+    # `touch` paths from the task's wg-contract block (empty when absent or unparsable).
+    if not description or _CONTRACT_FENCE not in description:
+        return ()
+    m = _CONTRACT_RE.search(description)
+    return _touch_of(m.group("body").strip()) if m else ()
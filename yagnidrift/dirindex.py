@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import os
+import subprocess
+from collections import OrderedDict
+from collections.abc import Iterable
+from pathlib import Path
+
+from yagnidrift.git_tools import _git_records, _git_lines, find_git_dir, read_head_oid
+
+# Directories tracked in a commit's tree, from one `git ls-tree -r -d`, cached per tree oid (trees
+# are immutable). A commit -> tree map avoids even the rev-parse on repeat checks of the same HEAD.
+
+_MEMO_SIZE = 4
+_memo: OrderedDict[str, frozenset[str]] = OrderedDict()
+
+
+def _remember(tree: str, dirs: frozenset[str]) -> frozenset[str]:
+    _memo[tree] = dirs
+    _memo.move_to_end(tree)
+    while len(_memo) > _MEMO_SIZE:
+        _memo.popitem(last=False)
+    return dirs
+
+
+def _read_commit_trees(cache_dir: Path) -> dict[str, str]:
+    try:
+        text = (cache_dir / "trees").read_text(encoding="ascii")
+    except OSError:
+        return {}
+    pairs = (line.split(" ", 1) for line in text.splitlines())
+    return {p[0]: p[1] for p in pairs if len(p) == 2}
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _tree_of(git_root: str, commit: str, cache_dir: Path | None) -> str | None:
+    trees = _read_commit_trees(cache_dir) if cache_dir is not None else {}
+    tree = trees.get(commit)
+    if tree is not None:
+        return tree
+    lines = _git_lines(["rev-parse", "--verify", "-q", f"{commit}^{{tree}}"], cwd=git_root)
+    if not lines:
+        return None
+    tree = lines[0].strip()
+    if cache_dir is not None:
+        trees[commit] = tree
+        # Newest last; keep the map small, it only has to cover recently checked commits.
+        recent = list(trees.items())[-256:]
+        _write_atomic(cache_dir / "trees", "".join(f"{c} {t}\n" for c, t in recent).encode("ascii"))
+    return tree
+
+
+def tracked_dirs(git_root: str, commit: str = "HEAD", *, cache_dir: Path | None = None) -> frozenset[str] | None:
+    # Returns None when the tree cannot be listed; callers then fall back to the parent heuristic.
+    if commit == "HEAD":
+        git_dir = find_git_dir(Path(git_root))
+        oid = read_head_oid(git_dir) if git_dir is not None else None
+        if oid is None:
+            return None
+        if oid.startswith("unborn:"):
+            return frozenset()
+        commit = oid
+
+    tree = _tree_of(git_root, commit, cache_dir)
+    if tree is None:
+        return None
+    if tree in _memo:
+        _memo.move_to_end(tree)
+        return _memo[tree]
+
+    if cache_dir is not None:
+        try:
+            data = (cache_dir / f"{tree}.dirs").read_bytes()
+            return _remember(tree, frozenset(os.fsdecode(d) for d in data.split(b"\0") if d))
+        except OSError:
+            pass
+
+    try:
+        records = [r for r in _git_records(["ls-tree", "-r", "-d", "--name-only", "-z", tree], cwd=git_root) if r]
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    if cache_dir is not None:
+        _write_atomic(cache_dir / f"{tree}.dirs", b"\0".join(records))
+    return _remember(tree, frozenset(os.fsdecode(r) for r in records))
+
+
+# Above this many candidate directories the full (cached) listing is cheaper than one long command line.
+_AMONG_LIMIT = 512
+
+
+def tracked_among(git_root: str, dirs: Iterable[str], commit: str = "HEAD") -> frozenset[str] | None:
+    # Which of `dirs` are directories in `commit`'s tree, from one `git ls-tree -d` limited to them:
+    # for callers that only ask about the ancestors of a handful of new files (the pre-commit hook),
+    # this stays a few milliseconds where reading every directory of a large tree does not.
+    wanted = sorted(set(dirs))
+    if not wanted:
+        return frozenset()
+    if len(wanted) > _AMONG_LIMIT:
+        found = tracked_dirs(git_root, commit)
+        return None if found is None else found.intersection(wanted)
+    if commit == "HEAD":
+        git_dir = find_git_dir(Path(git_root))
+        oid = read_head_oid(git_dir) if git_dir is not None else None
+        if oid is None:
+            return None
+        if oid.startswith("unborn:"):
+            return frozenset()
+    try:
+        # ls-tree matches paths literally, but also lists the entries beside a dir it recursed into (and
+        # without -t, not that dir itself), hence -t and the intersection.
+        args = ["ls-tree", "-d", "-t", "--name-only", "-z", commit, "--", *wanted]
+        listed = {os.fsdecode(r) for r in _git_records(args, cwd=git_root) if r}
+        return frozenset(listed.intersection(wanted))
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -1,13 +1,20 @@
 from __future__ import annotations
 
+import heapq
+import posixpath
+from collections import Counter
+from collections.abc import Iterator
 from dataclasses import asdict, dataclass
-from pathlib import PurePosixPath
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from yagnidrift.git_tools import WorkingChanges
-from yagnidrift.globmatch import match_any
+from yagnidrift.git_tools import LineCount, UntrackedDir, WorkingChanges
+from yagnidrift.keywords import KeywordHit, compile_keywords
+from yagnidrift.pathtrie import CHANGED, NEW, PathTrie, hotspots
 from yagnidrift.specs import YagnidriftSpec
 
+if TYPE_CHECKING:
+    from yagnidrift.content import ContentAnalysis
+
 
 @dataclass(frozen=True)
 class Finding:
@@ -17,55 +24,158 @@ class Finding:
     details: dict[str, Any] | None = None
 
 
-def _is_allowed(path: str, allow_paths: list[str]) -> bool:
-    if not allow_paths:
-        return False
-    return match_any(path, allow_paths)
+# Never part of a task's changes, whatever the spec's `ignore` says.
+_ALWAYS_SKIPPED = frozenset({".workgraph", ".git"})
 
 
 def _is_speculative(path: str, keywords: list[str]) -> bool:
-    low = path.lower()
-    stem = PurePosixPath(low).stem
-    parts = [p for p in low.replace("-", "_").split("/") if p]
-    for kw in keywords:
-        token = str(kw).strip().lower()
-        if not token:
-            continue
-        if token in stem:
-            return True
-        if any(token in part for part in parts):
-            return True
-    return False
+    return compile_keywords(tuple(keywords)).find(path) is not None
 
 
-def compute_yagni_drift(
-    *,
-    task_id: str,
-    task_title: str,
-    description: str,
+@dataclass(frozen=True)
+class PathEvent:
+    # kind is "changed", "new_file", "new_dir", "speculative_abstraction" (with the keyword hit) or
+    # "bulk_dir" (with the collapsed untracked directory).
+    kind: str
+    path: str
+    hit: KeywordHit | None = None
+    bulk: UntrackedDir | None = None
+
+
+def classify_changes(
+    changes: WorkingChanges,
     spec: YagnidriftSpec,
-    git_root: str | None,
-    changes: WorkingChanges | None,
-) -> dict[str, Any]:
-    findings: list[Finding] = []
+    tracked_dirs: frozenset[str] | None = None,
+    content_clean: frozenset[str] = frozenset(),
+) -> Iterator[PathEvent]:
+    # One walk of the change-set trie; nothing is retained per path except the set of new directories.
+    # Subtrees an ignore pattern covers whole are skipped without visiting their files.
+    # With `tracked_dirs` (directories in the base tree), every ancestor of a new file that is not
+    # tracked is a new directory; without it, only immediate parents are counted. Paths in
+    # `content_clean` were parsed and declare no abstraction, so their names are not held against them.
+    ignore = spec.ignore_matcher
+    trie = changes.trie
 
-    changed_files: list[str] = []
-    new_files: list[str] = []
-    if changes:
-        changed_files = [
-            p
-            for p in changes.changed_files
-            if not (p.startswith(".workgraph/") or p.startswith(".git/") or match_any(p, spec.ignore))
-        ]
-        new_files = [p for p in changes.new_files if p in changed_files]
+    def kept(paths: list[str]) -> Iterator[str]:
+        return (p for p in paths if not (p.split("/", 1)[0] in _ALWAYS_SKIPPED or ignore.match(p)))
 
-    new_dirs = sorted({str(PurePosixPath(p).parent) for p in new_files if str(PurePosixPath(p).parent) not in {"", "."}})
+    for p in trie.paths(CHANGED, ignore=ignore, skip_top=_ALWAYS_SKIPPED):
+        yield PathEvent("changed", p)
 
-    telemetry: dict[str, Any] = {
-        "files_changed": len(changed_files),
-        "new_files": len(new_files),
-        "new_dirs": len(new_dirs),
-    }
+    allow = spec.allow_matcher
+    scanner = spec.keyword_scanner if spec.enforce_no_speculative_abstractions else None
+    seen_dirs: set[str] = set()
+
+    def new_dirs(parent: str) -> Iterator[PathEvent]:
+        if tracked_dirs is None:
+            if parent and parent not in seen_dirs:
+                seen_dirs.add(parent)
+                yield PathEvent("new_dir", parent)
+        else:
+            # Deepest first; stop at the first ancestor that is tracked or already counted.
+            while parent and parent not in tracked_dirs and parent not in seen_dirs:
+                seen_dirs.add(parent)
+                yield PathEvent("new_dir", parent)
+                parent = posixpath.dirname(parent)
+
+    for p in trie.paths(NEW, ignore=ignore, skip_top=_ALWAYS_SKIPPED):
+        yield PathEvent("new_file", p)
+        yield from new_dirs(posixpath.dirname(p))
+        if scanner is not None and p not in content_clean and not allow.match(p):
+            hit = scanner.find(p)
+            if hit is not None:
+                yield PathEvent("speculative_abstraction", p, hit)
+
+    # A collapsed directory is ignored (or allowed) when every sampled path in it is.
+    for d in changes.bulk_dirs:
+        examples = list(d.examples) or [f"{d.path}/"]
+        if not any(kept(examples)):
+            continue
+        yield from new_dirs(d.path)
+        if not all(allow.match(p) for p in examples):
+            yield PathEvent("bulk_dir", d.path, bulk=d)
+
+
+class _Tally:
+    # Counts every classified path but keeps only the samples that go into report details.
+    def __init__(self) -> None:
+        self.files_changed = 0
+        self.new_files: list[str] = []
+        self.new_file_count = 0
+        self.new_dirs: list[str] = []
+        self.speculative_files: list[str] = []
+        self.keyword_matches: list[dict[str, Any]] = []
+        self.speculative_count = 0
+        self.keyword_hits: Counter[str] = Counter()
+        self.content: ContentAnalysis | None = None
+        # Per-path line counts when the spec sets a line budget; totals only count kept paths.
+        self.line_counts: dict[str, LineCount] | None = None
+        self.added_loc = 0
+        self.deleted_loc = 0
+        self.new_loc = 0
+        self.binary_files = 0
+        self._largest: list[tuple[int, str]] = []
+        self.bulk_dirs: list[UntrackedDir] = []
+        # The classified change set, for per-directory rollups once a finding needs them.
+        self.trie: PathTrie | None = None
+
+    def add(self, event: PathEvent) -> None:
+        if event.kind == "changed":
+            self.files_changed += 1
+            if self.line_counts is not None:
+                counts = self.line_counts.get(event.path)
+                if counts is not None:
+                    if counts.added is None:
+                        self.binary_files += 1
+                    else:
+                        self.added_loc += counts.added
+                        self.deleted_loc += counts.deleted or 0
+        elif event.kind == "new_file":
+            self.new_file_count += 1
+            if len(self.new_files) < 60:
+                self.new_files.append(event.path)
+            if self.line_counts is not None:
+                counts = self.line_counts.get(event.path)
+                if counts is not None and counts.added is not None:
+                    self.new_loc += counts.added
+                    item = (counts.added, event.path)
+                    if len(self._largest) < 20:
+                        heapq.heappush(self._largest, item)
+                    else:
+                        heapq.heappushpop(self._largest, item)
+        elif event.kind == "new_dir":
+            self.new_dirs.append(event.path)
+        elif event.kind == "bulk_dir":
+            if event.bulk is not None:
+                self.bulk_dirs.append(event.bulk)
+        elif event.kind == "speculative_abstraction":
+            self.speculative_count += 1
+            if event.hit is not None:
+                self.keyword_hits[event.hit.keyword] += 1
+            if len(self.speculative_files) < 50 and event.hit is not None:
+                self.speculative_files.append(event.path)
+                self.keyword_matches.append(_match_record(event))
+
+    def largest_new_files(self) -> list[dict[str, Any]]:
+        return [{"path": p, "lines": n} for n, p in sorted(self._largest, key=lambda x: (-x[0], x[1]))]
+
+    def loc_telemetry(self) -> dict[str, int]:
+        return {
+            "added": self.added_loc,
+            "deleted": self.deleted_loc,
+            "new": self.new_loc,
+            "binary_files": self.binary_files,
+        }
+
+
+def _match_record(event: PathEvent) -> dict[str, Any]:
+    assert event.hit is not None
+    return {"path": event.path, "keyword": event.hit.keyword, "segment": event.hit.segment, "offset": event.hit.offset}
+
+
+def _findings(spec: YagnidriftSpec, tally: _Tally) -> list[Finding]:
+    findings: list[Finding] = []
+    new_dirs = sorted(tally.new_dirs)
 
     if spec.schema != 1:
         findings.append(
@@ -76,13 +186,18 @@ def compute_yagni_drift(
             )
         )
 
-    if len(new_files) > spec.max_new_files:
+    if tally.new_file_count > spec.max_new_files:
+        details: dict[str, Any] = {"new_files": tally.new_files[:60]}
+        if tally.trie is not None:
+            # Where the files landed: the directories they fan out from, largest first.
+            rollup = tally.trie.new_file_rollup(ignore=spec.ignore_matcher, skip_top=_ALWAYS_SKIPPED)
+            details["hotspots"] = hotspots(rollup)
         findings.append(
             Finding(
                 kind="too_many_new_files",
                 severity="warn",
-                summary=f"Task adds many new files ({len(new_files)} > {spec.max_new_files})",
-                details={"new_files": new_files[:60]},
+                summary=f"Task adds many new files ({tally.new_file_count} > {spec.max_new_files})",
+                details=details,
             )
         )
 
@@ -96,24 +211,164 @@ def compute_yagni_drift(
             )
         )
 
-    speculative_files: list[str] = []
-    if spec.enforce_no_speculative_abstractions:
-        for p in new_files:
-            if _is_allowed(p, spec.allow_paths):
-                continue
-            if _is_speculative(p, spec.abstraction_keywords):
-                speculative_files.append(p)
+    if tally.bulk_dirs:
+        dirs = sorted(tally.bulk_dirs)
+        total = sum(d.files for d in dirs)
+        plus = "+" if any(d.truncated for d in dirs) else ""
+        findings.append(
+            Finding(
+                kind="bulk_new_directory",
+                severity="warn",
+                summary=f"Task adds untracked directories too large to list ({len(dirs)}, {total}{plus} files)",
+                details={
+                    "dirs": [
+                        {"path": d.path, "files": d.files, "truncated": d.truncated, "examples": list(d.examples)}
+                        for d in dirs[:30]
+                    ]
+                },
+            )
+        )
 
-    if speculative_files:
+    if spec.max_new_loc is not None and tally.line_counts is not None and tally.new_loc > spec.max_new_loc:
+        findings.append(
+            Finding(
+                kind="too_many_new_loc",
+                severity="warn",
+                summary=f"Task adds many lines in new files ({tally.new_loc} > {spec.max_new_loc})",
+                details={"largest_new_files": tally.largest_new_files()},
+            )
+        )
+
+    if spec.max_added_loc is not None and tally.line_counts is not None and tally.added_loc > spec.max_added_loc:
+        findings.append(
+            Finding(
+                kind="too_many_added_loc",
+                severity="warn",
+                summary=f"Task adds many lines overall ({tally.added_loc} > {spec.max_added_loc})",
+                details={"added": tally.added_loc, "deleted": tally.deleted_loc},
+            )
+        )
+
+    if tally.speculative_count:
         findings.append(
             Finding(
                 kind="speculative_abstraction",
                 severity="warn",
                 summary="Task appears to add speculative abstraction layers not required by current scope",
-                details={"files": speculative_files[:50]},
+                details={"files": tally.speculative_files[:50], "matches": tally.keyword_matches[:50]},
             )
         )
 
+    if tally.content is not None:
+        issues = tally.content.issues()
+        for kind, summary in _CONTENT_FINDINGS.items():
+            items = [i for i in issues if i["kind"] == kind]
+            if items:
+                findings.append(
+                    Finding(
+                        kind=kind,
+                        severity="warn",
+                        summary=summary.format(n=len(items)),
+                        details={"items": items[:50]},
+                    )
+                )
+    return findings
+
+
+_CONTENT_FINDINGS = {
+    "single_implementation_abstraction": "New abstract base classes with at most one implementation ({n})",
+    "single_implementation_protocol": "New Protocols with at most one implementer ({n})",
+    "factory_or_registry": "New factory or registry indirection ({n})",
+}
+
+
+def compute_yagni_drift(
+    *,
+    task_id: str,
+    task_title: str,
+    description: str,
+    spec: YagnidriftSpec,
+    git_root: str | None,
+    changes: WorkingChanges | None,
+    tracked_dirs: frozenset[str] | None = None,
+    content: ContentAnalysis | None = None,
+    line_counts: dict[str, LineCount] | None = None,
+) -> dict[str, Any]:
+    tally = _Tally()
+    tally.content = content
+    tally.line_counts = line_counts
+    if changes:
+        tally.trie = changes.trie
+        for event in classify_changes(changes, spec, tracked_dirs, content.clean() if content else frozenset()):
+            tally.add(event)
+    return _build_report(task_id=task_id, task_title=task_title, spec=spec, git_root=git_root, tally=tally)
+
+
+def stream_yagni_drift(
+    *,
+    task_id: str,
+    task_title: str,
+    description: str,
+    spec: YagnidriftSpec,
+    git_root: str | None,
+    changes: WorkingChanges | None,
+    tracked_dirs: frozenset[str] | None = None,
+    content: ContentAnalysis | None = None,
+    line_counts: dict[str, LineCount] | None = None,
+) -> Iterator[dict[str, Any]]:
+    # NDJSON form of compute_yagni_drift: every new file, new directory and speculative path as it is
+    # classified (untruncated), then one record per finding, then {"type": "report"} with the same
+    # report compute_yagni_drift returns.
+    tally = _Tally()
+    tally.content = content
+    tally.line_counts = line_counts
+    if changes:
+        tally.trie = changes.trie
+        for event in classify_changes(changes, spec, tracked_dirs, content.clean() if content else frozenset()):
+            tally.add(event)
+            if event.kind == "changed":
+                continue
+            if event.bulk is not None:
+                b = event.bulk
+                yield {
+                    "type": "path",
+                    "task_id": task_id,
+                    "kind": event.kind,
+                    "path": b.path,
+                    "files": b.files,
+                    "truncated": b.truncated,
+                    "examples": list(b.examples),
+                }
+            elif event.hit is not None:
+                yield {"type": "path", "task_id": task_id, "kind": event.kind, **_match_record(event)}
+            else:
+                yield {"type": "path", "task_id": task_id, "kind": event.kind, "path": event.path}
+
+    report = _build_report(task_id=task_id, task_title=task_title, spec=spec, git_root=git_root, tally=tally)
+    for f in report["findings"]:
+        yield {"type": "finding", "task_id": task_id, "kind": f["kind"], "severity": f["severity"], "summary": f["summary"]}
+    yield {"type": "report", "report": report}
+
+
+def _build_report(
+    *, task_id: str, task_title: str, spec: YagnidriftSpec, git_root: str | None, tally: _Tally
+) -> dict[str, Any]:
+    findings = _findings(spec, tally)
+    telemetry: dict[str, Any] = {
+        "files_changed": tally.files_changed,
+        "new_files": tally.new_file_count,
+        "new_dirs": len(tally.new_dirs),
+    }
+    if tally.bulk_dirs:
+        telemetry["bulk_dirs"] = len(tally.bulk_dirs)
+        telemetry["bulk_files"] = sum(d.files for d in tally.bulk_dirs)
+    if tally.content is not None:
+        telemetry["content"] = tally.content.telemetry()
+    if tally.line_counts is not None:
+        telemetry["loc"] = tally.loc_telemetry()
+    if tally.keyword_hits:
+        telemetry["keyword_hits"] = dict(sorted(tally.keyword_hits.items()))
+
     score = "green"
     if any(f.severity == "warn" for f in findings):
         score = "yellow"
@@ -138,6 +393,22 @@ def compute_yagni_drift(
                     "rationale": "Premature structure multiplies maintenance cost and decision surface.",
                 }
             )
+        elif f.kind == "bulk_new_directory":
+            recommendations.append(
+                {
+                    "priority": "high",
+                    "action": "Remove generated or vendored directories from the worktree, or add them to .gitignore",
+                    "rationale": "Dependencies, build output and copied SDKs are not work the task should be carrying.",
+                }
+            )
+        elif f.kind in ("too_many_new_loc", "too_many_added_loc"):
+            recommendations.append(
+                {
+                    "priority": "high",
+                    "action": "Cut the change down to what current acceptance needs, or split it into smaller tasks",
+                    "rationale": "A few very large files are as much overbuilding as many small ones.",
+                }
+            )
         elif f.kind == "speculative_abstraction":
             recommendations.append(
                 {
@@ -146,6 +417,22 @@ def compute_yagni_drift(
                     "rationale": "YAGNI: abstractions should follow repeated pressure, not precede it.",
                 }
             )
+        elif f.kind in ("single_implementation_abstraction", "single_implementation_protocol"):
+            recommendations.append(
+                {
+                    "priority": "high",
+                    "action": "Use the concrete class directly until a second implementation exists",
+                    "rationale": "An interface with one implementation adds indirection without buying substitutability.",
+                }
+            )
+        elif f.kind == "factory_or_registry":
+            recommendations.append(
+                {
+                    "priority": "medium",
+                    "action": "Construct objects directly instead of through a factory or registry",
+                    "rationale": "Dispatch tables pay off once there are several variants chosen at runtime, not before.",
+                }
+            )
         elif f.kind == "unsupported_schema":
             recommendations.append(
                 {
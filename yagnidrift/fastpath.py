@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from yagnidrift.workgraph import find_graph_task
+
+# Startup path for `wg check` on a task without a yagnidrift block, which is most tasks. It reads the
+# one task from graph.jsonl and tests its description for the fence, so no git, SDK, TOML or check
+# engine module is imported. Anything it cannot answer (a block, an unknown task, no graph) is left to
+# the full path.
+
+# Must equal specs._FENCE_MARK; kept literal so this module does not import specs.
+FENCE_MARK = "```yagnidrift"
+
+
+def no_block_report(*, task_id: str, title: str) -> dict[str, Any]:
+    return {
+        "task_id": task_id,
+        "task_title": title,
+        "git_root": None,
+        "score": "green",
+        "spec": None,
+        "telemetry": {"note": "no yagnidrift block"},
+        "findings": [],
+        "recommendations": [],
+    }
+
+
+def find_no_block_task(wg_dir: Path, task_id: str) -> dict[str, Any] | None:
+    # The no-block report for `task_id`, or None when the full check has to decide.
+    task = find_graph_task(wg_dir, task_id)
+    if task is None or FENCE_MARK in str(task.get("description") or ""):
+        return None
+    return no_block_report(task_id=task_id, title=str(task.get("title") or task_id))
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from collections.abc import Collection
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from yagnidrift.contracts import format_default_contract_block
+
+if TYPE_CHECKING:
+    from yagnidrift.workgraph import Workgraph
+
+FOLLOWUP_PREFIX = "drift-yagni-"
+# At most this many open yagnidrift follow-ups per repo (see README, Key Rules).
+LANE_CAP = 3
+
+
+def log_message(report: dict) -> str:
+    findings = report.get("findings") or []
+    score = report.get("score", "unknown")
+    recs = report.get("recommendations") or []
+
+    if not findings:
+        return "Yagnidrift: OK (no findings)"
+    kinds = ", ".join(sorted({str(f.get("kind")) for f in findings}))
+    msg = f"Yagnidrift: {score} ({kinds})"
+    if recs:
+        next_action = str(recs[0].get("action") or "").strip()
+        if next_action:
+            msg += f" | next: {next_action}"
+    return msg
+
+
+def followup_task(report: dict) -> dict[str, Any] | None:
+    # Keyword arguments for Workgraph.ensure_task, or None when the report has no findings.
+    task_id = str(report["task_id"])
+    task_title = str(report.get("task_title") or task_id)
+    findings = report.get("findings") or []
+    if not findings:
+        return None
+
+    title = f"yagni: {task_title}"
+    recs = report.get("recommendations") or []
+    action_lines = "\n".join([f"- {str(r.get('action') or '').strip()}" for r in recs if str(r.get("action") or "").strip()])
+    if not action_lines:
+        action_lines = "- Reduce speculative complexity and keep only what current acceptance needs."
+
+    desc = (
+        "Reduce speculative complexity for this task.\n\n"
+        "Context:\n"
+        f"- Origin task: {task_id}\n"
+        f"- Findings: {', '.join(sorted({str(f.get('kind')) for f in findings}))}\n\n"
+        "Recommended actions:\n"
+        f"{action_lines}\n\n"
+        + format_default_contract_block(mode="core", objective=title, touch=[])
+        + "\n"
+        + (report.get("_yagnidrift_block") or "").strip()
+        + "\n"
+    )
+    return {
+        "task_id": f"{FOLLOWUP_PREFIX}{task_id}",
+        "title": title,
+        "description": desc,
+        "blocked_by": [task_id],
+        "tags": ["drift", "yagni"],
+    }
+
+
+@dataclass
+class FollowupPlan:
+    logs: list[tuple[str, str]] = field(default_factory=list)
+    create: list[dict[str, Any]] = field(default_factory=list)
+    # {"task_id": <follow-up id>, "reason": "exists" | "lane_cap"}
+    skipped: list[dict[str, str]] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "logged": len(self.logs),
+            "created": [t["task_id"] for t in self.create],
+            "skipped": self.skipped,
+        }
+
+
+class FollowupPlanner:
+    # Collects the log lines and follow-up tasks of a whole run, so the graph is read once to dedupe
+    # against existing follow-ups and the lane cap applies across the run rather than per task.
+    def __init__(self, *, closed_statuses: Collection[str], cap: int = LANE_CAP) -> None:
+        self.closed_statuses = closed_statuses
+        self.cap = cap
+        self._logs: list[tuple[str, str]] = []
+        self._followups: list[dict[str, Any]] = []
+
+    def __bool__(self) -> bool:
+        return bool(self._logs or self._followups)
+
+    def add(self, report: dict, *, write_log: bool, create_followups: bool) -> None:
+        if write_log:
+            self._logs.append((str(report["task_id"]), log_message(report)))
+        # Invalid specs only get a log line; follow-ups need a parsed spec to carry forward.
+        if create_followups and report.get("spec") is not None:
+            task = followup_task(report)
+            if task is not None:
+                self._followups.append(task)
+
+    def plan(self, existing: dict[str, dict[str, Any]] | None) -> FollowupPlan:
+        # `existing` is the task graph (None when unreadable: nothing is known to exist).
+        existing = existing or {}
+        open_followups = sum(
+            1
+            for task_id, task in existing.items()
+            if task_id.startswith(FOLLOWUP_PREFIX) and str(task.get("status") or "") not in self.closed_statuses
+        )
+        room = max(0, self.cap - open_followups)
+        plan = FollowupPlan(logs=list(self._logs))
+        seen: set[str] = set()
+        for task in self._followups:
+            follow_id = task["task_id"]
+            if follow_id in seen or follow_id in existing:
+                plan.skipped.append({"task_id": follow_id, "reason": "exists"})
+            elif room <= 0:
+                plan.skipped.append({"task_id": follow_id, "reason": "lane_cap"})
+            else:
+                plan.create.append(task)
+                room -= 1
+            seen.add(follow_id)
+        self._logs, self._followups = [], []
+        return plan
+
+
+def commit_plan(wg: "Workgraph", plan: FollowupPlan) -> None:
+    # The workgraph SDK has no multi-task write, so the plan is applied call by call, after every
+    # task has been evaluated and with nothing left to decide.
+    for task_id, msg in plan.logs:
+        wg.wg_log(task_id, msg)
+    for task in plan.create:
+        wg.ensure_task(**task)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from yagnidrift.git_tools import WorkingChanges, parse_name_status
+from yagnidrift.timing import git_span
+
+# asyncio counterpart of the git layer in git_tools. Independent queries run concurrently, each git
+# child is killed when its call times out or the awaiting task is cancelled, and failures are
+# recorded in GitTelemetry rather than swallowed.
+
+_STDERR_LIMIT = 500
+
+
+@dataclass(frozen=True)
+class GitError:
+    # kind is "exit" (nonzero status), "timeout", "cancelled" or "spawn" (git could not be started).
+    args: tuple[str, ...]
+    kind: str
+    returncode: int | None = None
+    stderr: str = ""
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"args": list(self.args), "kind": self.kind, "returncode": self.returncode, "stderr": self.stderr}
+
+
+@dataclass
+class GitTelemetry:
+    calls: int = 0
+    elapsed_s: float = 0.0
+    errors: list[GitError] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "elapsed_s": round(self.elapsed_s, 4),
+            "errors": [e.to_dict() for e in self.errors],
+        }
+
+
+async def _kill(proc: asyncio.subprocess.Process) -> None:
+    # git runs in its own session, so helpers it spawned (hooks, aliases, fsmonitor) die with it
+    # instead of holding the output pipes open.
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    await proc.wait()
+
+
+async def run_git(
+    args: list[str], *, cwd: str, timeout: float | None = None, telemetry: GitTelemetry | None = None
+) -> bytes | None:
+    # Returns stdout, or None after recording the failure in `telemetry`. Cancellation is re-raised
+    # once the child has been reaped.
+    with git_span(args):
+        return await _run_git(args, cwd=cwd, timeout=timeout, telemetry=telemetry)
+
+
+async def _run_git(
+    args: list[str], *, cwd: str, timeout: float | None, telemetry: GitTelemetry | None
+) -> bytes | None:
+    tel = telemetry if telemetry is not None else GitTelemetry()
+    tel.calls += 1
+    started = time.perf_counter()
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "git",
+            "--no-optional-locks",
+            "-C",
+            cwd,
+            *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+        )
+    except OSError as e:
+        tel.errors.append(GitError(tuple(args), "spawn", stderr=str(e)))
+        tel.elapsed_s += time.perf_counter() - started
+        return None
+
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        await _kill(proc)
+        tel.errors.append(GitError(tuple(args), "timeout", stderr=f"no result after {timeout}s"))
+        return None
+    except asyncio.CancelledError:
+        await asyncio.shield(_kill(proc))
+        tel.errors.append(GitError(tuple(args), "cancelled"))
+        raise
+    finally:
+        tel.elapsed_s += time.perf_counter() - started
+
+    if proc.returncode != 0:
+        msg = stderr.decode("utf-8", "replace").strip()[:_STDERR_LIMIT]
+        tel.errors.append(GitError(tuple(args), "exit", proc.returncode, msg))
+        return None
+    return stdout
+
+
+async def get_git_root_async(
+    project_dir: Path, *, timeout: float | None = None, telemetry: GitTelemetry | None = None
+) -> str | None:
+    out = await run_git(["rev-parse", "--show-toplevel"], cwd=str(project_dir), timeout=timeout, telemetry=telemetry)
+    if out is None:
+        return None
+    return os.fsdecode(out.strip()) or None
+
+
+def _parse_name_status(out: bytes, changed: set[str], new: set[str]) -> None:
+    for entry in parse_name_status(out.split(b"\0")):
+        changed.add(entry.path)
+        if entry.added:
+            new.add(entry.path)
+
+
+async def get_working_changes_async(
+    git_root: str, *, timeout: float | None = None, telemetry: GitTelemetry | None = None
+) -> WorkingChanges:
+    # Same answer as get_working_changes, from three concurrent queries. `timeout` bounds each
+    # query; if any of them fails the result is empty and the failure is in `telemetry`.
+    tel = telemetry if telemetry is not None else GitTelemetry()
+    staged, unstaged, untracked = await asyncio.gather(
+        run_git(["diff", "--cached", "--name-status", "-z"], cwd=git_root, timeout=timeout, telemetry=tel),
+        run_git(["diff", "--name-status", "-z"], cwd=git_root, timeout=timeout, telemetry=tel),
+        run_git(
+            ["ls-files", "--others", "--exclude-standard", "-z"], cwd=git_root, timeout=timeout, telemetry=tel
+        ),
+    )
+    if staged is None or unstaged is None or untracked is None:
+        return WorkingChanges(changed_files=[], new_files=[])
+
+    changed: set[str] = set()
+    new: set[str] = set()
+    _parse_name_status(staged, changed, new)
+    _parse_name_status(unstaged, changed, new)
+    for rec in untracked.split(b"\0"):
+        if rec:
+            path = os.fsdecode(rec)
+            changed.add(path)
+            new.add(path)
+    return WorkingChanges(changed_files=sorted(changed), new_files=sorted(new))
@@ -1,48 +1,486 @@
 from __future__ import annotations
 
+import itertools
+import os
+import re
 import subprocess
-from dataclasses import dataclass
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from functools import cached_property
 from pathlib import Path
+from typing import NamedTuple
+
+from yagnidrift.pathtrie import PathTrie
+from yagnidrift.timing import git_span
 
 
 def get_git_root(project_dir: Path) -> str | None:
     try:
-        out = subprocess.check_output(
-            ["git", "-C", str(project_dir), "rev-parse", "--show-toplevel"],
-            stderr=subprocess.DEVNULL,
-            text=True,
-        ).strip()
+        with git_span(["rev-parse", "--show-toplevel"]):
+            out = subprocess.check_output(
+                ["git", "-C", str(project_dir), "rev-parse", "--show-toplevel"],
+                stderr=subprocess.DEVNULL,
+                text=True,
+            ).strip()
         return out or None
     except Exception:
         return None
 
 
+def find_worktree_root(project_dir: Path) -> Path | None:
+    # Same answer as `git rev-parse --show-toplevel` for ordinary checkouts, without a subprocess.
+    try:
+        start = project_dir.resolve()
+    except OSError:
+        return None
+    for candidate in (start, *start.parents):
+        if (candidate / ".git").exists():
+            return candidate
+    return None
+
+
+def find_git_dir(worktree: Path) -> Path | None:
+    dot_git = worktree / ".git"
+    if dot_git.is_dir():
+        return dot_git
+    try:
+        text = dot_git.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    if not text.startswith("gitdir:"):
+        return None
+    git_dir = Path(text[len("gitdir:") :].strip())
+    return git_dir if git_dir.is_absolute() else (worktree / git_dir).resolve()
+
+
+def common_dir(git_dir: Path) -> Path:
+    try:
+        rel = (git_dir / "commondir").read_text(encoding="utf-8").strip()
+    except OSError:
+        return git_dir
+    common = Path(rel)
+    return common if common.is_absolute() else (git_dir / common).resolve()
+
+
+def read_ref(git_dir: Path, ref: str) -> str | None:
+    for base in (git_dir, common_dir(git_dir)):
+        try:
+            value = (base / ref).read_text(encoding="utf-8").strip()
+        except OSError:
+            continue
+        if value.startswith("ref:"):
+            return read_ref(git_dir, value[len("ref:") :].strip())
+        return value or None
+    try:
+        packed = (common_dir(git_dir) / "packed-refs").read_text(encoding="utf-8")
+    except OSError:
+        return None
+    for line in packed.splitlines():
+        if line.startswith(("#", "^")):
+            continue
+        oid, _, name = line.partition(" ")
+        if name.strip() == ref:
+            return oid
+    return None
+
+
+def read_head_oid(git_dir: Path) -> str | None:
+    try:
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    if head.startswith("ref:"):
+        ref = head[len("ref:") :].strip()
+        return read_ref(git_dir, ref) or f"unborn:{ref}"
+    return head or None
+
+
+def read_index_checksum(git_dir: Path) -> str | None:
+    # The index ends with a hash of its own contents (20 bytes for SHA-1, 32 for SHA-256 repos).
+    try:
+        with open(git_dir / "index", "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - 32))
+            return f.read().hex()
+    except FileNotFoundError:
+        return "none"
+    except OSError:
+        return None
+
+
+_OID_RE = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+
+
+def resolve_ref_oid(git_dir: Path, ref: str) -> str | None:
+    # Resolves full oids, HEAD and branch/remote/tag names from files; anything fancier (`main~2`,
+    # abbreviated oids) returns None and is left to git.
+    if _OID_RE.fullmatch(ref):
+        return ref
+    if ref == "HEAD":
+        oid = read_head_oid(git_dir)
+        return None if oid is None or oid.startswith("unborn:") else oid
+    for candidate in (ref, f"refs/heads/{ref}", f"refs/remotes/{ref}", f"refs/tags/{ref}"):
+        if candidate.startswith("refs/"):
+            oid = read_ref(git_dir, candidate)
+            if oid:
+                return oid
+    return None
+
+
+class UntrackedDir(NamedTuple):
+    # An untracked directory reported as one unit (collapse mode): `files` counts its un-ignored
+    # contents up to the cap (`truncated`: there were more); `examples` are the first few paths git listed.
+    path: str
+    files: int
+    truncated: bool
+    examples: tuple[str, ...]
+
+
 @dataclass(frozen=True)
 class WorkingChanges:
     changed_files: list[str]
     new_files: list[str]
+    # Untracked directories too large to list file by file (only collected with collapse_untracked).
+    bulk_dirs: list[UntrackedDir] = field(default_factory=list)
+
+    @cached_property
+    def trie(self) -> PathTrie:
+        # Built on first use and shared by every task classified against these changes.
+        return PathTrie.from_changes(self.changed_files, self.new_files)
 
 
 def _git_lines(args: list[str], *, cwd: str) -> list[str]:
     try:
-        out = subprocess.check_output(["git", "-C", cwd, *args], text=True, stderr=subprocess.DEVNULL)
+        with git_span(args):
+            out = subprocess.check_output(["git", "-C", cwd, *args], text=True, stderr=subprocess.DEVNULL)
     except Exception:
         return []
     return [l for l in out.splitlines() if l.strip()]
 
 
-def get_working_changes(git_root: str) -> WorkingChanges:
-    unstaged = set(_git_lines(["diff", "--name-only"], cwd=git_root))
-    staged = set(_git_lines(["diff", "--name-only", "--cached"], cwd=git_root))
-    untracked = set(_git_lines(["ls-files", "--others", "--exclude-standard"], cwd=git_root))
+def _git_records(args: list[str], *, cwd: str, chunk_size: int = 1 << 16) -> Iterator[bytes]:
+    # Streams NUL-terminated records from `git ... -z` without buffering the whole output.
+    with git_span(args):
+        proc = subprocess.Popen(
+            ["git", "--no-optional-locks", "-C", cwd, *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        assert proc.stdout is not None
+        finished = False
+        try:
+            tail = b""
+            while True:
+                chunk = proc.stdout.read(chunk_size)
+                if not chunk:
+                    break
+                records = (tail + chunk).split(b"\0")
+                tail = records.pop()
+                yield from records
+            if tail:
+                yield tail
+            finished = True
+        finally:
+            proc.stdout.close()
+            if not finished:
+                # The caller stopped reading (or failed) early; git's exit status no longer matters.
+                proc.kill()
+                proc.wait()
+            elif proc.wait() != 0:
+                raise subprocess.CalledProcessError(proc.returncode, args)
+
+
+class StatusEntry(NamedTuple):
+    # kind is "1" (ordinary), "2" (rename/copy), "u" (unmerged), "?" (untracked) or "!" (ignored).
+    kind: str
+    path: str
+    added: bool
+    orig_path: str | None = None
+
+
+def parse_porcelain_v2(records: Iterable[bytes]) -> Iterator[StatusEntry]:
+    it = iter(records)
+    for rec in it:
+        if not rec:
+            continue
+        kind = rec[:1]
+        if kind == b"1":
+            fields = rec.split(b" ", 8)
+            xy = fields[1]
+            yield StatusEntry("1", os.fsdecode(fields[8]), b"A" in xy)
+        elif kind == b"2":
+            fields = rec.split(b" ", 9)
+            # The original path follows as its own NUL-terminated record.
+            orig = next(it, None)
+            xy = fields[1]
+            yield StatusEntry("2", os.fsdecode(fields[9]), xy[:1] == b"C", os.fsdecode(orig) if orig else None)
+        elif kind == b"u":
+            fields = rec.split(b" ", 10)
+            yield StatusEntry("u", os.fsdecode(fields[10]), False)
+        elif kind in (b"?", b"!"):
+            yield StatusEntry(kind.decode(), os.fsdecode(rec[2:]), kind == b"?")
+
+
+def parse_name_status(records: Iterable[bytes]) -> Iterator[StatusEntry]:
+    # `git diff --name-status -z` records: STATUS\0PATH\0, or STATUS\0SRC\0DST\0 for renames and
+    # copies. kind is the status letter; renames are not additions, copies are (as in porcelain v2).
+    it = iter(records)
+    for rec in it:
+        if not rec:
+            continue
+        kind = rec[:1]
+        if kind in (b"R", b"C"):
+            orig = next(it, b"")
+            path = next(it, b"")
+            yield StatusEntry(kind.decode(), os.fsdecode(path), kind == b"C", os.fsdecode(orig))
+        else:
+            path = next(it, b"")
+            yield StatusEntry(kind.decode(), os.fsdecode(path), kind == b"A")
 
-    changed = sorted(unstaged | staged | untracked)
 
-    tracked_new = set(
-        p
-        for p in _git_lines(["diff", "--name-only", "--diff-filter=A"], cwd=git_root)
-        + _git_lines(["diff", "--name-only", "--cached", "--diff-filter=A"], cwd=git_root)
+def iter_status(
+    git_root: str, *, pathspecs: list[str] | None = None, untracked: str = "all"
+) -> Iterator[StatusEntry]:
+    # With untracked="normal", a directory holding only untracked files is one "?" entry ending in "/".
+    args = ["status", "--porcelain=v2", "-z", f"--untracked-files={untracked}"]
+    if pathspecs:
+        args += ["--", *pathspecs]
+    return parse_porcelain_v2(_git_records(args, cwd=git_root))
+
+
+# Collapse mode lists an untracked directory file by file when it holds at most EXPAND_UNTRACKED files;
+# a larger one is counted up to UNTRACKED_COUNT_CAP and kept as a single UntrackedDir.
+EXPAND_UNTRACKED = 256
+UNTRACKED_COUNT_CAP = 100_000
+_BULK_EXAMPLES = 5
+
+
+def expand_untracked_dir(
+    git_root: str, path: str, *, expand: int = EXPAND_UNTRACKED, cap: int = UNTRACKED_COUNT_CAP
+) -> list[str] | UntrackedDir:
+    # The un-ignored files under `path` (a directory git reported as untracked), or an UntrackedDir
+    # when there are more than `expand`. At most `expand` paths are held, and git is stopped one record
+    # past `cap`, which tells a directory of exactly `cap` files from a truncated count.
+    files: list[str] = []
+    count = 0
+    truncated = False
+    records = _git_records(
+        ["ls-files", "--others", "--exclude-standard", "-z", "--", f":(literal){path}"], cwd=git_root
     )
-    new_files = sorted(tracked_new | untracked)
+    try:
+        for rec in records:
+            if not rec:
+                continue
+            count += 1
+            if count <= expand:
+                files.append(os.fsdecode(rec))
+            elif count > cap:
+                count, truncated = cap, True
+                break
+    finally:
+        records.close()
+    if count <= expand:
+        return files
+    return UntrackedDir(path.rstrip("/"), count, truncated, tuple(files[:_BULK_EXAMPLES]))
+
+
+def get_working_changes(
+    git_root: str,
+    *,
+    pathspecs: list[str] | None = None,
+    collapse_untracked: bool = False,
+    native: bool = False,
+    cache_dir: Path | None = None,
+) -> WorkingChanges:
+    # native=True reads .git/index directly (yagnidrift.gitindex) and runs git only for what that
+    # reader does not support; cache_dir keeps its config snapshot and HEAD listings between runs.
+    if native:
+        try:
+            from yagnidrift.gitindex import native_working_changes
+
+            return native_working_changes(
+                git_root, pathspecs=pathspecs, collapse_untracked=collapse_untracked, cache_dir=cache_dir
+            )
+        except Exception:
+            pass
+    changed: set[str] = set()
+    new: set[str] = set()
+    bulk: list[UntrackedDir] = []
+    try:
+        for entry in iter_status(git_root, pathspecs=pathspecs, untracked="normal" if collapse_untracked else "all"):
+            if entry.kind == "!":
+                continue
+            if entry.kind == "?" and entry.path.endswith("/"):
+                expanded = expand_untracked_dir(git_root, entry.path)
+                if isinstance(expanded, UntrackedDir):
+                    bulk.append(expanded)
+                else:
+                    changed.update(expanded)
+                    new.update(expanded)
+                continue
+            changed.add(entry.path)
+            if entry.added:
+                new.add(entry.path)
+    except Exception:
+        return WorkingChanges(changed_files=[], new_files=[])
+
+    return WorkingChanges(changed_files=sorted(changed), new_files=sorted(new), bulk_dirs=bulk)
+
+
+def get_staged_changes(git_root: str) -> WorkingChanges:
+    # What the next commit would record: the index against HEAD (every path, on an unborn branch),
+    # from one rename-detecting diff. Unstaged edits and untracked files are not looked at.
+    changed: set[str] = set()
+    new: set[str] = set()
+    try:
+        diff = _git_records(["diff", "--cached", "--name-status", "-z", "-M"], cwd=git_root)
+        for entry in parse_name_status(diff):
+            changed.add(entry.path)
+            if entry.added:
+                new.add(entry.path)
+    except Exception:
+        return WorkingChanges(changed_files=[], new_files=[])
+
+    return WorkingChanges(changed_files=sorted(changed), new_files=sorted(new))
+
+
+def get_staged_changes_with_counts(git_root: str) -> tuple[WorkingChanges, dict[str, LineCount]]:
+    # get_staged_changes plus staged line counts from the same diff: `--raw --numstat -z` prints every
+    # raw record (":MODE MODE OID OID STATUS\0PATH\0") before the numstat ones, so one index read serves both.
+    changed: set[str] = set()
+    new: set[str] = set()
+    counts: dict[str, LineCount] = {}
+    try:
+        it = iter(_git_records(["diff", "--cached", "--raw", "--numstat", "-z", "-M"], cwd=git_root))
+        for rec in it:
+            if not rec:
+                continue
+            if rec[:1] != b":":
+                counts.update(parse_numstat(itertools.chain((rec,), it)))
+                break
+            status = rec.rsplit(b" ", 1)[1][:1]
+            if status in (b"R", b"C"):
+                next(it, None)
+            path = os.fsdecode(next(it, b""))
+            changed.add(path)
+            if status in (b"A", b"C"):
+                new.add(path)
+    except Exception:
+        return WorkingChanges(changed_files=[], new_files=[]), {}
 
-    return WorkingChanges(changed_files=changed, new_files=new_files)
+    return WorkingChanges(changed_files=sorted(changed), new_files=sorted(new)), counts
+
+
+def merge_base(git_root: str, base: str) -> str | None:
+    lines = _git_lines(["merge-base", "HEAD", base], cwd=git_root)
+    return lines[0].strip() if lines else None
+
+
+def get_branch_changes(
+    git_root: str, base_commit: str, *, pathspecs: list[str] | None = None, collapse_untracked: bool = False
+) -> WorkingChanges:
+    # Everything that differs from `base_commit`: committed branch work, staged and unstaged edits
+    # (one rename-detecting diff of the commit against the worktree) plus untracked files.
+    changed: set[str] = set()
+    new: set[str] = set()
+    bulk: list[UntrackedDir] = []
+    limit = ["--", *pathspecs] if pathspecs else []
+    others = ["ls-files", "--others", "--exclude-standard", "-z"]
+    if collapse_untracked:
+        others.append("--directory")
+    try:
+        diff = _git_records(["diff", "--name-status", "-z", "-M", base_commit, *limit], cwd=git_root)
+        for entry in parse_name_status(diff):
+            changed.add(entry.path)
+            if entry.added:
+                new.add(entry.path)
+        for rec in _git_records([*others, *limit], cwd=git_root):
+            if not rec:
+                continue
+            path = os.fsdecode(rec)
+            if path.endswith("/"):
+                expanded = expand_untracked_dir(git_root, path)
+                if isinstance(expanded, UntrackedDir):
+                    bulk.append(expanded)
+                    continue
+            else:
+                expanded = [path]
+            changed.update(expanded)
+            new.update(expanded)
+    except Exception:
+        return WorkingChanges(changed_files=[], new_files=[])
+
+    return WorkingChanges(changed_files=sorted(changed), new_files=sorted(new), bulk_dirs=bulk)
+
+
+# Diffing against the empty tree makes every file an addition (used when HEAD is unborn).
+EMPTY_TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+# Files are sniffed like git does: a NUL in the first 8000 bytes means binary.
+_SNIFF_BYTES = 8000
+
+
+class LineCount(NamedTuple):
+    # None for binary files, which have no meaningful line count.
+    added: int | None
+    deleted: int | None
+
+
+def parse_numstat(records: Iterable[bytes]) -> Iterator[tuple[str, LineCount]]:
+    # `git diff --numstat -z` records: ADDED\tDELETED\tPATH\0, or ADDED\tDELETED\t\0SRC\0DST\0 for
+    # renames; binaries show "-" for both counts.
+    it = iter(records)
+    for rec in it:
+        if not rec:
+            continue
+        added, deleted, path = rec.split(b"\t", 2)
+        if not path:
+            next(it, None)
+            path = next(it, b"")
+        counts = LineCount(
+            None if added == b"-" else int(added),
+            None if deleted == b"-" else int(deleted),
+        )
+        yield os.fsdecode(path), counts
+
+
+def count_text_lines(path: str, *, max_bytes: int = 8 << 20) -> int | None:
+    # Streams the file; None for binaries (NUL sniffed, or larger than max_bytes) and unreadable paths.
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size > max_bytes:
+                return None
+            chunk = f.read(_SNIFF_BYTES)
+            if b"\0" in chunk:
+                return None
+            lines, last = 0, b""
+            while chunk:
+                lines += chunk.count(b"\n")
+                last = chunk[-1:]
+                chunk = f.read(1 << 16)
+    except OSError:
+        return None
+    return lines + (1 if last and last != b"\n" else 0)
+
+
+def get_line_counts(
+    git_root: str, commit: str, new_files: Iterable[str], *, pathspecs: list[str] | None = None
+) -> dict[str, LineCount]:
+    # Added/deleted lines per path between `commit` and the worktree from one `git diff --numstat`;
+    # new files the diff does not cover (untracked ones) are counted by reading them.
+    if commit == "HEAD":
+        git_dir = find_git_dir(Path(git_root))
+        head = read_head_oid(git_dir) if git_dir is not None else None
+        if head is not None and head.startswith("unborn:"):
+            commit = EMPTY_TREE
+    counts: dict[str, LineCount] = {}
+    try:
+        args = ["diff", "--numstat", "-z", "-M", commit, *(["--", *pathspecs] if pathspecs else [])]
+        counts.update(parse_numstat(_git_records(args, cwd=git_root)))
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return {}
+    for path in new_files:
+        if path not in counts:
+            n = count_text_lines(os.path.join(git_root, path))
+            counts[path] = LineCount(n, None if n is None else 0)
+    return counts
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from yagnidrift.globmatch import _ANY_SEGMENTS, _translate_segment
+
+# .gitignore / info/exclude patterns, compiled to one regex per file. Paths are matched in the
+# "/seg/seg" form globmatch uses, relative to the directory holding the file. Each pattern is one
+# capturing alternative, listed last rule first, so the group that matched is the rule git would
+# apply ("the last matching pattern decides"). Syntax this does not model (backslash escapes,
+# `[^...]`, `[:class:]`) raises ValueError so callers can defer to git.
+
+# Trailing `/**` matches everything inside the directory, but not the directory itself.
+_SOME_SEGMENTS = r"(?:/[^/]+)+"
+
+
+def _translate(pattern: str, anchored: bool) -> str:
+    if not anchored:
+        # No slash: the name may appear at any depth below the ignore file.
+        return _ANY_SEGMENTS + "/" + _translate_segment(pattern)
+    parts = [p for p in pattern.split("/") if p]
+    pieces: list[str] = []
+    for i, part in enumerate(parts):
+        if part == "**":
+            piece = _SOME_SEGMENTS if i == len(parts) - 1 else _ANY_SEGMENTS
+            if not pieces or pieces[-1] != piece:
+                pieces.append(piece)
+        else:
+            pieces.append("/" + _translate_segment(part))
+    return "".join(pieces)
+
+
+def parse_pattern(line: str) -> tuple[str, bool, bool] | None:
+    # (regex, negated, directories only) for one line, or None for blanks and comments.
+    line = line.rstrip("\r")
+    if not line or line.startswith("#"):
+        return None
+    escaped = line.startswith(("\\#", "\\!"))
+    if escaped:
+        line = line[1:]
+    if "\\" in line or "[^" in line or "[:" in line:
+        raise ValueError(f"unsupported ignore pattern: {line!r}")
+    line = line.rstrip(" ")
+    negated = not escaped and line.startswith("!")
+    if negated:
+        line = line[1:]
+    dir_only = line.endswith("/")
+    if dir_only:
+        line = line[:-1]
+    # A leading slash anchors the pattern to the ignore file's directory, as does any inner slash.
+    anchored = "/" in line
+    if line.startswith("/"):
+        line = line[1:]
+    if not line:
+        return None
+    return _translate(line, anchored), negated, dir_only
+
+
+def _compile(rules: list[tuple[str, bool, bool]]) -> tuple[re.Pattern[str], tuple[bool, ...]] | None:
+    if not rules:
+        return None
+    ordered = rules[::-1]
+    regex = re.compile("|".join(f"({r})" for r, _, _ in ordered), re.DOTALL)
+    return regex, tuple(neg for _, neg, _ in ordered)
+
+
+class IgnoreRules:
+    __slots__ = ("_files", "_dirs")
+
+    def __init__(self, rules: list[tuple[str, bool, bool]]) -> None:
+        self._files = _compile([r for r in rules if not r[2]])
+        self._dirs = _compile(rules)
+
+    def decide(self, rel: str, is_dir: bool) -> bool | None:
+        # True (ignored) or False (re-included by a `!` rule) for the last rule matching `rel`
+        # ("/a/b", relative to this file's directory); None when no rule matches.
+        compiled = self._dirs if is_dir else self._files
+        if compiled is None:
+            return None
+        m = compiled[0].fullmatch(rel)
+        if m is None:
+            return None
+        return not compiled[1][m.lastindex - 1]  # type: ignore[operator]
+
+
+@lru_cache(maxsize=256)
+def compile_ignore(text: str) -> IgnoreRules | None:
+    # None when the file holds no patterns.
+    rules = [r for r in map(parse_pattern, text.lstrip("\ufeff").split("\n")) if r is not None]
+    return IgnoreRules(rules) if rules else None
+
+
+def load_ignore_file(path: str) -> IgnoreRules | None:
+    # Rules from the ignore file at `path`; None when it is missing, unreadable or has no patterns.
+    try:
+        with open(path, encoding="utf-8", errors="surrogateescape") as f:
+            text = f.read()
+    except OSError:
+        return None
+    return compile_ignore(text)
+
+
+def is_ignored(sources: tuple[tuple[str, IgnoreRules], ...], path: str, is_dir: bool) -> bool:
+    # `sources` are (base directory, rules), lowest precedence first: core.excludesFile, info/exclude,
+    # then .gitignore files from the root down. The deepest file with a matching rule decides.
+    for base, rules in reversed(sources):
+        if base:
+            if len(path) <= len(base) or path[len(base)] != "/" or not path.startswith(base):
+                continue
+            rel = path[len(base) :]
+        else:
+            rel = "/" + path
+        decision = rules.decide(rel, is_dir)
+        if decision is not None:
+            return decision
+    return False
+
+
+class _TrackedProbe:
+    # Whether the index might hold a path below a directory, from the raw .git/index bytes. Versions 2
+    # and 3 store every path whole, so a missing "name/" substring proves there is none (a stray match
+    # only costs some pruning); other layouts (v4 prefix compression, a split index) always say yes.
+    def __init__(self, git_dir: Path) -> None:
+        self._git_dir = git_dir
+        self._index: bytes | None = None
+        self._loaded = False
+        self._names: dict[str, bool] = {}
+
+    def _load(self) -> bytes | None:
+        if not self._loaded:
+            self._loaded = True
+            try:
+                data = (self._git_dir / "index").read_bytes()
+                shared = any(name.startswith("sharedindex.") for name in os.listdir(self._git_dir))
+            except FileNotFoundError:
+                data, shared = b"", False
+            except OSError:
+                return None
+            if data and (data[:4] != b"DIRC" or data[4:8] not in (b"\0\0\0\x02", b"\0\0\0\x03")):
+                return None
+            self._index = None if shared else data
+        return self._index
+
+    def may_track(self, rel: str) -> bool:
+        index = self._load()
+        if index is None:
+            return True
+        # Ignored directories mostly share a few names (node_modules, __pycache__), so one scan each.
+        name = rel.rpartition("/")[2]
+        found = self._names.get(name)
+        if found is None:
+            found = self._names[name] = os.fsencode(name + "/") in index
+        return found and os.fsencode(rel + "/") in index
+
+
+Sources = tuple[tuple[str, IgnoreRules], ...]
+
+
+class DirPruner:
+    # Which directories a top-down worktree walk may skip: ignored by .gitignore or info/exclude
+    # (core.excludesFile would need git config) and holding nothing the index tracks, so nothing
+    # below them can be a working change. A walk threads `Sources` down the tree: `root()` for the
+    # worktree, `enter()` for each directory it lists. None means "prune nothing below here".
+    def __init__(self, git_dir: Path, exclude_file: Path) -> None:
+        self._probe = _TrackedProbe(git_dir)
+        self._exclude_file = exclude_file
+
+    def root(self) -> Sources | None:
+        try:
+            exclude = load_ignore_file(str(self._exclude_file))
+        except ValueError:
+            return None
+        return (("", exclude),) if exclude is not None else ()
+
+    def enter(self, rel_dir: str, entries: list[os.DirEntry[str]], sources: Sources | None) -> Sources | None:
+        # A .gitignore this matcher cannot read might re-include something, so it turns pruning off.
+        if sources is None:
+            return None
+        for entry in entries:
+            if entry.name == ".gitignore" and not entry.is_symlink():
+                try:
+                    rules = load_ignore_file(entry.path)
+                except ValueError:
+                    return None
+                return sources + ((rel_dir, rules),) if rules is not None else sources
+        return sources
+
+    def prune(self, rel: str, sources: Sources | None) -> bool:
+        if not sources or not is_ignored(sources, rel, True):
+            return False
+        return not self._probe.may_track(rel)
@@ -0,0 +1,678 @@
+from __future__ import annotations
+
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import re
+import stat
+import struct
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from yagnidrift.dirindex import _tree_of, _write_atomic
+from yagnidrift.git_tools import (
+    _BULK_EXAMPLES,
+    EXPAND_UNTRACKED,
+    UNTRACKED_COUNT_CAP,
+    UntrackedDir,
+    WorkingChanges,
+    _git_records,
+    common_dir,
+    find_git_dir,
+    read_head_oid,
+)
+from yagnidrift.gitignore import IgnoreRules, is_ignored, load_ignore_file
+from yagnidrift.timing import span
+
+# Working changes without a `git status` subprocess. .git/index (versions 2-4) is memory-mapped and
+# parsed in place; each entry's stat data is compared with what a scandir walk of the worktree
+# returns, and content is hashed only when stat cannot decide (changed stat with equal size, racy or
+# smudged entries). The index is compared with HEAD through the cache-tree root, or else a listing
+# of HEAD's tree cached per tree oid; exact renames are paired by blob oid. Untracked files come from
+# the same walk, filtered through compiled .gitignore rules. Whatever this does not model (split or
+# sparse index, sparse checkout, submodules and nested repos, content filters, case-insensitive
+# worktrees, candidates for inexact rename detection) raises UnsupportedIndex, and the caller runs git.
+
+
+class UnsupportedIndex(Exception):
+    pass
+
+
+_HEADER = struct.Struct(">4sII")
+_U16 = struct.Struct(">H")
+_U32 = struct.Struct(">I")
+_MASK32 = 0xFFFFFFFF
+_NS = 1_000_000_000
+
+ASSUME_VALID = 1
+INTENT_TO_ADD = 2
+SKIP_WORKTREE = 4
+
+
+class IndexEntry(NamedTuple):
+    path: str
+    mode: int
+    oid: bytes
+    stage: int
+    flags: int
+    # ctime s/ns, mtime s/ns, dev, ino, mode, uid, gid, size (each truncated to 32 bits on disk), then oid and flags.
+    stat: tuple[int, ...]
+
+
+class GitIndex(NamedTuple):
+    entries: list[IndexEntry]
+    # The cache-tree (TREE extension) root oid, when the index has not been changed since it was computed.
+    tree_oid: bytes | None
+    mtime_ns: int
+
+
+def _varint(buf: mmap.mmap, pos: int) -> tuple[int, int]:
+    # Git's offset varint (index v4 path prefix lengths): each continuation byte adds one before shifting.
+    c = buf[pos]
+    pos += 1
+    value = c & 0x7F
+    while c & 0x80:
+        c = buf[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (c & 0x7F)
+    return value, pos
+
+
+def _cache_tree_root(buf: mmap.mmap, pos: int, hash_len: int) -> bytes | None:
+    # The first TREE record is the root: "" NUL entry-count SP subtree-count LF oid; -1 entries means invalid.
+    nul = buf.find(b"\0", pos)
+    line_end = buf.find(b"\n", nul)
+    if nul != pos or line_end < 0:
+        return None
+    if int(buf[nul + 1 : line_end].split(b" ", 1)[0]) < 0:
+        return None
+    return buf[line_end + 1 : line_end + 1 + hash_len]
+
+
+def _parse_index(buf: mmap.mmap, hash_len: int) -> tuple[list[IndexEntry], bytes | None]:
+    signature, version, count = _HEADER.unpack_from(buf, 0)
+    if signature != b"DIRC" or version not in (2, 3, 4):
+        raise UnsupportedIndex(f"index version {version}")
+    entries: list[IndexEntry] = []
+    append = entries.append
+    new_entry = tuple.__new__
+    # Stat data, oid and the flags word in one unpack; fields[6] is the mode, fields[10] the oid.
+    unpack_head = struct.Struct(f">10I{hash_len}sH").unpack_from
+    fixed = 42 + hash_len
+    pos = 12
+    prev = b""
+    for _ in range(count):
+        fields = unpack_head(buf, pos)
+        bits = fields[11]
+        name_at = pos + fixed
+        flags = ASSUME_VALID if bits & 0x8000 else 0
+        if bits & 0x4000:
+            (extended,) = _U16.unpack_from(buf, name_at)
+            name_at += 2
+            if extended & 0x2000:
+                flags |= INTENT_TO_ADD
+            if extended & 0x4000:
+                flags |= SKIP_WORKTREE
+        if version == 4:
+            # The path is the previous one minus `strip` trailing bytes, plus a NUL-terminated suffix.
+            strip, name_at = _varint(buf, name_at)
+            end = buf.find(b"\0", name_at)
+            name = prev[: len(prev) - strip] + buf[name_at:end]
+            pos = end + 1
+        else:
+            length = bits & 0x0FFF
+            end = name_at + length if length < 0x0FFF else buf.find(b"\0", name_at)
+            name = buf[name_at:end]
+            # NUL padding (at least one byte) to a multiple of eight.
+            pos += (end - pos + 8) & ~7
+        prev = name
+        append(
+            new_entry(
+                IndexEntry,
+                (name.decode("utf-8", "surrogateescape"), fields[6], fields[10], (bits >> 12) & 3, flags, fields),
+            )
+        )
+
+    tree_oid = None
+    limit = len(buf) - hash_len
+    while pos + 8 <= limit:
+        ext = buf[pos : pos + 4]
+        (size,) = _U32.unpack_from(buf, pos + 4)
+        if ext == b"TREE":
+            tree_oid = _cache_tree_root(buf, pos + 8, hash_len)
+        elif ext == b"link":
+            raise UnsupportedIndex("split index")
+        elif ext == b"sdir":
+            raise UnsupportedIndex("sparse index")
+        elif not ext[:1].isupper():
+            # Lowercase extensions are required for correctness; an unknown one cannot be skipped.
+            raise UnsupportedIndex(f"index extension {ext!r}")
+        pos += 8 + size
+    return entries, tree_oid
+
+
+def read_index(path: Path, *, hash_len: int = 20) -> GitIndex:
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return GitIndex([], None, 0)
+    with f:
+        st = os.fstat(f.fileno())
+        if st.st_size == 0:
+            return GitIndex([], None, st.st_mtime_ns)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            entries, tree_oid = _parse_index(buf, hash_len)
+    return GitIndex(entries, tree_oid, st.st_mtime_ns)
+
+
+# --- configuration ---------------------------------------------------------------------------------
+
+_CONFIG_SECTIONS = ("core.", "extensions.", "status.", "diff.")
+_config_memo: dict[str, tuple[list[Any], dict[str, str | None]]] = {}
+
+
+def _xdg_git(name: str) -> str:
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "git", name)
+
+
+def _config_key(git_dir: Path) -> list[Any]:
+    files = [
+        str(common_dir(git_dir) / "config"),
+        str(git_dir / "config.worktree"),
+        os.path.join(os.path.expanduser("~"), ".gitconfig"),
+        _xdg_git("config"),
+        "/etc/gitconfig",
+    ]
+    key: list[Any] = []
+    for path in files:
+        try:
+            st = os.stat(path)
+            key.append([path, st.st_mtime_ns, st.st_size])
+        except OSError:
+            key.append([path])
+    key.append(sorted([k, v] for k, v in os.environ.items() if k.startswith("GIT_")))
+    return key
+
+
+def load_config(git_root: str, git_dir: Path, cache_dir: Path | None) -> dict[str, str | None]:
+    # The core/extensions/status/diff settings in effect, from one `git config --list` that is reused
+    # until a config file or GIT_* variable changes. Files pulled in by include/includeIf are not watched.
+    key = _config_key(git_dir)
+    memo = _config_memo.get(git_root)
+    if memo is not None and memo[0] == key:
+        return memo[1]
+    cache_path = cache_dir / "config.json" if cache_dir is not None else None
+    values: dict[str, str | None] | None = None
+    if cache_path is not None:
+        try:
+            cached = json.loads(cache_path.read_text(encoding="utf-8"))
+            if cached.get("key") == key:
+                values = cached["values"]
+        except (OSError, ValueError, AttributeError, KeyError):
+            pass
+    if values is None:
+        values = {}
+        for rec in _git_records(["config", "--list", "-z"], cwd=git_root):
+            name, sep, value = os.fsdecode(rec).partition("\n")
+            if name.startswith(_CONFIG_SECTIONS):
+                # A bare key (no "=") is boolean true.
+                values[name] = value if sep else None
+        if cache_path is not None:
+            _write_atomic(cache_path, json.dumps({"key": key, "values": values}).encode("utf-8"))
+    _config_memo[git_root] = (key, values)
+    return values
+
+
+def _bool(values: dict[str, str | None], name: str, default: bool) -> bool:
+    if name not in values:
+        return default
+    value = values[name]
+    if value is None:
+        return True
+    value = value.strip().lower()
+    if value in ("true", "yes", "on"):
+        return True
+    if value in ("false", "no", "off", ""):
+        return False
+    try:
+        return int(value) != 0
+    except ValueError:
+        raise UnsupportedIndex(f"{name}={value}") from None
+
+
+class Settings(NamedTuple):
+    hash_name: str
+    hash_len: int
+    filemode: bool
+    renames: bool
+    autocrlf: bool
+    excludes_file: str
+    attributes_file: str
+
+
+def settings_from(values: dict[str, str | None]) -> Settings:
+    object_format = (values.get("extensions.objectformat") or "sha1").lower()
+    if object_format not in ("sha1", "sha256"):
+        raise UnsupportedIndex(f"object format {object_format}")
+    for name, default in (("core.ignorecase", False), ("core.sparsecheckout", False), ("core.precomposeunicode", False)):
+        if _bool(values, name, default):
+            raise UnsupportedIndex(name)
+    if not _bool(values, "core.symlinks", True):
+        raise UnsupportedIndex("core.symlinks=false")
+    if values.get("core.worktree"):
+        raise UnsupportedIndex("core.worktree")
+    rename_key = "status.renames" if "status.renames" in values else "diff.renames"
+    if (values.get(rename_key) or "").strip().lower() in ("copy", "copies"):
+        raise UnsupportedIndex(f"{rename_key}=copies")
+    autocrlf = (values.get("core.autocrlf") or "false").strip().lower()
+    return Settings(
+        hash_name=object_format,
+        hash_len=32 if object_format == "sha256" else 20,
+        filemode=_bool(values, "core.filemode", True),
+        renames=_bool(values, rename_key, True),
+        autocrlf=autocrlf not in ("false", "no", "off", "0"),
+        excludes_file=os.path.expanduser(values.get("core.excludesfile") or _xdg_git("ignore")),
+        attributes_file=os.path.expanduser(values.get("core.attributesfile") or _xdg_git("attributes")),
+    )
+
+
+# --- HEAD ------------------------------------------------------------------------------------------
+
+_HEAD_MEMO_SIZE = 2
+_head_memo: OrderedDict[str, dict[str, bytes]] = OrderedDict()
+
+
+def head_entries(git_root: str, tree: str, cache_dir: Path | None) -> dict[str, bytes]:
+    # path -> b"MODE TYPE OID" for every non-tree entry of `tree`, from one `git ls-tree -r` whose
+    # output is kept on disk per tree oid (trees never change).
+    hit = _head_memo.get(tree)
+    if hit is not None:
+        _head_memo.move_to_end(tree)
+        return hit
+    data: bytes | None = None
+    if cache_dir is not None:
+        try:
+            data = (cache_dir / f"{tree}.tree").read_bytes()
+        except OSError:
+            pass
+    if data is None:
+        data = b"\0".join(_git_records(["ls-tree", "-r", "-z", "--full-tree", tree], cwd=git_root))
+        if cache_dir is not None:
+            _write_atomic(cache_dir / f"{tree}.tree", data)
+    fsdecode = os.fsdecode
+    entries: dict[str, bytes] = {}
+    for rec in data.split(b"\0"):
+        meta, _, path = rec.partition(b"\t")
+        if path:
+            entries[fsdecode(path)] = meta
+    _head_memo[tree] = entries
+    while len(_head_memo) > _HEAD_MEMO_SIZE:
+        _head_memo.popitem(last=False)
+    return entries
+
+
+# --- attributes ------------------------------------------------------------------------------------
+
+# Attributes that change how worktree content becomes a blob. Matched anywhere outside comments, so a
+# macro such as `binary` (-text) also counts; that only costs falling back to git.
+_FILTER_ATTRS = re.compile(rb"^[^#\n]*\b(?:filter|ident|working-tree-encoding)\b", re.M)
+_TEXT_ATTRS = re.compile(rb"^[^#\n]*\b(?:text|eol|crlf)\b", re.M)
+
+
+def _prefixes(pathspecs: list[str] | None) -> tuple[str, ...] | None:
+    if not pathspecs:
+        return None
+    out = []
+    for spec in pathspecs:
+        if spec.startswith(":(literal)"):
+            spec = spec[len(":(literal)") :]
+        elif spec.startswith(":") or any(c in spec for c in "*?[\\"):
+            raise UnsupportedIndex(f"pathspec {spec!r}")
+        out.append(spec.strip("/"))
+    return tuple(out)
+
+
+class _Collector:
+    def __init__(
+        self,
+        root: str,
+        settings: Settings,
+        index: GitIndex,
+        *,
+        prefixes: tuple[str, ...] | None,
+        collapse_untracked: bool,
+    ) -> None:
+        self.root = root
+        self.settings = settings
+        self.prefixes = prefixes
+        self.collapse = collapse_untracked
+        self.racy_s = index.mtime_ns // _NS
+        self.changed: set[str] = set()
+        self.new: set[str] = set()
+        self.bulk: list[UntrackedDir] = []
+        self.attr_files: list[str] = []
+        self._conversion: int | None = None
+
+        # Stage-0 entries still to be matched with the worktree; those never seen were deleted.
+        self.remaining: dict[str, IndexEntry] = {}
+        self.intent_to_add: list[str] = []
+        self.tracked_dirs: set[str] = set()
+        tracked_dirs = self.tracked_dirs
+        scoped = prefixes is not None
+        last_dir = None
+        for entry in index.entries:
+            path, mode, _, stage, flags, _ = entry
+            if flags & SKIP_WORKTREE:
+                raise UnsupportedIndex("sparse checkout")
+            if mode == 0o160000 or mode == 0o040000:
+                raise UnsupportedIndex("submodule" if mode == 0o160000 else "sparse index")
+            parent = path.rpartition("/")[0]
+            if parent != last_dir:
+                last_dir = parent
+                while parent and parent not in tracked_dirs:
+                    tracked_dirs.add(parent)
+                    parent = parent.rpartition("/")[0]
+            if path.endswith(".gitattributes") and (path == ".gitattributes" or path.endswith("/.gitattributes")):
+                self.attr_files.append(path)
+            if scoped and not self.in_scope(path):
+                continue
+            if stage:
+                self.changed.add(path)  # unmerged
+            elif flags & INTENT_TO_ADD:
+                self.intent_to_add.append(path)
+                self.changed.add(path)
+                self.new.add(path)
+            else:
+                self.remaining[path] = entry
+        self.all_paths = {entry.path for entry in index.entries}
+        self.staged = list(self.remaining.values())
+
+    def in_scope(self, path: str) -> bool:
+        if self.prefixes is None:
+            return True
+        return any(path == p or path.startswith(p + "/") for p in self.prefixes)
+
+    def on_path(self, dir_path: str) -> bool:
+        # Whether the walk has to enter `dir_path`: it is in scope, or holds something that is.
+        if self.prefixes is None:
+            return True
+        return self.in_scope(dir_path) or any(p.startswith(dir_path + "/") for p in self.prefixes)
+
+    # --- worktree ---
+
+    def _with_gitignore(
+        self, rel_dir: str, entries: list[os.DirEntry[str]], sources: tuple[tuple[str, IgnoreRules], ...]
+    ) -> tuple[tuple[str, IgnoreRules], ...]:
+        for e in entries:
+            if e.name == ".gitignore":
+                if e.is_symlink():
+                    return sources  # git does not follow symlinked ignore files in the worktree
+                try:
+                    rules = load_ignore_file(e.path)
+                except ValueError as err:
+                    raise UnsupportedIndex(str(err)) from None
+                return sources + ((rel_dir, rules),) if rules is not None else sources
+        return sources
+
+    def walk(self, sources: tuple[tuple[str, IgnoreRules], ...]) -> None:
+        scoped = self.prefixes is not None
+        tracked_dirs = self.tracked_dirs
+        all_paths = self.all_paths
+        pop_tracked = self.remaining.pop
+        dirty = self._dirty
+        changed = self.changed
+        new = self.new
+        stack: list[tuple[str, tuple[tuple[str, IgnoreRules], ...], bool]] = [("", sources, False)]
+        while stack:
+            rel_dir, sources, ignored = stack.pop()
+            try:
+                with os.scandir(self.root + "/" + rel_dir if rel_dir else self.root) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            if not ignored:
+                sources = self._with_gitignore(rel_dir, entries, sources)
+            prefix = rel_dir + "/" if rel_dir else ""
+            for e in entries:
+                name = e.name
+                rel = prefix + name
+                entry = pop_tracked(rel, None)
+                if entry is not None:
+                    if not dirty(entry, e):
+                        continue
+                    changed.add(rel)
+                    if not e.is_dir(follow_symlinks=False):
+                        continue
+                    # A tracked file replaced by a directory: its contents are untracked.
+                if name == ".git":
+                    if rel_dir:
+                        raise UnsupportedIndex(f"nested repository in {rel_dir}")
+                    continue
+                if e.is_dir(follow_symlinks=False):
+                    if scoped and not self.on_path(rel):
+                        continue
+                    if rel in tracked_dirs:
+                        # Tracked files below an ignored directory are still compared; untracked ones are not listed.
+                        stack.append((rel, sources, ignored or (bool(sources) and is_ignored(sources, rel, True))))
+                    elif not ignored and not is_ignored(sources, rel, True):
+                        if not scoped or self.in_scope(rel):
+                            self._untracked_dir(rel, sources)
+                        else:
+                            stack.append((rel, sources, False))
+                    continue
+                if name == ".gitattributes":
+                    self.attr_files.append(rel)
+                if rel in all_paths or ignored or (scoped and not self.in_scope(rel)):
+                    continue
+                if (e.is_file(follow_symlinks=False) or e.is_symlink()) and not is_ignored(sources, rel, False):
+                    changed.add(rel)
+                    new.add(rel)
+        # Never found in the worktree: deleted (or replaced by a directory or a symlinked parent).
+        if self.remaining and self.intent_to_add:
+            # git pairs a deleted file with an intent-to-add one as a worktree rename.
+            raise UnsupportedIndex("intent-to-add entries with deletions")
+        self.changed.update(self.remaining)
+
+    def _untracked_dir(self, rel: str, sources: tuple[tuple[str, IgnoreRules], ...]) -> None:
+        # Same result as get_working_changes' expansion of a "dir/" status entry.
+        limit = EXPAND_UNTRACKED if self.collapse else None
+        files: list[str] = []
+        smallest: list[str] = []
+        count = 0
+        truncated = False
+        stack = [(rel, sources)]
+        while stack and not truncated:
+            d, srcs = stack.pop()
+            try:
+                with os.scandir(os.path.join(self.root, d)) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            if any(e.name == ".git" for e in entries):
+                raise UnsupportedIndex(f"nested repository in {d}")
+            srcs = self._with_gitignore(d, entries, srcs)
+            for e in entries:
+                p = f"{d}/{e.name}"
+                if e.is_dir(follow_symlinks=False):
+                    if not is_ignored(srcs, p, True):
+                        stack.append((p, srcs))
+                    continue
+                if not (e.is_file(follow_symlinks=False) or e.is_symlink()) or is_ignored(srcs, p, False):
+                    continue
+                if e.name == ".gitattributes":
+                    self.attr_files.append(p)
+                count += 1
+                if limit is None or count <= limit:
+                    files.append(p)
+                elif count > UNTRACKED_COUNT_CAP:
+                    count, truncated = UNTRACKED_COUNT_CAP, True
+                    break
+                if self.collapse and (len(smallest) < _BULK_EXAMPLES or p < smallest[-1]):
+                    bisect.insort(smallest, p)
+                    del smallest[_BULK_EXAMPLES:]
+        if limit is None or count <= limit:
+            self.changed.update(files)
+            self.new.update(files)
+        else:
+            self.bulk.append(UntrackedDir(rel, count, truncated, tuple(smallest)))
+
+    def _dirty(self, entry: IndexEntry, e: os.DirEntry[str]) -> bool:
+        if entry.flags & ASSUME_VALID:
+            return False
+        try:
+            st = e.stat(follow_symlinks=False)
+        except OSError:
+            return True
+        mode = st.st_mode
+        if entry.mode == 0o120000:
+            if not stat.S_ISLNK(mode):
+                return True
+        elif not stat.S_ISREG(mode):
+            return True
+        elif self.settings.filemode and bool(mode & 0o100) != (entry.mode == 0o100755):
+            return True
+        s = entry.stat
+        size = st.st_size & _MASK32
+        mtime_s, mtime_ns = divmod(st.st_mtime_ns, _NS)
+        ctime_s, ctime_ns = divmod(st.st_ctime_ns, _NS)
+        if (
+            s[2] == mtime_s
+            and s[3] == mtime_ns
+            and s[0] == ctime_s
+            and s[1] == ctime_ns
+            and s[5] == st.st_ino & _MASK32
+            and s[9] == size
+        ):
+            if s[2] < self.racy_s:
+                return False
+            # Racily clean: modified within the index's own timestamp second, so stat cannot tell.
+        elif s[9] != size and s[9] != 0 and not self.conversion():
+            # Size 0 in the index may be a racily clean entry git smudged, so only a nonzero size is proof.
+            return True
+        return self._blob_oid(e.path, mode) != entry.oid
+
+    def conversion(self) -> int:
+        # 0: worktree bytes are the blob; 1: CRLF may be normalised (text/eol attributes, core.autocrlf).
+        if self._conversion is None:
+            texts = [os.path.join(self.root, p) for p in self.attr_files]
+            texts += [self.settings.attributes_file]
+            level = 1 if self.settings.autocrlf else 0
+            for path in texts:
+                try:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                except OSError:
+                    continue
+                if _FILTER_ATTRS.search(data):
+                    raise UnsupportedIndex(f"content filters ({path})")
+                if _TEXT_ATTRS.search(data):
+                    level = 1
+            self._conversion = level
+        return self._conversion
+
+    def _blob_oid(self, path: str, mode: int) -> bytes:
+        if stat.S_ISLNK(mode):
+            data = os.fsencode(os.readlink(path))
+        else:
+            with open(path, "rb") as f:
+                data = f.read()
+            if b"\r" in data and self.conversion():
+                raise UnsupportedIndex("line-ending conversion")
+        h = hashlib.new(self.settings.hash_name)
+        h.update(b"blob %d\0" % len(data))
+        h.update(data)
+        return h.digest()
+
+    # --- index vs HEAD ---
+
+    def compare_head(self, head: dict[str, bytes]) -> None:
+        added: list[IndexEntry] = []
+        for entry in self.staged:
+            meta = head.get(entry.path)
+            if meta is None:
+                added.append(entry)
+            elif meta != b"%o blob %s" % (entry.mode, entry.oid.hex().encode()):
+                self.changed.add(entry.path)
+        deleted = [p for p in head if p not in self.all_paths and self.in_scope(p)]
+        for p in deleted:
+            if not head[p].startswith((b"100", b"120")):
+                raise UnsupportedIndex(f"submodule {p}")
+
+        if self.settings.renames and added and deleted:
+            empty = hashlib.new(self.settings.hash_name, b"blob 0\0").digest().hex().encode()
+            sources: dict[bytes, list[str]] = {}
+            for p in deleted:
+                sources.setdefault(head[p], []).append(p)
+            targets: dict[bytes, int] = {}
+            metas = [b"%o blob %s" % (entry.mode, entry.oid.hex().encode()) for entry in added]
+            for meta in metas:
+                targets[meta] = targets.get(meta, 0) + 1
+            paired: set[str] = set()
+            unpaired_added = []
+            for entry, meta in zip(added, metas):
+                # Exact one-to-one renames only; any other add/delete pair could be an inexact rename.
+                match = sources.get(meta)
+                if match and len(match) == 1 and targets[meta] == 1 and not meta.endswith(empty):
+                    paired.add(match[0])
+                    self.changed.add(entry.path)
+                else:
+                    unpaired_added.append(entry)
+            deleted = [p for p in deleted if p not in paired]
+            if unpaired_added and deleted:
+                raise UnsupportedIndex("possible inexact renames")
+            added = unpaired_added
+
+        for entry in added:
+            self.changed.add(entry.path)
+            self.new.add(entry.path)
+        self.changed.update(deleted)
+
+
+def native_working_changes(
+    git_root: str,
+    *,
+    pathspecs: list[str] | None = None,
+    collapse_untracked: bool = False,
+    cache_dir: Path | None = None,
+) -> WorkingChanges:
+    # Same result as get_working_changes; raises UnsupportedIndex where git has to answer instead.
+    git_dir = find_git_dir(Path(git_root))
+    if git_dir is None:
+        raise UnsupportedIndex("no git directory")
+    settings = settings_from(load_config(git_root, git_dir, cache_dir))
+    with span("read_index"):
+        index = read_index(git_dir / "index", hash_len=settings.hash_len)
+        collector = _Collector(
+            git_root, settings, index, prefixes=_prefixes(pathspecs), collapse_untracked=collapse_untracked
+        )
+
+    sources: tuple[tuple[str, IgnoreRules], ...] = ()
+    for path in (settings.excludes_file, str(common_dir(git_dir) / "info" / "exclude")):
+        try:
+            rules = load_ignore_file(path)
+        except ValueError as err:
+            raise UnsupportedIndex(str(err)) from None
+        if rules is not None:
+            sources += (("", rules),)
+    with span("worktree_walk"):
+        collector.walk(sources)
+
+    with span("index_vs_head"):
+        head_oid = read_head_oid(git_dir)
+        if head_oid is None:
+            raise UnsupportedIndex("unreadable HEAD")
+        if head_oid.startswith("unborn:"):
+            collector.compare_head({})
+        else:
+            tree = _tree_of(git_root, head_oid, cache_dir)
+            if tree is None:
+                raise UnsupportedIndex("HEAD tree")
+            if index.tree_oid is None or index.tree_oid.hex() != tree:
+                collector.compare_head(head_entries(git_root, tree, cache_dir))
+
+    bulk = sorted(collector.bulk, key=lambda d: d.path + "/")
+    return WorkingChanges(changed_files=sorted(collector.changed), new_files=sorted(collector.new), bulk_dirs=bulk)
@@ -1,31 +1,168 @@
 from __future__ import annotations
 
-import fnmatch
+import re
+from functools import lru_cache
 
+# Paths are matched in "/seg/seg/seg" form: every segment carries its leading slash, so `**`
+# (zero or more whole segments) is just a repeated group and never needs special anchoring.
+_ANY_SEGMENTS = r"(?:/[^/]+)*"
 
-def match_path(path: str, pattern: str) -> bool:
-    path_parts = [p for p in path.strip("/").split("/") if p]
-    pat_parts = [p for p in pattern.strip("/").split("/") if p]
+_STAR = object()
 
-    def rec(i: int, j: int) -> bool:
-        if j >= len(pat_parts):
-            return i >= len(path_parts)
+GLOB_CHARS = frozenset("*?[")
 
-        pat = pat_parts[j]
-        if pat == "**":
-            if rec(i, j + 1):
-                return True
-            return i < len(path_parts) and rec(i + 1, j)
 
-        if i >= len(path_parts):
-            return False
+def _translate_segment(pat: str) -> str:
+    # Same grammar as fnmatch.translate (so results match fnmatch.fnmatchcase on one segment),
+    # except that no construct may consume "/": segments are matched inside a whole-path regex.
+    res: list[object] = []
+    add = res.append
+    i, n = 0, len(pat)
+    while i < n:
+        c = pat[i]
+        i = i + 1
+        if c == "*":
+            if (not res) or res[-1] is not _STAR:
+                add(_STAR)
+        elif c == "?":
+            add("[^/]")
+        elif c == "[":
+            j = i
+            if j < n and pat[j] == "!":
+                j = j + 1
+            if j < n and pat[j] == "]":
+                j = j + 1
+            while j < n and pat[j] != "]":
+                j = j + 1
+            if j >= n:
+                add("\\[")
+            else:
+                stuff = pat[i:j]
+                if "-" not in stuff:
+                    stuff = stuff.replace("\\", r"\\")
+                else:
+                    chunks = []
+                    k = i + 2 if pat[i] == "!" else i + 1
+                    while True:
+                        k = pat.find("-", k, j)
+                        if k < 0:
+                            break
+                        chunks.append(pat[i:k])
+                        i = k + 1
+                        k = k + 3
+                    chunk = pat[i:j]
+                    if chunk:
+                        chunks.append(chunk)
+                    else:
+                        chunks[-1] += "-"
+                    for k in range(len(chunks) - 1, 0, -1):
+                        if chunks[k - 1][-1] > chunks[k][0]:
+                            chunks[k - 1] = chunks[k - 1][:-1] + chunks[k][1:]
+                            del chunks[k]
+                    stuff = "-".join(s.replace("\\", r"\\").replace("-", r"\-") for s in chunks)
+                stuff = re.sub(r"([&~|])", r"\\\1", stuff)
+                i = j + 1
+                if not stuff:
+                    add("(?!)")
+                elif stuff == "!":
+                    add("[^/]")
+                else:
+                    if stuff[0] == "!":
+                        stuff = "^" + stuff[1:]
+                    elif stuff[0] in ("^", "["):
+                        stuff = "\\" + stuff
+                    # A range such as [+-0] spans "/", so classes are guarded explicitly.
+                    add(f"(?!/)[{stuff}]")
+        else:
+            add(re.escape(c))
+
+    out: list[str] = []
+    k, n = 0, len(res)
+    while k < n and res[k] is not _STAR:
+        out.append(str(res[k]))
+        k += 1
+    while k < n:
+        k += 1
+        if k == n:
+            out.append("[^/]*")
+            break
+        fixed: list[str] = []
+        while k < n and res[k] is not _STAR:
+            fixed.append(str(res[k]))
+            k += 1
+        fixed_re = "".join(fixed)
+        if k == n:
+            out.append("[^/]*" + fixed_re)
+        else:
+            out.append(f"(?>[^/]*?{fixed_re})")
+    return "".join(out)
+
+
+def _translate_pattern(pattern: str) -> str:
+    pieces: list[str] = []
+    for part in pattern.strip("/").split("/"):
+        if not part:
+            continue
+        if part == "**":
+            # Consecutive `**` segments are equivalent to one; collapsing them keeps the regex linear.
+            if not pieces or pieces[-1] != _ANY_SEGMENTS:
+                pieces.append(_ANY_SEGMENTS)
+        else:
+            pieces.append("/" + _translate_segment(part))
+    return "".join(pieces)
+
+
+def _normalize(path: str) -> str:
+    if path and path[0] != "/" and path[-1] != "/" and "//" not in path:
+        return "/" + path
+    return "".join("/" + p for p in path.split("/") if p)
+
+
+def _subtree(pattern: str) -> tuple[str, str] | None:
+    # ("dir", "a/b") for `a/b/**`, ("name", "x") for `**/x/**`: every path below such a directory
+    # matches, so a tree walk can skip it without matching each file.
+    parts = [p for p in pattern.strip("/").split("/") if p]
+    if len(parts) < 2 or parts[-1] != "**":
+        return None
+    if len(parts) == 3 and parts[0] == "**" and not GLOB_CHARS.intersection(parts[1]):
+        return ("name", parts[1])
+    if any(GLOB_CHARS.intersection(p) for p in parts[:-1]):
+        return None
+    return ("dir", "/".join(parts[:-1]))
 
-        if not fnmatch.fnmatchcase(path_parts[i], pat):
+
+class GlobSet:
+    __slots__ = ("patterns", "_regex", "subtree_dirs", "subtree_names")
+
+    def __init__(self, patterns: tuple[str, ...]) -> None:
+        self.patterns = patterns
+        self._regex = (
+            re.compile("|".join(f"(?:{_translate_pattern(p)})" for p in patterns), re.DOTALL) if patterns else None
+        )
+        subtrees = [t for t in map(_subtree, patterns) if t is not None]
+        self.subtree_dirs = frozenset(v for k, v in subtrees if k == "dir")
+        self.subtree_names = frozenset(v for k, v in subtrees if k == "name")
+
+    def covers(self, dir_path: str, name: str) -> bool:
+        # Whether every path below the directory `dir_path` (whose last segment is `name`) matches.
+        return dir_path in self.subtree_dirs or name in self.subtree_names
+
+    def match(self, path: str) -> bool:
+        if self._regex is None:
             return False
-        return rec(i + 1, j + 1)
+        return self._regex.fullmatch(_normalize(path)) is not None
 
-    return rec(0, 0)
+
+@lru_cache(maxsize=512)
+def compile_patterns(patterns: tuple[str, ...]) -> GlobSet:
+    return GlobSet(patterns)
+
+
+def match_path(path: str, pattern: str) -> bool:
+    return compile_patterns((pattern,)).match(path)
 
 
 def match_any(path: str, patterns: list[str]) -> bool:
-    return any(match_path(path, p) for p in patterns)
+    if not patterns:
+        return False
+    return compile_patterns(tuple(patterns)).match(path)
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+# Append-only record of every report (task, time, score, counts, finding kinds, keyword hits) in
+# .workgraph/.yagnidrift/history.sqlite3. Reports are buffered by the check context and written in
+# one transaction per command. Finding and keyword rows carry the run's ts and task so window
+# queries are answered from their own indexes without joining back to `runs`.
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    task_id TEXT NOT NULL,
+    score TEXT NOT NULL,
+    files_changed INTEGER NOT NULL,
+    new_files INTEGER NOT NULL,
+    new_dirs INTEGER NOT NULL,
+    added_loc INTEGER,
+    new_loc INTEGER,
+    base TEXT,
+    cached INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_task_ts ON runs (task_id, ts);
+CREATE INDEX IF NOT EXISTS runs_ts_task ON runs (ts, task_id, score);
+CREATE TABLE IF NOT EXISTS findings (
+    run_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    task_id TEXT NOT NULL,
+    kind TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS findings_ts_kind ON findings (ts, kind, task_id);
+CREATE INDEX IF NOT EXISTS findings_run ON findings (run_id);
+CREATE TABLE IF NOT EXISTS keyword_hits (
+    run_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    task_id TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    hits INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS keyword_hits_ts ON keyword_hits (ts, keyword, task_id, hits);
+"""
+
+
+def history_row(report: dict[str, Any], *, ts: float | None = None) -> dict[str, Any] | None:
+    # The compact form buffered until the next flush; None for reports with nothing to record.
+    task_id = report.get("task_id")
+    if not task_id or (report.get("spec") is None and not report.get("findings")):
+        return None
+    telemetry = report.get("telemetry") or {}
+    loc = telemetry.get("loc") or {}
+    return {
+        "ts": time.time() if ts is None else ts,
+        "task_id": str(task_id),
+        "score": str(report.get("score") or "unknown"),
+        "files_changed": int(telemetry.get("files_changed") or 0),
+        "new_files": int(telemetry.get("new_files") or 0),
+        "new_dirs": int(telemetry.get("new_dirs") or 0),
+        "added_loc": loc.get("added"),
+        "new_loc": loc.get("new"),
+        "base": telemetry.get("base"),
+        "cached": telemetry.get("cache") == "hit",
+        "kinds": sorted({str(f.get("kind")) for f in report.get("findings") or []}),
+        "keywords": dict(telemetry.get("keyword_hits") or {}),
+    }
+
+
+class HistoryStore:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    @staticmethod
+    def for_workgraph(wg_dir: Path) -> "HistoryStore":
+        return HistoryStore(wg_dir / ".yagnidrift" / "history.sqlite3")
+
+    def _connect(self, *, create: bool) -> sqlite3.Connection | None:
+        if not create and not self.path.exists():
+            return None
+        if create:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if create:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                conn.executescript(_SCHEMA)
+                conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        return conn
+
+    def append(self, rows: Iterable[dict[str, Any]]) -> int:
+        rows = list(rows)
+        if not rows:
+            return 0
+        conn = self._connect(create=True)
+        assert conn is not None
+        try:
+            # Ids are assigned up front under the write lock so each table takes one executemany.
+            conn.execute("BEGIN IMMEDIATE")
+            first = conn.execute("SELECT coalesce(max(id), 0) + 1 FROM runs").fetchone()[0]
+            ids = range(first, first + len(rows))
+            conn.executemany(
+                "INSERT INTO runs (id, ts, task_id, score, files_changed, new_files, new_dirs, added_loc, new_loc,"
+                " base, cached) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id,
+                        r["ts"],
+                        r["task_id"],
+                        r["score"],
+                        r["files_changed"],
+                        r["new_files"],
+                        r["new_dirs"],
+                        r["added_loc"],
+                        r["new_loc"],
+                        r["base"],
+                        int(r["cached"]),
+                    )
+                    for run_id, r in zip(ids, rows)
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO findings (run_id, ts, task_id, kind) VALUES (?, ?, ?, ?)",
+                [(run_id, r["ts"], r["task_id"], kind) for run_id, r in zip(ids, rows) for kind in r["kinds"]],
+            )
+            conn.executemany(
+                "INSERT INTO keyword_hits (run_id, ts, task_id, keyword, hits) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (run_id, r["ts"], r["task_id"], kw, int(n))
+                    for run_id, r in zip(ids, rows)
+                    for kw, n in r["keywords"].items()
+                ],
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return len(rows)
+
+    def _query(self, sql: str, params: tuple[Any, ...]) -> list[dict[str, Any]]:
+        conn = self._connect(create=False)
+        if conn is None:
+            return []
+        try:
+            return [dict(r) for r in conn.execute(sql, params)]
+        except sqlite3.OperationalError:
+            return []  # an empty file left by an interrupted first write
+        finally:
+            conn.close()
+
+    def trend(self, task_id: str, *, limit: int = 50) -> list[dict[str, Any]]:
+        # The task's most recent runs, oldest first.
+        rows = self._query(
+            "SELECT r.ts, r.score, r.files_changed, r.new_files, r.new_dirs, r.added_loc, r.new_loc, r.base,"
+            " r.cached, (SELECT group_concat(f.kind, ',') FROM findings f WHERE f.run_id = r.id) AS kinds"
+            " FROM runs r WHERE r.task_id = ? ORDER BY r.ts DESC, r.id DESC LIMIT ?",
+            (task_id, limit),
+        )
+        for row in rows:
+            row["cached"] = bool(row["cached"])
+            row["kinds"] = row["kinds"].split(",") if row["kinds"] else []
+        rows.reverse()
+        return rows
+
+    def worst_offenders(self, *, since: float, limit: int = 20) -> list[dict[str, Any]]:
+        # Tasks with the most non-green runs since `since`. Without the index hint the planner walks
+        # runs_task_ts (to skip the GROUP BY sort) across all of history instead of just the window.
+        return self._query(
+            "SELECT task_id, count(*) AS runs, sum(score != 'green') AS drifting, max(ts) AS last_ts"
+            " FROM runs INDEXED BY runs_ts_task WHERE ts >= ? GROUP BY task_id HAVING drifting > 0"
+            " ORDER BY drifting DESC, runs DESC, task_id LIMIT ?",
+            (since, limit),
+        )
+
+    def finding_kinds(self, *, since: float, limit: int = 20) -> list[dict[str, Any]]:
+        return self._query(
+            "SELECT kind, count(*) AS runs, count(DISTINCT task_id) AS tasks FROM findings WHERE ts >= ?"
+            " GROUP BY kind ORDER BY runs DESC, kind LIMIT ?",
+            (since, limit),
+        )
+
+    def keyword_frequencies(self, *, since: float, limit: int = 20) -> list[dict[str, Any]]:
+        return self._query(
+            "SELECT keyword, sum(hits) AS hits, count(DISTINCT task_id) AS tasks FROM keyword_hits WHERE ts >= ?"
+            " GROUP BY keyword ORDER BY hits DESC, keyword LIMIT ?",
+            (since, limit),
+        )
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import json
+import os
+import posixpath
+import shlex
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from yagnidrift.git_tools import (
+    _git_lines,
+    find_git_dir,
+    find_worktree_root,
+    get_staged_changes,
+    get_staged_changes_with_counts,
+)
+from yagnidrift.timing import span
+from yagnidrift.workgraph import find_graph_task, load_graph_tasks, locate_workgraph_dir
+
+# Pre-commit mode: only what the commit would record (the index against HEAD, one `git diff --cached`)
+# is scored. The spec is the task's (`--task`, $YAGNIDRIFT_TASK), else the repo's `.yagnidrift.toml`,
+# else the one in-progress task carrying a block. A task's blocks are cached under the workgraph state
+# dir keyed on graph.jsonl's stat, so a commit costs one diff (plus an ls-tree limited to the parents of
+# new files) and no graph read or `wg`. Nothing is written to task state, history or follow-ups. The
+# classifier is imported only once a spec applies: most commits have none. Specs are cached with their
+# parsed TOML tables (the repo config's under the git dir, keyed on its text), so a commit does not
+# import the TOML parser either.
+
+REPO_CONFIG = ".yagnidrift.toml"
+TASK_ENV = "YAGNIDRIFT_TASK"
+ACTIVE_STATUS = "in-progress"
+HOOK_MARKER = "# yagnidrift pre-commit hook"
+
+
+@dataclass(frozen=True)
+class HookSpec:
+    source: str
+    blocks: tuple[str, ...]
+    task_id: str | None = None
+    title: str | None = None
+    scope: tuple[str, ...] | None = None
+    raw: dict[str, Any] | None = None  # merged tables of `blocks`, when they round-trip through JSON
+
+
+def _raw_tables(blocks: tuple[str, ...]) -> dict[str, Any] | None:
+    from yagnidrift.specs import merge_yagnidrift_blocks
+
+    try:
+        raw = merge_yagnidrift_blocks(blocks)
+        json.dumps(raw)  # TOML dates and times do not
+    except (TypeError, ValueError):
+        return None
+    return raw
+
+
+def _read_cache(path: Path) -> Any:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(path: Path, entry: dict[str, Any]) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(entry), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _graph_stat(wg_dir: Path) -> list[int] | None:
+    try:
+        st = os.stat(wg_dir / "graph.jsonl")
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+def _task_spec(task: dict[str, Any], task_id: str) -> HookSpec | None:
+    from yagnidrift.scope import resolve_scope
+    from yagnidrift.specs import extract_yagnidrift_blocks, load_yagnidrift_spec
+
+    description = str(task.get("description") or "")
+    blocks = extract_yagnidrift_blocks(description)
+    if not blocks:
+        return None
+    try:
+        scope: tuple[str, ...] | None = resolve_scope(load_yagnidrift_spec(blocks), description)
+    except Exception:
+        scope = None  # reported when the spec is loaded for the check
+    return HookSpec(f"task:{task_id}", blocks, task_id, str(task.get("title") or task_id), scope, _raw_tables(blocks))
+
+
+def _active_task(wg_dir: Path) -> HookSpec | None:
+    graph = load_graph_tasks(wg_dir) or {}
+    specs = [
+        spec
+        for task_id, task in graph.items()
+        if str(task.get("status") or "") == ACTIVE_STATUS and (spec := _task_spec(task, task_id)) is not None
+    ]
+    return specs[0] if len(specs) == 1 else None
+
+
+def _cached_task_spec(wg_dir: Path, wanted: str | None) -> HookSpec | None:
+    # `wanted` is an explicit task id, or None for the active task.
+    stat = _graph_stat(wg_dir)
+    cache_path = wg_dir / ".yagnidrift" / "hook-spec.json"
+    cached = _read_cache(cache_path)
+    if isinstance(cached, dict) and stat is not None and cached.get("graph") == stat and cached.get("wanted") == wanted:
+        hit = cached.get("spec")
+        if not hit:
+            return None
+        return HookSpec(
+            hit["source"],
+            tuple(hit["blocks"]),
+            hit.get("task_id"),
+            hit.get("title"),
+            tuple(hit["scope"]) if hit.get("scope") is not None else None,
+            hit.get("raw"),
+        )
+
+    with span("load_graph"):
+        if wanted is not None:
+            task = find_graph_task(wg_dir, wanted)
+            spec = _task_spec(task, wanted) if task is not None else None
+        else:
+            spec = _active_task(wg_dir)
+    if stat is not None:
+        entry = {
+            "graph": stat,
+            "wanted": wanted,
+            "spec": None
+            if spec is None
+            else {
+                "source": spec.source,
+                "blocks": list(spec.blocks),
+                "task_id": spec.task_id,
+                "title": spec.title,
+                "scope": list(spec.scope) if spec.scope is not None else None,
+                "raw": spec.raw,
+            },
+        }
+        _write_cache(cache_path, entry)
+    return spec
+
+
+def _repo_spec(worktree: Path, text: str) -> HookSpec:
+    git_dir = find_git_dir(worktree)
+    cache_path = git_dir / "yagnidrift" / "repo-spec.json" if git_dir is not None else None
+    cached = _read_cache(cache_path) if cache_path is not None else None
+    if isinstance(cached, dict) and cached.get("text") == text:
+        return HookSpec(REPO_CONFIG, (text,), raw=cached.get("raw"))
+    raw = _raw_tables((text,))
+    if cache_path is not None:
+        _write_cache(cache_path, {"text": text, "raw": raw})
+    return HookSpec(REPO_CONFIG, (text,), raw=raw)
+
+
+def resolve_hook_spec(worktree: Path, wg_dir: Path | None, task_id: str | None) -> HookSpec | None:
+    task_id = task_id or os.environ.get(TASK_ENV) or None
+    if task_id and wg_dir is not None:
+        spec = _cached_task_spec(wg_dir, task_id)
+        if spec is not None:
+            return spec
+    try:
+        text = (worktree / REPO_CONFIG).read_text(encoding="utf-8")
+    except OSError:
+        text = None
+    if text is not None:
+        return _repo_spec(worktree, text)
+    if not task_id and wg_dir is not None:
+        return _cached_task_spec(wg_dir, None)
+    return None
+
+
+def _ancestors(paths: list[str]) -> set[str]:
+    out: set[str] = set()
+    for path in paths:
+        parent = posixpath.dirname(path)
+        while parent and parent not in out:
+            out.add(parent)
+            parent = posixpath.dirname(parent)
+    return out
+
+
+def run_hook(project_dir: Path, *, task_id: str | None = None) -> dict[str, Any] | None:
+    # The report for the staged changes, or None when no spec applies. Raises ValueError outside a
+    # git worktree or when the spec does not parse.
+    worktree = find_worktree_root(project_dir)
+    if worktree is None:
+        raise ValueError(f"not inside a git worktree: {project_dir}")
+    git_root = str(worktree)
+    wg_dir = locate_workgraph_dir(str(worktree))
+
+    with span("hook_spec"):
+        source = resolve_hook_spec(worktree, wg_dir, task_id)
+        if source is None:
+            return None
+        from yagnidrift.specs import YagnidriftSpec, load_yagnidrift_spec
+
+        try:
+            if source.raw is not None:
+                spec = YagnidriftSpec.from_raw(source.raw)
+            else:
+                spec = load_yagnidrift_spec(source.blocks)
+        except Exception as e:
+            raise ValueError(f"invalid yagnidrift spec ({source.source}): {e}") from None
+
+    from yagnidrift.dirindex import tracked_among
+    from yagnidrift.drift import compute_yagni_drift
+    from yagnidrift.scope import scope_changes
+
+    line_counts = None
+    with span("git_changes"):
+        if spec.has_loc_budget:
+            changes, line_counts = get_staged_changes_with_counts(git_root)
+        else:
+            changes = get_staged_changes(git_root)
+    scope = source.scope if source.scope is not None else tuple(spec.scope)
+    if scope:
+        changes = scope_changes(changes, scope)
+
+    dirs = None
+    if changes.new_files:
+        # Only the ancestors of new files matter, which is far less than the tree's directory list.
+        with span("tracked_dirs"):
+            dirs = tracked_among(git_root, _ancestors(changes.new_files))
+
+    with span("classify"):
+        report = compute_yagni_drift(
+            task_id=source.task_id or "",
+            task_title=source.title or REPO_CONFIG,
+            description="",
+            spec=spec,
+            git_root=git_root,
+            changes=changes,
+            tracked_dirs=dirs,
+            line_counts=line_counts,
+        )
+    report["telemetry"]["hook"] = {"spec": source.source, "staged_files": len(changes.changed_files)}
+    if scope:
+        report["telemetry"]["scope"] = list(scope)
+    return report
+
+
+def hooks_dir(git_root: str) -> Path | None:
+    # Honours core.hooksPath and linked worktrees.
+    lines = _git_lines(["rev-parse", "--git-path", "hooks"], cwd=git_root)
+    if not lines:
+        return None
+    path = Path(lines[0].strip())
+    return path if path.is_absolute() else Path(git_root) / path
+
+
+def hook_script(*, strict: bool) -> str:
+    # Runs this interpreter on this copy of the package, whether or not it is installed. The check needs
+    # nothing else, so -S skips site-packages setup (a few ms of every commit).
+    package_parent = str(Path(__file__).resolve().parent.parent)
+    args = " --strict" if strict else ""
+    return (
+        "#!/bin/sh\n"
+        f"{HOOK_MARKER} (installed by `yagnidrift hook --install`)\n"
+        f'PYTHONPATH={shlex.quote(package_parent)}"${{PYTHONPATH:+:$PYTHONPATH}}" '
+        f"exec {shlex.quote(sys.executable)} -S -m yagnidrift.cli hook{args}\n"
+    )
+
+
+def install_hook(git_root: str, *, strict: bool = False, force: bool = False) -> Path:
+    hooks = hooks_dir(git_root)
+    if hooks is None:
+        raise ValueError(f"not a git repository: {git_root}")
+    path = hooks / "pre-commit"
+    if path.exists() and not force and HOOK_MARKER not in path.read_text(encoding="utf-8", errors="replace"):
+        raise ValueError(f"{path} exists and was not installed by yagnidrift (pass --force to replace it)")
+    hooks.mkdir(parents=True, exist_ok=True)
+    path.write_text(hook_script(strict=strict), encoding="utf-8")
+    path.chmod(0o755)
+    return path
+
+
+def uninstall_hook(git_root: str) -> Path | None:
+    # Removes the pre-commit hook only if yagnidrift installed it; returns the removed path.
+    hooks = hooks_dir(git_root)
+    path = hooks / "pre-commit" if hooks is not None else None
+    if path is None or not path.exists() or HOOK_MARKER not in path.read_text(encoding="utf-8", errors="replace"):
+        return None
+    path.unlink()
+    return path
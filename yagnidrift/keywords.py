@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import PurePosixPath
+
+
+@dataclass(frozen=True)
+class KeywordHit:
+    keyword: str
+    segment: str
+    offset: int
+
+
+def _alternation(tokens: list[str]) -> re.Pattern[str] | None:
+    if not tokens:
+        return None
+    # Longest first so the reported keyword is the most specific one at a given position.
+    ordered = sorted(set(tokens), key=lambda t: (-len(t), t))
+    return re.compile("|".join(re.escape(t) for t in ordered))
+
+
+class KeywordScanner:
+    __slots__ = ("keywords", "_parts_re", "_stem_re")
+
+    def __init__(self, keywords: tuple[str, ...]) -> None:
+        self.keywords = keywords
+        tokens = [t for t in (str(kw).strip().lower() for kw in keywords) if t and "/" not in t]
+        # Path parts are scanned with "-" folded to "_", so hyphenated keywords can only ever hit the
+        # unfolded file stem; everything else is found in one pass over the folded path.
+        self._parts_re = _alternation([t for t in tokens if "-" not in t])
+        self._stem_re = _alternation([t for t in tokens if "-" in t])
+
+    def find(self, path: str) -> KeywordHit | None:
+        low = path.lower()
+        if self._parts_re is not None:
+            folded = low.replace("-", "_")
+            m = self._parts_re.search(folded)
+            if m is not None:
+                start = folded.rfind("/", 0, m.start()) + 1
+                end = folded.find("/", m.end())
+                segment = folded[start:] if end < 0 else folded[start:end]
+                return KeywordHit(keyword=m.group(0), segment=segment, offset=m.start() - start)
+        if self._stem_re is not None:
+            stem = PurePosixPath(low).stem
+            m = self._stem_re.search(stem)
+            if m is not None:
+                return KeywordHit(keyword=m.group(0), segment=stem, offset=m.start())
+        return None
+
+
+@lru_cache(maxsize=128)
+def compile_keywords(keywords: tuple[str, ...]) -> KeywordScanner:
+    return KeywordScanner(keywords)
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import sys
+from collections.abc import Iterable, Iterator
+
+from yagnidrift.globmatch import GlobSet
+
+# The change set as a tree of path segments. Each directory prefix is stored once and segments are
+# interned, so the thousands of paths under one new directory share their ancestors. Walks skip
+# subtrees an ignore pattern covers whole (`vendor/**`) and subtrees with nothing of the wanted kind,
+# and each node carries the number of new files at or below it for per-directory rollups.
+
+CHANGED = 1
+NEW = 2
+
+
+class PathNode:
+    __slots__ = ("children", "flags", "new_files")
+
+    def __init__(self) -> None:
+        self.children: dict[str, PathNode] | None = None
+        # CHANGED / NEW when this path is itself in the change set.
+        self.flags = 0
+        self.new_files = 0
+
+
+class PathTrie:
+    __slots__ = ("root", "size")
+
+    def __init__(self) -> None:
+        self.root = PathNode()
+        self.size = 0
+
+    @classmethod
+    def from_changes(cls, changed_files: Iterable[str], new_files: Iterable[str]) -> "PathTrie":
+        # From sorted lists (as git_tools returns them) every walk also yields paths in sorted order:
+        # children keep insertion order, and all paths below a directory are contiguous in a sorted list.
+        trie = cls()
+        for paths, flag in ((changed_files, CHANGED), (new_files, NEW)):
+            # Runs of files in one directory share its trail, so most paths cost one dict lookup.
+            last_dir: str | None = None
+            trail: list[PathNode] = []
+            for path in paths:
+                dir_path, _, name = path.rpartition("/")
+                if dir_path != last_dir:
+                    trail = trie._trail(dir_path)
+                    last_dir = dir_path
+                trie._mark(trail, name, flag)
+        return trie
+
+    def add(self, path: str, flag: int) -> None:
+        dir_path, _, name = path.rpartition("/")
+        self._mark(self._trail(dir_path), name, flag)
+
+    def _trail(self, dir_path: str) -> list[PathNode]:
+        # The root and every node down to `dir_path`, created as needed.
+        node = self.root
+        trail = [node]
+        for seg in dir_path.split("/"):
+            if not seg:
+                continue
+            children = node.children
+            if children is None:
+                children = node.children = {}
+            child = children.get(seg)
+            if child is None:
+                child = children[sys.intern(seg)] = PathNode()
+            node = child
+            trail.append(node)
+        return trail
+
+    def _mark(self, trail: list[PathNode], name: str, flag: int) -> None:
+        parent = trail[-1]
+        if not name:
+            return
+        children = parent.children
+        if children is None:
+            children = parent.children = {}
+        node = children.get(name)
+        if node is None:
+            node = children[sys.intern(name)] = PathNode()
+        if not node.flags:
+            self.size += 1
+        if flag & NEW and not node.flags & NEW:
+            node.new_files += 1
+            for n in trail:
+                n.new_files += 1
+        node.flags |= flag
+
+    def _node(self, path: str) -> PathNode | None:
+        node: PathNode | None = self.root
+        for seg in path.split("/"):
+            if not seg:
+                continue
+            children = node.children if node is not None else None
+            node = children.get(seg) if children else None
+            if node is None:
+                return None
+        return node
+
+    def __contains__(self, path: object) -> bool:
+        node = self._node(path) if isinstance(path, str) else None
+        return node is not None and node is not self.root and node.flags != 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def new_files_under(self, dir_path: str) -> int:
+        node = self._node(dir_path)
+        return node.new_files if node is not None else 0
+
+    def _walk(
+        self, flag: int, ignore: GlobSet | None, skip_top: frozenset[str]
+    ) -> Iterator[tuple[str, PathNode, bool]]:
+        # Pre-order (path, node, kept) for every node the walk enters; `kept` says whether the node's
+        # own path has `flag` and is not ignored.
+        stack: list[tuple[str, PathNode]] = []
+        top = self.root.children or {}
+        for name in reversed(top):
+            if name not in skip_top and not (ignore is not None and ignore.covers(name, name)):
+                stack.append((name, top[name]))
+        while stack:
+            path, node = stack.pop()
+            if flag == NEW and not node.new_files:
+                continue
+            kept = bool(node.flags & flag) and not (ignore is not None and ignore.match(path))
+            yield path, node, kept
+            children = node.children
+            if not children:
+                continue
+            for name in reversed(children):
+                child_path = f"{path}/{name}"
+                if ignore is not None and ignore.covers(child_path, name):
+                    continue
+                stack.append((child_path, children[name]))
+
+    def paths(
+        self, flag: int, *, ignore: GlobSet | None = None, skip_top: frozenset[str] = frozenset()
+    ) -> Iterator[str]:
+        # Paths carrying `flag`, minus those `ignore` matches; top-level names in `skip_top` are not entered.
+        for path, _node, kept in self._walk(flag, ignore, skip_top):
+            if kept:
+                yield path
+
+    def new_file_rollup(
+        self, *, ignore: GlobSet | None = None, skip_top: frozenset[str] = frozenset()
+    ) -> dict[str, int]:
+        # Directory -> new files at or below it that `ignore` keeps, for every directory holding one.
+        order = list(self._walk(NEW, ignore, skip_top))
+        pending: dict[str, int] = {}
+        rollup: dict[str, int] = {}
+        # Descendants follow their directory in pre-order, so the reverse pass completes each subtree first.
+        for path, node, kept in reversed(order):
+            n = pending.pop(path, 0) + kept
+            if not n:
+                continue
+            if node.children:
+                rollup[path] = n
+            slash = path.rfind("/")
+            if slash > 0:
+                parent = path[:slash]
+                pending[parent] = pending.get(parent, 0) + n
+        return rollup
+
+
+def hotspots(rollup: dict[str, int], *, limit: int = 5) -> list[dict[str, object]]:
+    # Directories where new files fan out: no single subdirectory holds all of them. A chain like
+    # a -> a/b -> a/b/c with the same count reports only the deepest link.
+    funnels = set()
+    for path, n in rollup.items():
+        slash = path.rfind("/")
+        if slash > 0 and rollup.get(path[:slash]) == n:
+            funnels.add(path[:slash])
+    spots = sorted(((n, p) for p, n in rollup.items() if p not in funnels), key=lambda x: (-x[0], x[1]))
+    return [{"dir": p, "new_files": n} for n, p in spots[:limit]]
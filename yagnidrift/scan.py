@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import glob
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import time
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from yagnidrift.checks import CheckOptions
+
+
+def expand_dirs(dirs: list[str], patterns: list[str]) -> list[str]:
+    out: list[str] = []
+    seen: set[str] = set()
+    candidates = list(dirs)
+    for pattern in patterns:
+        candidates.extend(sorted(glob.glob(os.path.expanduser(pattern))))
+    for d in candidates:
+        key = os.path.realpath(d)
+        if key in seen or not os.path.isdir(d):
+            continue
+        seen.add(key)
+        out.append(d)
+    return out
+
+
+def _scan_worker(project_dir: str, options: CheckOptions, conn: Any) -> None:
+    # Own process group, so a timeout can take down git children along with the worker.
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    try:
+        from yagnidrift.checks import CheckContext
+
+        combined = CheckContext.discover(project_dir).check_all([], include_closed=False, options=options)
+        conn.send({"status": "ok", "report": combined})
+    except BaseException as e:
+        conn.send({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def _kill(proc: multiprocessing.process.BaseProcess) -> None:
+    if proc.pid is not None and hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+    proc.kill()
+    proc.join(5)
+
+
+class _Running:
+    __slots__ = ("dir", "proc", "conn", "started", "deadline")
+
+    def __init__(self, dir: str, proc: Any, conn: Any, started: float, deadline: float | None) -> None:
+        self.dir = dir
+        self.proc = proc
+        self.conn = conn
+        self.started = started
+        self.deadline = deadline
+
+
+def scan_repos(
+    dirs: list[str], *, jobs: int, timeout: float | None, options: CheckOptions
+) -> Iterator[dict[str, Any]]:
+    # Yields one result per directory, in completion order, with at most `jobs` repos in flight.
+    mp = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+    pending = list(reversed(dirs))
+    running: dict[Any, _Running] = {}
+
+    def _result(run: _Running, status: str, **extra: Any) -> dict[str, Any]:
+        return {
+            "type": "repo",
+            "dir": run.dir,
+            "status": status,
+            "elapsed_s": round(time.monotonic() - run.started, 3),
+            **extra,
+        }
+
+    try:
+        while pending or running:
+            while pending and len(running) < max(1, jobs):
+                d = pending.pop()
+                recv_conn, send_conn = mp.Pipe(duplex=False)
+                proc = mp.Process(target=_scan_worker, args=(d, options, send_conn), daemon=True)
+                proc.start()
+                send_conn.close()
+                now = time.monotonic()
+                running[recv_conn] = _Running(d, proc, recv_conn, now, now + timeout if timeout else None)
+
+            deadlines = [r.deadline for r in running.values() if r.deadline is not None]
+            wait_s = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            for conn in multiprocessing.connection.wait(list(running), timeout=wait_s):
+                run = running.pop(conn)  # type: ignore[arg-type]
+                try:
+                    msg = run.conn.recv()
+                except (EOFError, OSError):
+                    run.proc.join(5)
+                    msg = {"status": "error", "error": f"worker exited with code {run.proc.exitcode}"}
+                run.conn.close()
+                run.proc.join(5)
+                yield _result(run, **msg)
+
+            now = time.monotonic()
+            for conn, run in list(running.items()):
+                if run.deadline is not None and now >= run.deadline:
+                    running.pop(conn)
+                    _kill(run.proc)
+                    run.conn.close()
+                    yield _result(run, "timeout", error=f"no result after {timeout}s")
+    finally:
+        for run in running.values():
+            _kill(run.proc)
+            run.conn.close()
+
+
+def summarize_scan(results: list[dict[str, Any]], *, elapsed_s: float) -> dict[str, Any]:
+    tasks_checked = 0
+    tasks_with_findings = 0
+    statuses = {"ok": 0, "error": 0, "timeout": 0}
+    for r in results:
+        statuses[r["status"]] = statuses.get(r["status"], 0) + 1
+        summary = (r.get("report") or {}).get("summary") or {}
+        tasks_checked += int(summary.get("tasks_checked") or 0)
+        tasks_with_findings += int(summary.get("tasks_with_findings") or 0)
+    return {
+        "type": "summary",
+        "repos": len(results),
+        **statuses,
+        "tasks_checked": tasks_checked,
+        "tasks_with_findings": tasks_with_findings,
+        "elapsed_s": round(elapsed_s, 3),
+    }
+
+
+def default_jobs() -> int:
+    return max(1, min(8, os.cpu_count() or 1))
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+from yagnidrift.contracts import extract_contract_touch
+from yagnidrift.git_tools import WorkingChanges
+from yagnidrift.globmatch import GLOB_CHARS, GlobSet, compile_patterns
+from yagnidrift.specs import YagnidriftSpec, extract_yagnidrift_blocks, load_yagnidrift_spec
+
+# A task's scope is the yagnidrift `scope` list, or else its wg-contract `touch` list. Changes outside
+# the scope are not the task's. The literal directory prefix of each entry doubles as a git pathspec,
+# so a batch of scoped tasks can be collected with a few narrow `git status` calls instead of one
+# walk of the whole worktree.
+
+# More shards than this stop paying for themselves: every one re-reads the index.
+MAX_SHARDS = 8
+
+
+def resolve_scope(spec: YagnidriftSpec, description: str) -> tuple[str, ...]:
+    return tuple(spec.scope) or extract_contract_touch(description)
+
+
+def task_scope(description: str) -> tuple[str, ...]:
+    # Scope of a task before it is evaluated (specs are memoized, so this parses nothing twice).
+    blocks = extract_yagnidrift_blocks(description)
+    if not blocks:
+        return ()
+    try:
+        spec = load_yagnidrift_spec(blocks)
+    except Exception:
+        return ()
+    return resolve_scope(spec, description)
+
+
+@lru_cache(maxsize=256)
+def scope_matcher(scope: tuple[str, ...]) -> GlobSet:
+    # A plain path covers itself and everything below it, like a pathspec.
+    patterns: list[str] = []
+    for entry in scope:
+        entry = entry.strip("/")
+        patterns.append(entry)
+        if not entry.endswith("**"):
+            patterns.append(f"{entry}/**")
+    return compile_patterns(tuple(patterns))
+
+
+def scope_changes(changes: WorkingChanges, scope: tuple[str, ...]) -> WorkingChanges:
+    m = scope_matcher(scope)
+    return WorkingChanges(
+        changed_files=[p for p in changes.changed_files if m.match(p)],
+        new_files=[p for p in changes.new_files if m.match(p)],
+        bulk_dirs=[d for d in changes.bulk_dirs if any(m.match(p) for p in d.examples)],
+    )
+
+
+def literal_prefix(pattern: str) -> str:
+    # Leading segments free of glob characters: "src/api/**/*.py" -> "src/api", "**/x" -> "".
+    out: list[str] = []
+    for part in pattern.strip("/").split("/"):
+        if not part or GLOB_CHARS.intersection(part):
+            break
+        out.append(part)
+    return "/".join(out)
+
+
+def scope_prefixes(scope: tuple[str, ...]) -> tuple[str, ...] | None:
+    # Minimal set of directory prefixes covering the scope; None when the task is unscoped or some
+    # entry could match anywhere.
+    if not scope:
+        return None
+    prefixes = set()
+    for entry in scope:
+        prefix = literal_prefix(entry)
+        if not prefix:
+            return None
+        prefixes.add(prefix)
+    return _minimal(prefixes)
+
+
+def _covers(a: str, b: str) -> bool:
+    return a == b or b.startswith(a + "/")
+
+
+def _minimal(prefixes: set[str]) -> tuple[str, ...]:
+    out: list[str] = []
+    for p in sorted(prefixes):  # an ancestor sorts before its descendants
+        if not out or not _covers(out[-1], p):
+            out.append(p)
+    return tuple(out)
+
+
+def to_pathspecs(prefixes: tuple[str, ...]) -> list[str]:
+    return [f":(literal){p}" for p in prefixes]
+
+
+def plan_shards(prefixes: list[tuple[str, ...] | None]) -> list[tuple[list[int], tuple[str, ...]]] | None:
+    # Partitions tasks (by index) into shards whose prefix sets do not overlap, each with the prefixes
+    # to collect. None means some task is unscoped and one full collection serves everything.
+    if not prefixes or any(p is None for p in prefixes):
+        return None
+    # Union-find over tasks: two tasks share a shard when any of their prefixes overlap.
+    parent = list(range(len(prefixes)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    owners = sorted((p, i) for i, ps in enumerate(prefixes) for p in ps or ())
+    stack: list[tuple[str, int]] = []
+    for p, i in owners:
+        while stack and not _covers(stack[-1][0], p):
+            stack.pop()
+        if stack:
+            parent[find(i)] = find(stack[-1][1])
+        stack.append((p, i))
+
+    groups: dict[int, list[int]] = {}
+    for i in range(len(prefixes)):
+        groups.setdefault(find(i), []).append(i)
+    shards = [(tasks, _minimal({p for i in tasks for p in prefixes[i] or ()})) for tasks in groups.values()]
+    while len(shards) > MAX_SHARDS:
+        # Fold the two smallest shards together; their prefixes stay disjoint from the rest.
+        shards.sort(key=lambda s: len(s[1]))
+        (a_tasks, a_prefixes), (b_tasks, b_prefixes) = shards[0], shards[1]
+        shards[:2] = [(sorted(a_tasks + b_tasks), _minimal(set(a_prefixes) | set(b_prefixes)))]
+    return sorted(shards, key=lambda s: s[0][0])
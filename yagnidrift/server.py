@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+# This module is imported by the CLI before it knows whether a daemon is running, so the client
+# half must stay stdlib-only; the check engine is imported lazily inside `serve`.
+
+_MAX_UNIX_PATH = 100
+
+# A daemon that accepts but never answers (wedged, or stopped with SIGSTOP) must not hang the CLI: after this many
+# seconds without a byte the client gives up and the caller checks in-process instead.
+DEFAULT_READ_TIMEOUT = 30.0
+
+
+def runtime_dir() -> Path:
+    # Per-user home for sockets that do not fit under the workgraph: $XDG_RUNTIME_DIR is private by spec, the
+    # temp-dir fallback is created 0700 by `serve` and verified there.
+    xdg = os.environ.get("XDG_RUNTIME_DIR")
+    if xdg and os.path.isabs(xdg) and os.path.isdir(xdg):
+        return Path(xdg)
+    return Path(tempfile.gettempdir()) / f"yagnidrift-{os.getuid()}"
+
+
+def default_socket_path(wg_dir: Path) -> Path:
+    path = wg_dir / ".yagnidrift" / "serve.sock"
+    if len(os.fsencode(path)) <= _MAX_UNIX_PATH:
+        return path
+    # AF_UNIX paths are limited to ~108 bytes; deep checkouts get a stable name in the runtime dir.
+    digest = hashlib.sha1(os.fsencode(wg_dir.resolve())).hexdigest()[:16]
+    return runtime_dir() / f"yagnidrift-{digest}.sock"
+
+
+def _ensure_private_dir(path: Path) -> None:
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise RuntimeError(f"refusing to use {path} for the daemon socket: not a private directory owned by this user")
+
+
+def request(
+    socket_path: Path,
+    payload: dict[str, Any],
+    *,
+    connect_timeout: float = 0.5,
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+) -> dict[str, Any] | None:
+    # Returns None when no daemon answers, so callers can fall back to running in-process.
+    try:
+        st = os.lstat(socket_path)
+    except OSError:
+        return None
+    # Only talk to a socket this user created: anything else could be another user's listener.
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(connect_timeout)
+        try:
+            sock.connect(os.fspath(socket_path))
+        except OSError:
+            return None
+        sock.settimeout(read_timeout)
+        sock.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    except OSError:
+        return None
+    finally:
+        sock.close()
+    if not line:
+        return None
+    try:
+        resp = json.loads(line)
+    except ValueError:
+        return None
+    return resp if isinstance(resp, dict) else None
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "CheckServer"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                req = json.loads(line)
+                resp = self.server.dispatch(req if isinstance(req, dict) else {})
+            except Exception as e:
+                resp = {"ok": False, "error": str(e)}
+            self.wfile.write((json.dumps(resp, sort_keys=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class CheckServer(socketserver.UnixStreamServer):
+    # Requests are handled one at a time: checks share one warm context and snapshot.
+    def __init__(self, socket_path: Path, ctx: Any) -> None:
+        self.ctx = ctx
+        self.requests_served = 0
+        self.started_at = time.time()
+        super().__init__(os.fspath(socket_path), _Handler)
+
+    def dispatch(self, req: dict[str, Any]) -> dict[str, Any]:
+        op = str(req.get("op") or "")
+        self.requests_served += 1
+        if op == "ping":
+            return {
+                "ok": True,
+                "pid": os.getpid(),
+                "wg_dir": os.fspath(self.ctx.wg_dir),
+                "uptime_s": round(time.time() - self.started_at, 3),
+                "requests_served": self.requests_served,
+                "watch": self.ctx.tracker.backend if getattr(self.ctx, "tracker", None) else "off",
+            }
+        if op == "shutdown":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"ok": True}
+
+        from yagnidrift.checks import CheckOptions
+        from yagnidrift.timing import recording
+
+        options = CheckOptions(
+            write_log=bool(req.get("write_log")),
+            create_followups=bool(req.get("create_followups")),
+            use_cache=not req.get("no_cache"),
+            base=str(req["base"]) if req.get("base") else None,
+            collapse_untracked=bool(req.get("collapse_untracked")),
+            native_index=bool(req.get("native_index")),
+        )
+        with recording() as timings:
+            if op == "check":
+                report = self.ctx.check_task(str(req["task"]), options)
+            elif op == "check-all":
+                report = self.ctx.check_all(
+                    [str(t) for t in (req.get("tasks") or [])],
+                    include_closed=bool(req.get("include_closed")),
+                    options=options,
+                )
+            else:
+                return {"ok": False, "error": f"unknown op: {op!r}"}
+        if req.get("timings"):
+            report.setdefault("telemetry", {})["timings"] = timings.to_dict()
+        return {"ok": True, "report": report}
+
+
+def serve(wg_dir: Path, *, socket_path: Path | None = None, snapshot_ttl: float = 0.0, watch: str = "off") -> int:
+    path = socket_path or default_socket_path(wg_dir)
+    if request(path, {"op": "ping"}) is not None:
+        raise RuntimeError(f"yagnidrift daemon already running on {path}")
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    if path.parent == runtime_dir():
+        _ensure_private_dir(path.parent)
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    from yagnidrift.checks import WarmCheckContext
+
+    ctx = WarmCheckContext(wg_dir, snapshot_ttl=snapshot_ttl, watch=watch)
+    server = CheckServer(path, ctx)
+
+    def _stop(signum: int, frame: Any) -> None:
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _stop)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        ctx.close()
+        try:
+            path.unlink()
+        except OSError:
+            pass
+    return 0
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import re
-import tomllib
-from dataclasses import dataclass
+import weakref
+from dataclasses import dataclass, field, fields
+from functools import cached_property, lru_cache
 from typing import Any
 
+from yagnidrift.globmatch import GlobSet, compile_patterns
+from yagnidrift.keywords import KeywordScanner, compile_keywords
+
 
 FENCE_INFO = "yagnidrift"
 
@@ -14,20 +18,44 @@ _FENCE_RE = re.compile(
 )
 
 
+_FENCE_MARK = f"```{FENCE_INFO}"
+
+
+def extract_yagnidrift_blocks(description: str) -> tuple[str, ...]:
+    # Most descriptions carry no block at all; a substring test rules them out without the regex.
+    if not description or _FENCE_MARK not in description:
+        return ()
+    return tuple(m.group("body").strip() for m in _FENCE_RE.finditer(description))
+
+
 def extract_yagnidrift_spec(description: str) -> str | None:
-    m = _FENCE_RE.search(description or "")
-    if not m:
-        return None
-    return m.group("body").strip()
+    # Every block's body, in document order (blank-line separated when there are several).
+    blocks = extract_yagnidrift_blocks(description)
+    return "\n\n".join(blocks) if blocks else None
+
+
+def format_yagnidrift_blocks(blocks: tuple[str, ...]) -> str:
+    return "\n".join(f"```{FENCE_INFO}\n{b}\n```" for b in blocks)
 
 
 def parse_yagnidrift_spec(text: str) -> dict[str, Any]:
+    import tomllib  # the pre-commit hook builds cached specs from their tables without it (see hook.py)
+
     data = tomllib.loads(text)
     if not isinstance(data, dict):
         raise ValueError("yagnidrift block must parse to a TOML table/object.")
     return data
 
 
+def merge_yagnidrift_blocks(blocks: tuple[str, ...]) -> dict[str, Any]:
+    # Blocks are merged in document order, top-level keys of later blocks replacing earlier ones
+    # (lists are replaced, not concatenated).
+    raw: dict[str, Any] = {}
+    for block in blocks:
+        raw.update(parse_yagnidrift_spec(block))
+    return raw
+
+
 @dataclass(frozen=True)
 class YagnidriftSpec:
     schema: int
@@ -37,6 +65,24 @@ class YagnidriftSpec:
     abstraction_keywords: list[str]
     allow_paths: list[str]
     ignore: list[str]
+    content_analysis: bool = False
+    max_new_loc: int | None = None
+    max_added_loc: int | None = None
+    # Paths/globs the task may touch; defaults to the wg-contract `touch` list (see scope.py).
+    scope: list[str] = field(default_factory=list)
+
+    # Compiled once per (interned) spec and shared by every task that uses it.
+    @cached_property
+    def ignore_matcher(self) -> GlobSet:
+        return compile_patterns(tuple(self.ignore))
+
+    @cached_property
+    def allow_matcher(self) -> GlobSet:
+        return compile_patterns(tuple(self.allow_paths))
+
+    @cached_property
+    def keyword_scanner(self) -> KeywordScanner:
+        return compile_keywords(tuple(self.abstraction_keywords))
 
     @staticmethod
     def from_raw(raw: dict[str, Any]) -> "YagnidriftSpec":
@@ -58,6 +104,8 @@ class YagnidriftSpec:
         allow_paths = [str(x) for x in (raw.get("allow_paths") or [])]
         ignore = [str(x) for x in (raw.get("ignore") or [])]
         ignore = [*ignore, ".workgraph/**", ".git/**"]
+        max_new_loc = _loc_budget(raw.get("max_new_loc"))
+        max_added_loc = _loc_budget(raw.get("max_added_loc"))
         return YagnidriftSpec(
             schema=schema,
             max_new_files=max_new_files,
@@ -66,4 +114,47 @@ class YagnidriftSpec:
             abstraction_keywords=abstraction_keywords,
             allow_paths=allow_paths,
             ignore=ignore,
+            content_analysis=bool(raw.get("content_analysis", False)),
+            max_new_loc=max_new_loc,
+            max_added_loc=max_added_loc,
+            scope=[str(x) for x in (raw.get("scope") or [])],
         )
+
+    @property
+    def has_loc_budget(self) -> bool:
+        return self.max_new_loc is not None or self.max_added_loc is not None
+
+
+def _loc_budget(value: Any) -> int | None:
+    # Line budgets are opt-in: absent means unlimited (and no line counting at all).
+    if value is None:
+        return None
+    return max(0, int(value))
+
+
+# Identical specs (e.g. one template block pasted into many tasks, or blocks differing only in
+# comments) resolve to one instance, so its compiled matchers are built once.
+_interned: weakref.WeakValueDictionary[tuple, YagnidriftSpec] = weakref.WeakValueDictionary()
+
+
+def _intern(spec: YagnidriftSpec) -> YagnidriftSpec:
+    key = tuple(
+        tuple(v) if isinstance(v, list) else v for v in (getattr(spec, f.name) for f in fields(YagnidriftSpec))
+    )
+    return _interned.setdefault(key, spec)
+
+
+@lru_cache(maxsize=256)
+def _load_blocks(blocks: tuple[str, ...]) -> YagnidriftSpec | Exception:
+    try:
+        return _intern(YagnidriftSpec.from_raw(merge_yagnidrift_blocks(blocks)))
+    except Exception as e:  # cached too: a broken template block is not re-parsed for every task
+        return e
+
+
+def load_yagnidrift_spec(blocks: tuple[str, ...]) -> YagnidriftSpec:
+    # See merge_yagnidrift_blocks. Parsed once per distinct block text.
+    result = _load_blocks(blocks)
+    if isinstance(result, Exception):
+        raise result.with_traceback(None)
+    return result
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextvars import ContextVar
+from typing import Any
+
+# Stage timing for reports (`--timings`) and span tracing (YAGNIDRIFT_TRACE=<file>). Both are off by
+# default; a span then costs one ContextVar lookup.
+
+TRACE_ENV = "YAGNIDRIFT_TRACE"
+
+
+class Timings:
+    def __init__(self) -> None:
+        self.stages: dict[str, float] = {}
+        self.git_calls = 0
+        self.git_s = 0.0
+        self._started = time.perf_counter()
+
+    def add(self, name: str, elapsed: float, *, git: bool = False) -> None:
+        if git:
+            self.git_calls += 1
+            self.git_s += elapsed
+        else:
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "stages_ms": {k: round(v * 1000, 3) for k, v in self.stages.items()},
+            "git": {"calls": self.git_calls, "total_ms": round(self.git_s * 1000, 3)},
+        }
+
+
+class _TraceWriter:
+    # Chrome trace-event "complete" records, one JSON object per line; load with a trace viewer
+    # after wrapping the lines in a JSON array, or analyse them directly.
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, name: str, start: float, elapsed: float, args: dict[str, Any] | None) -> None:
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": round(start * 1e6),
+            "dur": round(elapsed * 1e6),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        line = json.dumps(event) + "\n"
+        with self._lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError:
+                pass
+
+
+_recorder: ContextVar[Timings | None] = ContextVar("yagnidrift_timings", default=None)
+_trace: _TraceWriter | None = _TraceWriter(os.environ[TRACE_ENV]) if os.environ.get(TRACE_ENV) else None
+
+
+def configure_trace(path: str | None) -> None:
+    global _trace
+    _trace = _TraceWriter(path) if path else None
+
+
+@contextlib.contextmanager
+def recording() -> Iterator[Timings]:
+    timings = Timings()
+    token = _recorder.set(timings)
+    try:
+        yield timings
+    finally:
+        _recorder.reset(token)
+
+
+@contextlib.contextmanager
+def span(name: str, *, git: bool = False, **args: Any) -> Iterator[None]:
+    recorder = _recorder.get()
+    trace = _trace
+    if recorder is None and trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if recorder is not None:
+            recorder.add(name, elapsed, git=git)
+        if trace is not None:
+            trace.write(name, time.time() - elapsed, elapsed, args or None)
+
+
+def git_span(args: list[str] | tuple[str, ...]) -> contextlib.AbstractContextManager[None]:
+    sub = next((a for a in args if not a.startswith("-")), "git")
+    return span(f"git {sub}", git=True, argv=list(args))
@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import ctypes
+import errno
+import os
+import struct
+import sys
+from pathlib import Path
+
+from yagnidrift.git_tools import WorkingChanges, common_dir, find_git_dir, iter_status, read_head_oid
+from yagnidrift.gitignore import DirPruner, Sources
+
+# Above this many dirty paths a scoped `git status` stops being cheaper than a full one.
+MAX_SCOPED_PATHS = 2000
+
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_DONT_FOLLOW = 0x02000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+    | _IN_ONLYDIR
+    | _IN_DONT_FOLLOW
+)
+_EVENT = struct.Struct("iIII")
+
+
+class WatchOverflow(Exception):
+    pass
+
+
+def _join(rel_dir: str, name: str) -> str:
+    return f"{rel_dir}/{name}" if rel_dir else name
+
+
+def _pruner(git_dir: Path | None) -> DirPruner | None:
+    # Built fresh per walk: the tracked-path probe reads the index as it is now.
+    if git_dir is None:
+        return None
+    return DirPruner(git_dir, common_dir(git_dir) / "info" / "exclude")
+
+
+def _ignore_files(git_dir: Path | None) -> tuple[object, ...]:
+    # Worktree .gitignore edits show up as events; info/exclude lives in the git dir, so it is stat'ed.
+    if git_dir is None:
+        return ()
+    try:
+        st = os.stat(common_dir(git_dir) / "info" / "exclude")
+    except OSError:
+        return ()
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class PollingWatcher:
+    # Fallback for platforms (or watch limits) without inotify: diffs a stat map of the worktree.
+    # Ignored directories (node_modules, .venv) are not walked, see DirPruner.
+    def __init__(self, root: str, git_dir: Path | None = None) -> None:
+        self.root = root
+        self._git_dir = git_dir
+        self._stats = self._scan()
+
+    def _scan(self) -> dict[str, tuple[int, int, int, int]]:
+        stats: dict[str, tuple[int, int, int, int]] = {}
+        pruner = _pruner(self._git_dir)
+        stack: list[tuple[str, Sources | None]] = [("", pruner.root() if pruner else None)]
+        while stack:
+            rel_dir, sources = stack.pop()
+            try:
+                with os.scandir(os.path.join(self.root, rel_dir) if rel_dir else self.root) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            if pruner is not None:
+                sources = pruner.enter(rel_dir, entries, sources)
+            for entry in entries:
+                if not rel_dir and entry.name == ".git":
+                    continue
+                rel = _join(rel_dir, entry.name)
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if pruner is None or not pruner.prune(rel, sources):
+                        stack.append((rel, sources))
+                else:
+                    stats[rel] = (st.st_mtime_ns, st.st_size, st.st_ino, st.st_mode)
+        return stats
+
+    def rebase(self) -> None:
+        self._stats = self._scan()
+
+    def drain(self) -> set[str]:
+        current = self._scan()
+        previous = self._stats
+        self._stats = current
+        dirty = {p for p, st in current.items() if previous.get(p) != st}
+        dirty.update(p for p in previous if p not in current)
+        return dirty
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    # Ignored directories get no watches (see DirPruner): a large node_modules would otherwise use up
+    # fs.inotify.max_user_watches. Pruned directories are re-checked on rebase, in case the index
+    # started tracking something inside them.
+    def __init__(self, root: str, git_dir: Path | None = None) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        self.root = root
+        self._git_dir = git_dir
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._fd = fd
+        self._dirs: dict[int, str] = {}
+        # Ignore sources that apply to the children of each watched directory, and to each pruned one.
+        self._sources: dict[str, Sources | None] = {}
+        self._pruned: dict[str, Sources | None] = {}
+        try:
+            pruner = _pruner(git_dir)
+            self._watch_tree("", pruner.root() if pruner else None, pruner)
+        except Exception:
+            self.close()
+            raise
+
+    def _watch_tree(self, rel_dir: str, sources: Sources | None, pruner: DirPruner | None) -> list[str]:
+        # Returns the files found while adding watches, so callers can mark a new subtree dirty.
+        # `sources` are the ignore rules that apply to `rel_dir` itself (its parent's).
+        found: list[str] = []
+        stack = [(rel_dir, sources)]
+        while stack:
+            rel, sources = stack.pop()
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(os.path.join(self.root, rel) if rel else self.root), _WATCH_MASK
+            )
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                    continue
+                raise OSError(err, os.strerror(err))
+            self._dirs[wd] = rel
+            try:
+                with os.scandir(os.path.join(self.root, rel) if rel else self.root) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            if pruner is not None:
+                sources = pruner.enter(rel, entries, sources)
+            self._sources[rel] = sources
+            for entry in entries:
+                if not rel and entry.name == ".git":
+                    continue
+                child = _join(rel, entry.name)
+                if not entry.is_dir(follow_symlinks=False):
+                    found.append(child)
+                elif pruner is not None and pruner.prune(child, sources):
+                    self._pruned[child] = sources
+                else:
+                    stack.append((child, sources))
+        return found
+
+    def rebase(self) -> None:
+        try:
+            self.drain()
+        except WatchOverflow:
+            pass
+        pruner = _pruner(self._git_dir)
+        if pruner is None:
+            return
+        for rel, sources in list(self._pruned.items()):
+            if not pruner.prune(rel, sources):
+                del self._pruned[rel]
+                self._watch_tree(rel, sources, pruner)
+
+    def drain(self) -> set[str]:
+        dirty: set[str] = set()
+        overflow = False
+        pruner: DirPruner | None = None
+        while True:
+            try:
+                buf = os.read(self._fd, 1 << 16)
+            except BlockingIOError:
+                break
+            if not buf:
+                break
+            offset = 0
+            while offset + _EVENT.size <= len(buf):
+                wd, mask, _cookie, length = _EVENT.unpack_from(buf, offset)
+                offset += _EVENT.size
+                name = os.fsdecode(buf[offset : offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & _IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                rel_dir = self._dirs.get(wd)
+                if rel_dir is None:
+                    continue
+                if mask & _IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    self._sources.pop(rel_dir, None)
+                    continue
+                if not name:
+                    if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF) and rel_dir:
+                        dirty.add(rel_dir)
+                    continue
+                path = _join(rel_dir, name)
+                if not rel_dir and name == ".git":
+                    continue
+                dirty.add(path)
+                if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                    if pruner is None:
+                        pruner = _pruner(self._git_dir)
+                    sources = self._sources.get(rel_dir)
+                    if pruner is not None and pruner.prune(path, sources):
+                        self._pruned[path] = sources
+                    else:
+                        dirty.update(self._watch_tree(path, sources, pruner))
+        if overflow:
+            raise WatchOverflow()
+        return dirty
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class ChangeTracker:
+    # Seeds WorkingChanges from one `git status`, then keeps it current from filesystem events:
+    # each snapshot re-asks git only about the paths that changed since the last one. A moved
+    # HEAD or rewritten index (commit, add, checkout, reset) triggers a full re-seed.
+    def __init__(self, git_root: str, *, mode: str = "auto") -> None:
+        self.git_root = git_root
+        self._git_dir = find_git_dir(Path(git_root))
+        self.mode = mode
+        self._ignores = _ignore_files(self._git_dir)
+        self._watcher = self._make_watcher(mode)
+        self._changed: set[str] = set()
+        self._new: set[str] = set()
+        self._renames: dict[str, str] = {}
+        self._anchor: tuple[object, ...] | None = None
+        self.full_scans = 0
+        self.scoped_scans = 0
+        self._reseed()
+
+    def _make_watcher(self, mode: str) -> InotifyWatcher | PollingWatcher:
+        if mode in ("auto", "inotify"):
+            try:
+                return InotifyWatcher(self.git_root, self._git_dir)
+            except OSError:
+                if mode == "inotify":
+                    raise
+        return PollingWatcher(self.git_root, self._git_dir)
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if isinstance(self._watcher, InotifyWatcher) else "poll"
+
+    def _read_anchor(self) -> tuple[object, ...]:
+        if self._git_dir is None:
+            return ()
+        try:
+            st = os.stat(self._git_dir / "index")
+            index: tuple[int, ...] = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            index = ()
+        return (read_head_oid(self._git_dir), index)
+
+    def _apply(self, pathspecs: list[str] | None) -> None:
+        for entry in iter_status(self.git_root, pathspecs=pathspecs):
+            if entry.kind == "!":
+                continue
+            self._changed.add(entry.path)
+            if entry.added:
+                self._new.add(entry.path)
+            if entry.orig_path:
+                self._renames[entry.path] = entry.orig_path
+                self._renames[entry.orig_path] = entry.path
+
+    def _reseed(self) -> None:
+        # Watch first, then ask git, so nothing that happens in between is missed.
+        self._watcher.rebase()
+        self._anchor = self._read_anchor()
+        self._changed.clear()
+        self._new.clear()
+        self._renames.clear()
+        self.full_scans += 1
+        try:
+            self._apply(None)
+        except Exception:
+            self._changed.clear()
+            self._new.clear()
+
+    def _refresh(self, dirty: set[str]) -> None:
+        # Rename pairs are re-queried together so git can still pair them under a pathspec.
+        paths = set(dirty)
+        paths.update(self._renames[p] for p in dirty if p in self._renames)
+        prefixes = tuple(f"{p}/" for p in paths)
+        for bucket in (self._changed, self._new):
+            stale = {p for p in bucket if p in paths or p.startswith(prefixes)}
+            bucket.difference_update(stale)
+        for p in paths:
+            other = self._renames.pop(p, None)
+            if other is not None:
+                self._renames.pop(other, None)
+        self.scoped_scans += 1
+        self._apply([f":(literal){p}" for p in sorted(paths)])
+
+    def snapshot(self) -> WorkingChanges:
+        try:
+            dirty = self._watcher.drain()
+        except WatchOverflow:
+            self._reseed()
+            dirty = set()
+        except OSError:
+            # Typically the inotify watch limit, hit while following a new subtree.
+            self._watcher.close()
+            self._watcher = PollingWatcher(self.git_root, self._git_dir)
+            self._reseed()
+            dirty = set()
+
+        ignores = _ignore_files(self._git_dir)
+        if ignores != self._ignores or any(p.rsplit("/", 1)[-1] == ".gitignore" for p in dirty):
+            # Ignore rules moved: the set of pruned directories may have changed, so start over.
+            self._ignores = ignores
+            self._watcher.close()
+            self._watcher = self._make_watcher("auto" if self.backend == "inotify" else "poll")
+            self._reseed()
+        elif self._read_anchor() != self._anchor:
+            self._reseed()
+        elif dirty:
+            if len(dirty) > MAX_SCOPED_PATHS:
+                self._reseed()
+            else:
+                try:
+                    self._refresh(dirty)
+                except Exception:
+                    self._reseed()
+
+        return WorkingChanges(changed_files=sorted(self._changed), new_files=sorted(self._new))
+
+    def close(self) -> None:
+        self._watcher.close()
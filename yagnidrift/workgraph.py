@@ -1,7 +1,92 @@
-# ABOUTME: Re-export workgraph helpers from speedrift-lane-sdk.
+# ABOUTME: Re-export workgraph helpers from speedrift-lane-sdk, plus a bulk graph reader.
 # ABOUTME: Backward-compatible — all existing imports continue to work.
 
-from speedrift_lane_sdk.workgraph import (  # noqa: F401
-    Workgraph,
-    find_workgraph_dir,
-)
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from speedrift_lane_sdk.workgraph import Workgraph, find_workgraph_dir  # noqa: F401
+
+# The SDK is only imported when Workgraph / find_workgraph_dir are first used, so the graph readers
+# below stay cheap for the CLI's startup path.
+_SDK_NAMES = frozenset({"Workgraph", "find_workgraph_dir"})
+
+
+def __getattr__(name: str) -> Any:
+    if name in _SDK_NAMES:
+        from speedrift_lane_sdk import workgraph as sdk
+
+        value = getattr(sdk, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+CLOSED_STATUSES = frozenset({"done", "abandoned"})
+
+
+def locate_workgraph_dir(dir: str | None) -> Path | None:
+    # Stdlib-only equivalent of find_workgraph_dir that returns None instead of raising.
+    start = Path(dir) if dir else Path.cwd()
+    try:
+        start = start.resolve()
+    except OSError:
+        return None
+    if start.name == ".workgraph" and start.is_dir():
+        return start
+    for candidate in (start, *start.parents):
+        if (candidate / ".workgraph").is_dir():
+            return candidate / ".workgraph"
+    return None
+
+
+def load_graph_tasks(wg_dir: Path) -> dict[str, dict[str, Any]] | None:
+    # One read of graph.jsonl instead of a `wg show` round-trip per task.
+    path = wg_dir / "graph.jsonl"
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+    tasks: dict[str, dict[str, Any]] = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            node = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(node, dict) or node.get("kind", "task") != "task":
+            continue
+        task_id = node.get("id")
+        if task_id:
+            tasks[str(task_id)] = node
+    return tasks
+
+
+def find_graph_task(wg_dir: Path, task_id: str) -> dict[str, Any] | None:
+    # One task from graph.jsonl; lines not mentioning the id are skipped without being parsed. The
+    # last line for the id wins, as in load_graph_tasks.
+    try:
+        f = open(wg_dir / "graph.jsonl", encoding="utf-8")
+    except OSError:
+        return None
+    # An id json.dumps would escape is matched by parsing every line instead.
+    plain = task_id.isascii() and task_id.isprintable() and '"' not in task_id and "\\" not in task_id
+    needle = f'"{task_id}"' if plain else ""
+    found: dict[str, Any] | None = None
+    with f:
+        for line in f:
+            if needle not in line:
+                continue
+            try:
+                node = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(node, dict) and node.get("kind", "task") == "task" and str(node.get("id")) == task_id:
+                found = node
+    return found